@@ -0,0 +1,252 @@
+"""
+Admission Control
+Token bucket sized to the Gemini quota, with per-client fairness and priority lanes
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted soon enough; retry_after is the estimated wait"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens held, i.e. the largest burst
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until amount tokens are available (callers hold the controller lock)"""
+        self.refill()
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+
+class _Ticket:
+    def __init__(self, client_id: str, cost: float):
+        self.client_id = client_id
+        self.cost = cost
+        self.granted = False
+
+
+class _Lane:
+    """Waiting tickets of one priority, served round-robin across clients"""
+
+    def __init__(self, name: str, max_queue: int):
+        self.name = name
+        self.max_queue = max_queue
+        self.clients = OrderedDict()
+        self.size = 0
+        self.cost = 0.0
+
+    def push(self, ticket: _Ticket):
+        self.clients.setdefault(ticket.client_id, deque()).append(ticket)
+        self.size += 1
+        self.cost += ticket.cost
+
+    def head(self) -> _Ticket:
+        for tickets in self.clients.values():
+            return tickets[0]
+        return None
+
+    def remove(self, ticket: _Ticket, served: bool):
+        tickets = self.clients[ticket.client_id]
+        tickets.remove(ticket)
+        self.size -= 1
+        self.cost -= ticket.cost
+        if not tickets:
+            del self.clients[ticket.client_id]
+        elif served:
+            # The client goes to the back so others get the next token
+            self.clients.move_to_end(ticket.client_id)
+
+
+class AdmissionController:
+    INTERACTIVE = 'interactive'
+    BATCH = 'batch'
+
+    def __init__(self, rate_per_minute: float = 60, burst: float = 10, max_queue: Dict[str, int] = None,
+                 max_wait: Dict[str, float] = None, max_per_client: Dict[str, int] = None):
+        """
+        Admit upstream work at the quota rate, interactive lane first
+
+        Args:
+            rate_per_minute: Upstream calls per minute this process may make
+            burst: Calls that may be made at once after an idle period
+            max_queue: Waiting requests allowed per lane before new ones are rejected
+            max_wait: Longest wait accepted per lane before a request is rejected
+            max_per_client: Waiting requests allowed per client in each lane, so a client's
+                batch work never uses up its interactive allowance
+        """
+        self.bucket = TokenBucket(rate_per_minute / 60.0, burst)
+        max_queue = max_queue or {self.INTERACTIVE: 32, self.BATCH: 256}
+        # Lanes in priority order
+        self.lanes = OrderedDict(
+            (name, _Lane(name, max_queue.get(name, 32))) for name in (self.INTERACTIVE, self.BATCH)
+        )
+        self.max_wait = max_wait or {self.INTERACTIVE: 20, self.BATCH: 600}
+        self.max_per_client = max_per_client or {self.INTERACTIVE: 4, self.BATCH: 8}
+        # (lane, client_id) -> waiting tickets
+        self._waiting_per_client = {}
+        self._cond = threading.Condition()
+
+        self.admitted = {name: 0 for name in self.lanes}
+        self.rejected = {name: 0 for name in self.lanes}
+        self.charged = 0.0
+        self.wait_seconds = 0.0
+
+    def _estimate_wait(self, lane_name: str, cost: float) -> float:
+        """Seconds until a new ticket in lane_name would be served"""
+        ahead = 0.0
+        for name, lane in self.lanes.items():
+            ahead += lane.cost
+            if name == lane_name:
+                break
+        return self.bucket.time_until(ahead + cost)
+
+    def _next_ticket(self) -> _Ticket:
+        for lane in self.lanes.values():
+            ticket = lane.head()
+            if ticket is not None:
+                return ticket
+        return None
+
+    def _reject(self, lane: str, message: str, retry_after: float):
+        self.rejected[lane] += 1
+        raise AdmissionRejected(message, retry_after)
+
+    def acquire(self, client_id: str, lane: str = INTERACTIVE, cost: float = 1, max_wait: float = None) -> float:
+        """
+        Block until the request may call upstream
+
+        Args:
+            client_id: Identifies the caller for fairness, e.g. the client IP
+            lane: INTERACTIVE or BATCH
+            cost: Upstream calls the request will make
+            max_wait: Reject immediately if the estimated wait is longer than this
+                (defaults to the lane's max_wait)
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            AdmissionRejected: if the queue is full, the client already has too
+                many waiting requests, or the wait would exceed max_wait
+        """
+        cost = min(cost, self.bucket.capacity)
+        if max_wait is None:
+            max_wait = self.max_wait.get(lane, 20)
+        start = time.monotonic()
+        with self._cond:
+            queue = self.lanes[lane]
+            estimate = self._estimate_wait(lane, cost)
+            if queue.size >= queue.max_queue:
+                self._reject(lane, f"{lane} queue is full", estimate)
+            waiting_key = (lane, client_id)
+            if self._waiting_per_client.get(waiting_key, 0) >= self.max_per_client.get(lane, 4):
+                self._reject(lane, "Too many waiting requests from this client", estimate)
+            if estimate > max_wait:
+                self._reject(lane, f"Estimated wait of {estimate:.0f}s is too long", estimate)
+
+            ticket = _Ticket(client_id, cost)
+            queue.push(ticket)
+            self._waiting_per_client[waiting_key] = self._waiting_per_client.get(waiting_key, 0) + 1
+            deadline = start + max_wait
+            try:
+                while True:
+                    if self._next_ticket() is ticket:
+                        delay = self.bucket.time_until(cost)
+                        if delay == 0:
+                            self.bucket.tokens -= cost
+                            ticket.granted = True
+                            break
+                    else:
+                        delay = self.bucket.time_until(self._next_ticket().cost) or 0.05
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._reject(lane, "Timed out waiting for upstream quota", self._estimate_wait(lane, cost))
+                    self._cond.wait(min(delay, remaining))
+            finally:
+                queue.remove(ticket, served=ticket.granted)
+                self._waiting_per_client[waiting_key] -= 1
+                if not self._waiting_per_client[waiting_key]:
+                    del self._waiting_per_client[waiting_key]
+                self._cond.notify_all()
+
+            waited = time.monotonic() - start
+            self.admitted[lane] += 1
+            self.wait_seconds += waited
+            return waited
+
+    def charge(self, cost: float = 1):
+        """
+        Take tokens for an upstream call made without waiting, e.g. a retry of an admitted request
+
+        The bucket may go into debt, down to one full burst, which delays the
+        next admissions instead of letting retries exceed the quota.
+        """
+        with self._cond:
+            self.bucket.refill()
+            self.bucket.tokens = max(-self.bucket.capacity, self.bucket.tokens - cost)
+            self.charged += cost
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depths, available tokens and counters for monitoring"""
+        with self._cond:
+            self.bucket.refill()
+            return {
+                'rate_per_minute': self.bucket.rate * 60,
+                'tokens': round(self.bucket.tokens, 2),
+                'queued': {name: lane.size for name, lane in self.lanes.items()},
+                'admitted': dict(self.admitted),
+                'rejected': dict(self.rejected),
+                'charged': self.charged,
+                'wait_seconds': round(self.wait_seconds, 3)
+            }
+
+
+def create_admission_controller_from_env() -> AdmissionController:
+    """
+    Build a controller from ADMISSION_RATE_PER_MINUTE, ADMISSION_BURST, ADMISSION_MAX_QUEUE,
+    ADMISSION_MAX_BATCH_QUEUE, ADMISSION_MAX_WAIT, ADMISSION_MAX_BATCH_WAIT, ADMISSION_MAX_PER_CLIENT
+    and ADMISSION_MAX_BATCH_PER_CLIENT
+
+    The rate applies per worker process; set it to the Gemini quota divided by the worker count.
+    A request pays for its first call (or one per fan-out group) when it is admitted; retries
+    and section repairs are charged afterwards through charge().
+    """
+    return AdmissionController(
+        rate_per_minute=float(os.environ.get('ADMISSION_RATE_PER_MINUTE', 60)),
+        burst=float(os.environ.get('ADMISSION_BURST', 10)),
+        max_queue={
+            AdmissionController.INTERACTIVE: int(os.environ.get('ADMISSION_MAX_QUEUE', 32)),
+            AdmissionController.BATCH: int(os.environ.get('ADMISSION_MAX_BATCH_QUEUE', 256))
+        },
+        max_wait={
+            AdmissionController.INTERACTIVE: float(os.environ.get('ADMISSION_MAX_WAIT', 20)),
+            AdmissionController.BATCH: float(os.environ.get('ADMISSION_MAX_BATCH_WAIT', 600))
+        },
+        max_per_client={
+            AdmissionController.INTERACTIVE: int(os.environ.get('ADMISSION_MAX_PER_CLIENT', 4)),
+            AdmissionController.BATCH: int(os.environ.get('ADMISSION_MAX_BATCH_PER_CLIENT', 8))
+        }
+    )
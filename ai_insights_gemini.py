@@ -3,30 +3,25 @@ AI Insights Generator using Gemini 2.0 Flash
 Generates personalized career insights based on psychological test results
 """
 
+import asyncio
 import json
 import os
-from typing import Dict, Any
-import google.generativeai as genai
+import time
+import weakref
+from typing import Dict, Any, Iterator, List, Tuple
 from dotenv import load_dotenv
+from insights_json import SectionStreamParser, salvage_sections, strip_code_fence
+from insights_schema import SalvageError, SchemaValidationError, SchemaValidator, extract_format_example
+from metrics import LLM_ATTEMPT_FAILURES, LLM_CALL_SECONDS, record_llm_usage
+from llm_backends import create_backend_from_env
+from retry_policy import (InsightsGenerationError, create_retry_policy_from_env, gemini_circuit_breaker,
+                          is_retryable, is_throttled, is_upstream_failure)
 
 # Load environment variables
 load_dotenv()
 
-class AIInsightsGenerator:
-    def __init__(self):
-        """Initialize the AI Insights Generator with Gemini 2.0 Flash model"""
-        # Configure Gemini API
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
-        
-        genai.configure(api_key=api_key)
-        
-        # Initialize Gemini 2.0 Flash model
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        
-        # System prompt for generating insights
-        self.system_prompt = """
+# System prompt for generating insights; its JSON example is also the output schema
+SYSTEM_PROMPT = """
 You are a world-class career counselor, psychologist, and life coach with 20+ years of experience.  
 You deeply understand:
 - MBTI, Big Five, RIASEC, VARK, and intelligence types  
@@ -174,6 +169,197 @@ The report must include **exactly** the following fields:
 - No text outside JSON
 """
 
+# Compiled once at import and shared by every generator
+FORMAT_EXAMPLE = extract_format_example(SYSTEM_PROMPT)
+
+# Report shown when no insights can be generated; also a training sample for the storage codec
+FALLBACK_INSIGHTS = {
+    "best_field": {
+        "field": "ટેકનોલોજી અને IT",
+        "reasoning": "તમારા મૂલ્યાંકન પરિણામોના આધારે, ટેકનોલોજી ક્ષેત્ર વૃદ્ધિ અને શિક્ષણ માટે વિવિધ તકો પ્રદાન કરે છે.",
+        "match_percentage": 85,
+        "gujarat_opportunities": "ગુજરાતમાં અમદાવાદ, સુરત, અને ગાંધીનગરમાં IT કંપનીઓ વધી રહી છે",
+        "indian_market_outlook": "ભારતમાં IT ક્ષેત્ર ઝડપથી વિકસી રહ્યું છે અને રોજગારની તકો વધી રહી છે",
+        "specific_companies": ["TCS", "Infosys", "Wipro", "HCL"],
+        "salary_expectations": "₹25,000 થી ₹80,000 પ્રતિ મહિનો (અનુભવ પ્રમાણે)",
+        "growth_potential": "ઉચ્ચ વૃદ્ધિની સંભાવના",
+        "entry_requirements": "કોમ્પ્યુટર સાયન્સ અથવા સંબંધિત ક્ષેત્રમાં ડિગ્રી"
+    },
+    "roadmap": {
+        "short_term": {
+            "duration": "1–3 મહિના",
+            "goals": ["મૂળભૂત પ્રોગ્રામિંગ શીખો", "પોર્ટફોલિયો બનાવો"],
+            "skills_to_develop": ["HTML/CSS", "JavaScript", "Python"],
+            "resources": ["Coursera", "YouTube", "FreeCodeCamp"],
+            "specific_actions": ["દરરોજ 2 કલાક કોડિંગ પ્રેક્ટિસ", "ઓનલાઈન કોર્સ પૂર્ણ કરો"]
+        },
+        "mid_term": {
+            "duration": "6–12 મહિના",
+            "goals": ["અદ્યતન પ્રોગ્રામિંગ શીખો", "પ્રોજેક્ટ બનાવો"],
+            "skills_to_develop": ["React", "Node.js", "Database Management"],
+            "milestones": ["3 પ્રોજેક્ટ પૂર્ણ કરો", "GitHub પર કોડ અપલોડ કરો"]
+        },
+        "long_term": {
+            "duration": "1–2 વર્ષ",
+            "goals": ["નોકરી મેળવો", "નિપુણતા વિકસાવો"],
+            "expertise_areas": ["Full Stack Development", "Cloud Computing"],
+            "entrepreneurship_opportunities": "ગુજરાતમાં સ્ટાર્ટઅપ ઇકોસિસ્ટમ વિકસી રહ્યું છે"
+        }
+    },
+    "result_analysis": {
+        "strengths": [
+            {
+                "strength": "વિશ્લેષણાત્મક વિચારસરણી",
+                "reasoning": "તમારા પરિણામો દર્શાવે છે કે તમે સમસ્યાઓનું વિશ્લેષણ કરવામાં સારા છો",
+                "career_application": "પ્રોગ્રામિંગ અને ડેટા એનાલિસિસમાં ઉપયોગી"
+            }
+        ],
+        "weaknesses": [
+            {
+                "weakness": "તકનીકી કુશળતાની જરૂર",
+                "reasoning": "આધુનિક કારકિર્દી માટે તકનીકી જ્ઞાન જરૂરી છે",
+                "improvement_strategy": "ઓનલાઈન કોર્સ અને પ્રેક્ટિકલ પ્રોજેક્ટ દ્વારા શીખો"
+            }
+        ]
+    },
+    "career_recommendations": [
+        {
+            "job_role": "સોફ્ટવેર ડેવલપર",
+            "industry": "IT અને ટેકનોલોજી",
+            "explanation": "તમારી વિશ્લેષણાત્મક કુશળતા પ્રોગ્રામિંગ માટે યોગ્ય છે",
+            "growth_potential": "ઉચ્ચ",
+            "salary_range": "₹30,000 થી ₹1,00,000 પ્રતિ મહિનો",
+            "gujarat_companies": ["TCS Gandhinagar", "Infosys Ahmedabad"],
+            "required_skills": ["Java", "Python", "Problem Solving"]
+        }
+    ],
+    "skill_recommendations": {
+        "technical_skills": [
+            {
+                "skill": "પ્રોગ્રામિંગ (Python/Java)",
+                "importance": "ઉચ્ચ",
+                "learning_resources": ["https://www.coursera.org/learn/python"]
+            }
+        ],
+        "soft_skills": [
+            {
+                "skill": "સંવાદ કુશળતા",
+                "importance": "ઉચ્ચ",
+                "development_approach": "ટીમ પ્રોજેક્ટ અને પ્રેઝન્ટેશન દ્વારા"
+            }
+        ]
+    },
+    "skill_gaps": [
+        {
+            "gap": "પ્રેક્ટિકલ પ્રોગ્રામિંગ અનુભવ",
+            "impact": "નોકરી મેળવવામાં મુશ્કેલી",
+            "priority": "ઉચ્ચ",
+            "learning_path": "ઓનલાઈન કોર્સ અને પ્રોજેક્ટ બિલ્ડિંગ",
+            "free_resources": ["https://www.freecodecamp.org"]
+        }
+    ],
+    "future_plans": {
+        "3_year_plan": {
+            "career_position": "સિનિયર સોફ્ટવેર ડેવલપર",
+            "key_achievements": ["ટીમ લીડ બનવું", "મુખ્ય પ્રોજેક્ટ હેન્ડલ કરવું"]
+        },
+        "5_year_plan": {
+            "career_position": "ટેકનિકલ આર્કિટેક્ટ",
+            "expertise_areas": ["Cloud Computing", "System Design"]
+        },
+        "10_year_plan": {
+            "career_vision": "ટેકનોલોજી કંપનીના CTO અથવા પોતાનું સ્ટાર્ટઅપ",
+            "entrepreneurial_potential": "ગુજરાતમાં ટેક સ્ટાર્ટઅપ શરૂ કરવાની સારી સંભાવના"
+        }
+    },
+    "daily_habits": [
+        {
+            "habit": "દરરોજ 1 કલાક કોડિંગ પ્રેક્ટિસ",
+            "purpose": "તકનીકી કુશળતા સુધારવા માટે",
+            "implementation": "સવારે અથવા સાંજે નિયમિત સમય નક્કી કરો"
+        }
+    ],
+    "certifications": [
+        {
+            "name": "Google IT Support Certificate",
+            "provider": "Google",
+            "direct_enrollment_link": "https://grow.google/certificates/it-support/",
+            "why_recommended": "IT ક્ષેત્રમાં પ્રવેશ માટે ઉત્તમ પ્રમાણપત્ર",
+            "difficulty_level": "શરૂઆત",
+            "estimated_duration": "3-6 મહિના"
+        }
+    ],
+    "additional_insights": {
+        "work_environment": "સહયોગી ટીમ વાતાવરણ, લવચીક કામના કલાકો",
+        "stress_management": "નિયમિત વિરામ, યોગ, અને સમય વ્યવસ્થાપન",
+        "gujarat_specific_advice": "ગુજરાતમાં GIFT City અને અમદાવાદના IT હબમાં તકો શોધો"
+    }
+}
+
+class AIInsightsGenerator:
+    MODEL_NAME = 'gemini-2.0-flash-exp'
+
+    # Top-level fields every generated report must contain
+    REQUIRED_FIELDS = ['best_field', 'roadmap', 'result_analysis', 'career_recommendations']
+
+    # Every top-level section of the schema in system_prompt and its JSON type
+    SECTION_TYPES = {name: type(value) for name, value in FORMAT_EXAMPLE.items()}
+
+    # Full-schema validator and normalizer for generated reports
+    SCHEMA = SchemaValidator(
+        FORMAT_EXAMPLE,
+        required=REQUIRED_FIELDS,
+        ranges={'best_field.match_percentage': (0, 100)}
+    )
+
+    # Fan-out mode: sections other sections depend on, then groups generated concurrently
+    FANOUT_FIRST = ['best_field']
+    FANOUT_GROUPS = [
+        ['roadmap'],
+        ['result_analysis'],
+        ['career_recommendations'],
+        ['skill_recommendations', 'skill_gaps'],
+        ['future_plans', 'daily_habits'],
+        ['certifications', 'additional_insights'],
+    ]
+
+    GENERATION_CONFIG = {
+        'temperature': 0.7,
+        'top_p': 0.8,
+        'top_k': 40,
+        'max_output_tokens': 4000,
+    }
+
+    def __init__(self, backend=None):
+        """
+        Initialize the AI Insights Generator with Gemini 2.0 Flash model
+        
+        Args:
+            backend: Model backend from llm_backends (defaults to the one selected by LLM_BACKEND)
+        """
+        # Configure the model backend (Gemini unless a local fake server is selected)
+        self.backend = backend or create_backend_from_env(self.MODEL_NAME)
+        self.model = self.backend.model
+        
+        # Limits for generate_insights_async
+        self.max_concurrent_calls = int(os.getenv('GEMINI_MAX_CONCURRENT_CALLS', 16))
+        self.call_timeout = float(os.getenv('GEMINI_CALL_TIMEOUT', 60))
+        self._async_semaphores = weakref.WeakKeyDictionary()
+        
+        # Backoff between attempts and the process-wide circuit breaker
+        self.retry_policy = create_retry_policy_from_env()
+        self.circuit_breaker = gemini_circuit_breaker
+        
+        # Called with the call kind for each retry or repair call not paid for when the request
+        # was admitted, e.g. to charge it to the admission controller
+        self.extra_call_meter = None
+        
+        # System prompt for generating insights
+        self.system_prompt = SYSTEM_PROMPT
+        
+        # Static part of the prompt, sent upstream once per process when supported
+        self.prompt_cache = self.backend.create_prompt_cache(self.system_prompt)
+
     def format_test_results(self, test_results: Dict[str, Any]) -> str:
         """Format test results into a readable string for the AI model"""
         formatted_results = "PSYCHOLOGICAL TEST RESULTS:\n\n"
@@ -189,6 +375,224 @@ The report must include **exactly** the following fields:
         
         return formatted_results
 
+    def build_prompt(self, test_results: Dict[str, Any]) -> str:
+        """Combine the system prompt with the formatted test results"""
+        formatted_results = self.format_test_results(test_results)
+        return f"{self.system_prompt}\n\nHere are the test results:\n\n{formatted_results}"
+
+    def prepare_request(self, test_results: Dict[str, Any]) -> Tuple[Any, str]:
+        """
+        Return the model to call and the prompt to send for a full report
+        
+        When the static system prompt is already held by the model (cached
+        content or system instruction) only the test results are sent.
+        """
+        model, has_static_prompt = self.prompt_cache.get_model()
+        return model, self._request_prompt(test_results, has_static_prompt)
+
+    async def prepare_request_async(self, test_results: Dict[str, Any]) -> Tuple[Any, str]:
+        """prepare_request for the event loop; creating or extending the prompt cache runs in a thread"""
+        model, has_static_prompt = await self.prompt_cache.get_model_async()
+        return model, self._request_prompt(test_results, has_static_prompt)
+
+    def _request_prompt(self, test_results: Dict[str, Any], has_static_prompt: bool) -> str:
+        if has_static_prompt:
+            formatted_results = self.format_test_results(test_results)
+            return f"Here are the test results:\n\n{formatted_results}"
+        return self.build_prompt(test_results)
+
+    def get_section_examples(self) -> Dict[str, Any]:
+        """Return the JSON format example embedded in system_prompt, keyed by section"""
+        if self.system_prompt is SYSTEM_PROMPT:
+            return FORMAT_EXAMPLE
+        return extract_format_example(self.system_prompt)
+
+    def build_section_prompt(self, test_results: Dict[str, Any], sections: List[str],
+                             context: Dict[str, Any] = None) -> str:
+        """
+        Prompt asking the model for only the given top-level sections
+        
+        Only the format examples of the requested sections are included, so the
+        prompt is much shorter than the full system prompt.
+        
+        Args:
+            test_results: Dictionary containing test results from various psychological tests
+            sections: Top-level sections to generate
+            context: Sections that are already generated and must stay consistent
+        """
+        examples = self.get_section_examples()
+        preamble, _, task = self.system_prompt.partition('### YOUR TASK:')
+        _, _, rules = task.partition('### Rules:')
+        if not task or not rules:
+            preamble, rules = self.system_prompt, ''
+        
+        section_format = json.dumps(
+            {name: examples[name] for name in sections if name in examples},
+            ensure_ascii=False, indent=2
+        )
+        prompt = (
+            f"{preamble.rstrip()}\n\n"
+            f"### YOUR TASK:\n"
+            f"Generate ONLY these fields of the Gujarati AI Career Insight Report: {', '.join(sections)}.\n"
+            f"Return a JSON object in exactly this format, with no other fields:\n\n"
+            f"```json\n{section_format}\n```\n"
+        )
+        if rules:
+            prompt += f"\n### Rules:{rules.rstrip()}\n"
+        if context:
+            prompt += (
+                f"\n### Already generated (stay consistent with it, do not repeat it):\n"
+                f"{json.dumps(context, ensure_ascii=False)}\n"
+            )
+        
+        formatted_results = self.format_test_results(test_results)
+        return f"{prompt}\n\nHere are the test results:\n\n{formatted_results}"
+
+    def parse_response(self, response_text: str) -> Dict[str, Any]:
+        """Parse and validate the raw text returned by the AI model"""
+        if not response_text:
+            raise ValueError("Empty response from AI model")
+        
+        # Clean the response text, removing any markdown code blocks
+        response_text = strip_code_fence(response_text)
+        
+        # Parse the JSON response
+        insights_json = json.loads(response_text)
+        
+        return self.validate_insights(insights_json)
+
+    def validate_insights(self, insights_json: Dict[str, Any], require_all: bool = True) -> Dict[str, Any]:
+        """
+        Validate the report against the full schema and return it normalized
+        
+        Fixable deviations (numbers as strings, out-of-range percentages, a
+        single item instead of a list) are coerced in place of a retry.
+        
+        Args:
+            insights_json: Parsed report
+            require_all: Reject the report if any section is missing or invalid;
+                otherwise only required sections must be valid and broken
+                optional sections are dropped
+            
+        Raises:
+            SchemaValidationError: with the valid sections and the ones to regenerate
+        """
+        result = self.SCHEMA.validate(insights_json)
+        if result.coercions:
+            print(f"Normalized {len(result.coercions)} fields in AI insights")
+        
+        invalid = result.invalid_sections
+        if not require_all:
+            invalid = [name for name in invalid if name in self.REQUIRED_FIELDS]
+        if invalid:
+            details = ', '.join(f"{name} ({result.errors[name]})" for name in invalid)
+            raise SchemaValidationError(f"Invalid sections: {details}", result.document, result.invalid_sections)
+        
+        return result.document
+
+    def _meter_extra_call(self, kind: str, extra: bool):
+        if extra and self.extra_call_meter is not None:
+            self.extra_call_meter(kind)
+
+    def _call_model(self, model: Any, prompt: str, kind: str, extra: bool = False) -> Any:
+        """
+        Call Gemini once, recording latency, outcome and token usage
+        
+        Args:
+            extra: True for retries and repairs beyond the calls the request was admitted for
+        """
+        self._meter_extra_call(kind, extra)
+        start = time.perf_counter()
+        outcome = 'upstream_error'
+        try:
+            response = model.generate_content(prompt, generation_config=self.GENERATION_CONFIG)
+            outcome = 'ok'
+        finally:
+            LLM_CALL_SECONDS.observe(time.perf_counter() - start, kind=kind, outcome=outcome)
+        record_llm_usage(response, kind)
+        return response
+
+    async def _call_model_async(self, model: Any, prompt: str, kind: str, timeout: float,
+                                extra: bool = False) -> Any:
+        """Asynchronous variant of _call_model, bounded by the semaphore and a timeout"""
+        self._meter_extra_call(kind, extra)
+        async with self._get_async_semaphore():
+            start = time.perf_counter()
+            outcome = 'upstream_error'
+            try:
+                response = await asyncio.wait_for(
+                    model.generate_content_async(prompt, generation_config=self.GENERATION_CONFIG),
+                    timeout=timeout
+                )
+                outcome = 'ok'
+            except asyncio.TimeoutError:
+                outcome = 'timeout'
+                raise
+            finally:
+                LLM_CALL_SECONDS.observe(time.perf_counter() - start, kind=kind, outcome=outcome)
+        record_llm_usage(response, kind)
+        return response
+
+    def _plan_salvage(self, response_text: str, parse_error: Exception) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Recover the usable sections of a response that failed to parse
+        
+        Returns:
+            (sections, missing) where missing are the sections to re-request
+            
+        Raises:
+            parse_error: if nothing could be recovered, so a full retry is needed
+        """
+        if isinstance(parse_error, SchemaValidationError):
+            sections, missing = parse_error.document, parse_error.invalid_sections
+        else:
+            salvaged, _ = salvage_sections(response_text or '', self.SECTION_TYPES)
+            result = self.SCHEMA.validate(salvaged)
+            sections, missing = result.document, result.invalid_sections
+        if not sections:
+            raise parse_error
+        
+        print(f"Salvaged {len(sections)} sections after: {parse_error}")
+        if missing:
+            print(f"Re-requesting only: {', '.join(missing)}")
+        return sections, missing
+
+    def _merge_salvage(self, sections: Dict[str, Any], missing: List[str], repair_text: str) -> Dict[str, Any]:
+        """Merge the re-requested sections into the salvaged ones and validate the result"""
+        repaired, _ = salvage_sections(repair_text or '', {name: self.SECTION_TYPES[name] for name in missing})
+        sections.update(self.SCHEMA.validate(repaired, missing).document)
+        
+        # Keep the schema's section order
+        ordered = {name: sections[name] for name in self.SECTION_TYPES if name in sections}
+        ordered.update({name: value for name, value in sections.items() if name not in ordered})
+        try:
+            return self.validate_insights(ordered, require_all=False)
+        except SchemaValidationError as e:
+            raise SalvageError(f"Salvage incomplete: {e}", e.document, e.invalid_sections) from e
+
+    def _salvage_response(self, test_results: Dict[str, Any], response_text: str,
+                          parse_error: Exception) -> Dict[str, Any]:
+        """Repair a failed response, asking the model again for only the missing sections"""
+        sections, missing = self._plan_salvage(response_text, parse_error)
+        repair_text = ''
+        if missing:
+            response = self._call_model(self.model, self.build_section_prompt(test_results, missing), 'salvage',
+                                        extra=True)
+            repair_text = response.text
+        return self._merge_salvage(sections, missing, repair_text)
+
+    async def _salvage_response_async(self, test_results: Dict[str, Any], response_text: str,
+                                      parse_error: Exception, timeout: float) -> Dict[str, Any]:
+        """Asynchronous variant of _salvage_response"""
+        sections, missing = self._plan_salvage(response_text, parse_error)
+        repair_text = ''
+        if missing:
+            response = await self._call_model_async(
+                self.model, self.build_section_prompt(test_results, missing), 'salvage', timeout, extra=True
+            )
+            repair_text = response.text
+        return self._merge_salvage(sections, missing, repair_text)
+
     def generate_insights(self, test_results: Dict[str, Any], max_retries: int = 3) -> Dict[str, Any]:
         """
         Generate AI insights based on test results with retry logic
@@ -200,196 +604,302 @@ The report must include **exactly** the following fields:
         Returns:
             Dictionary containing AI-generated insights in JSON format
         """
-        last_error = None
+        # The prompt is the same for every attempt
+        model, full_prompt = self.prepare_request(test_results)
+        
+        for attempt in range(max_retries):
+            # Fail fast without calling Gemini while it is known to be unhealthy
+            with self.circuit_breaker.guard():
+                try:
+                    print(f"Generating AI insights (attempt {attempt + 1}/{max_retries})...")
+                    
+                    # Generate insights using Gemini with specific parameters
+                    response = self._call_model(model, full_prompt, 'full', extra=attempt > 0)
+                    self.prompt_cache.record_usage(response)
+                    
+                    try:
+                        insights_json = self.parse_response(response.text)
+                    except ValueError as parse_error:
+                        insights_json = self._salvage_response(test_results, response.text, parse_error)
+                    self.circuit_breaker.record_success()
+                    
+                    print("AI insights generated successfully!")
+                    return insights_json
+                    
+                except Exception as e:
+                    delay = self._handle_failed_attempt(e, attempt, max_retries)
+            
+            print(f"Retrying in {delay:.1f} seconds...")
+            time.sleep(delay)
+        
+        raise InsightsGenerationError(f"Failed to generate AI insights after {max_retries} attempts")
+
+    def _handle_failed_attempt(self, error: Exception, attempt: int, max_retries: int) -> float:
+        """
+        Log and classify a failed attempt
+        
+        Returns:
+            Seconds to wait before the next attempt
+            
+        Raises:
+            InsightsGenerationError: if the error is not retryable or no attempts are left
+        """
+        if isinstance(error, json.JSONDecodeError):
+            description = f"JSON parsing error: {error}"
+            reason = 'json_error'
+        elif isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+            description = "Timed out waiting for the AI model"
+            reason = 'timeout'
+        elif isinstance(error, SalvageError):
+            description = f"Generation error: {error}"
+            reason = 'salvage_error'
+        elif isinstance(error, SchemaValidationError):
+            description = f"Generation error: {error}"
+            reason = 'schema_error'
+        elif isinstance(error, ValueError):
+            # e.g. an empty response
+            description = f"Generation error: {error}"
+            reason = 'invalid_response'
+        else:
+            description = f"Generation error: {error}"
+            reason = 'upstream_error' if is_upstream_failure(error) or not is_retryable(error) else 'other'
+        print(f"Attempt {attempt + 1} failed: {description}")
+        LLM_ATTEMPT_FAILURES.inc(reason=reason)
+        
+        if is_upstream_failure(error):
+            self.circuit_breaker.record_failure()
+        elif is_retryable(error):
+            # Gemini answered, the output was just unusable
+            self.circuit_breaker.record_success()
+        
+        if not is_retryable(error):
+            raise InsightsGenerationError(
+                f"Failed to generate AI insights: {description}",
+                retryable=False
+            ) from error
+        
+        if attempt >= max_retries - 1:
+            retry_after = self.circuit_breaker.retry_after()
+            if retry_after is None and is_throttled(error):
+                retry_after = self.retry_policy.backoff_ceiling(attempt + 1)
+            raise InsightsGenerationError(
+                f"Failed to generate AI insights after {max_retries} attempts. Last error: {description}",
+                retryable=True,
+                retry_after=retry_after
+            ) from error
+        
+        return self.retry_policy.compute_delay(attempt)
+
+    def _get_async_semaphore(self) -> asyncio.Semaphore:
+        """Return the upstream-call semaphore for the running event loop"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._async_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrent_calls)
+            self._async_semaphores[loop] = semaphore
+        return semaphore
+
+    async def generate_insights_async(self, test_results: Dict[str, Any], max_retries: int = 3,
+                                      timeout: float = None) -> Dict[str, Any]:
+        """
+        Asynchronous variant of generate_insights using the async Gemini client
+        
+        At most max_concurrent_calls upstream calls run at once per event loop;
+        further callers wait on the semaphore without holding a thread.
+        
+        Args:
+            test_results: Dictionary containing test results from various psychological tests
+            max_retries: Maximum number of retry attempts
+            timeout: Seconds allowed per upstream call (defaults to call_timeout)
+            
+        Returns:
+            Dictionary containing AI-generated insights in JSON format
+        """
+        timeout = timeout if timeout is not None else self.call_timeout
+        model, full_prompt = await self.prepare_request_async(test_results)
+        
+        for attempt in range(max_retries):
+            # Released in the guard even if the task is cancelled mid-call
+            with self.circuit_breaker.guard():
+                try:
+                    print(f"Generating AI insights asynchronously (attempt {attempt + 1}/{max_retries})...")
+                    
+                    response = await self._call_model_async(
+                        model, full_prompt, 'full', timeout, extra=attempt > 0
+                    )
+                    self.prompt_cache.record_usage(response)
+                    
+                    try:
+                        insights_json = self.parse_response(response.text)
+                    except ValueError as parse_error:
+                        insights_json = await self._salvage_response_async(
+                            test_results, response.text, parse_error, timeout
+                        )
+                    self.circuit_breaker.record_success()
+                    
+                    print("AI insights generated successfully!")
+                    return insights_json
+                    
+                except Exception as e:
+                    delay = self._handle_failed_attempt(e, attempt, max_retries)
+            
+            print(f"Retrying in {delay:.1f} seconds...")
+            await asyncio.sleep(delay)
+        
+        raise InsightsGenerationError(f"Failed to generate AI insights after {max_retries} attempts")
+
+    async def _generate_sections_async(self, test_results: Dict[str, Any], sections: List[str],
+                                       context: Dict[str, Any], timeout: float,
+                                       max_retries: int) -> Dict[str, Any]:
+        """Generate one fan-out group, retrying only the sections that are still missing"""
+        generated = {}
+        missing = list(sections)
         
         for attempt in range(max_retries):
+            with self.circuit_breaker.guard():
+                try:
+                    response = await self._call_model_async(
+                        self.model, self.build_section_prompt(test_results, missing, context), 'section', timeout,
+                        extra=attempt > 0
+                    )
+                    self.circuit_breaker.record_success()
+                    
+                    found, _ = salvage_sections(
+                        response.text or '', {name: self.SECTION_TYPES[name] for name in missing}
+                    )
+                    result = self.SCHEMA.validate(found, missing)
+                    generated.update(result.document)
+                    missing = result.invalid_sections
+                    if not missing:
+                        return generated
+                    raise SchemaValidationError(f"Missing sections: {', '.join(missing)}", generated, missing)
+                    
+                except Exception as e:
+                    try:
+                        delay = self._handle_failed_attempt(e, attempt, max_retries)
+                    except InsightsGenerationError:
+                        # Give back what was generated; required sections are checked by the caller
+                        print(f"Giving up on sections: {', '.join(missing)}")
+                        return generated
+            
+            await asyncio.sleep(delay)
+        
+        return generated
+
+    async def generate_insights_fanout_async(self, test_results: Dict[str, Any], max_retries: int = 3,
+                                             timeout: float = None) -> Dict[str, Any]:
+        """
+        Generate AI insights with one smaller prompt per group of sections
+        
+        The groups in FANOUT_FIRST are generated first and passed as context to
+        the FANOUT_GROUPS, which then run concurrently. Wall-clock time is
+        bounded by the slowest group instead of the whole document.
+        
+        Args:
+            test_results: Dictionary containing test results from various psychological tests
+            max_retries: Maximum number of attempts per group
+            timeout: Seconds allowed per upstream call (defaults to call_timeout)
+            
+        Returns:
+            Dictionary containing AI-generated insights in the same schema as generate_insights
+        """
+        timeout = timeout if timeout is not None else self.call_timeout
+        print(f"Generating AI insights in fan-out mode ({len(self.FANOUT_GROUPS) + 1} prompts)...")
+        
+        context = await self._generate_sections_async(test_results, self.FANOUT_FIRST, None, timeout, max_retries)
+        for name in self.FANOUT_FIRST:
+            if name not in context:
+                raise InsightsGenerationError(f"Failed to generate AI insights. Missing required field: {name}")
+        
+        results = await asyncio.gather(*[
+            self._generate_sections_async(test_results, group, context, timeout, max_retries)
+            for group in self.FANOUT_GROUPS
+        ])
+        
+        insights = dict(context)
+        for generated in results:
+            insights.update(generated)
+        
+        ordered = {name: insights[name] for name in self.SECTION_TYPES if name in insights}
+        try:
+            ordered = self.validate_insights(ordered, require_all=False)
+        except ValueError as e:
+            raise InsightsGenerationError(f"Failed to generate AI insights. {e}") from e
+        
+        print("AI insights generated successfully!")
+        return ordered
+
+    def generate_insights_stream(self, test_results: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+        """
+        Generate AI insights in streaming mode
+        
+        Sections cannot be taken back once yielded, so there is no full retry
+        here; sections missing at the end of the stream are requested once more
+        on their own. Callers should fall back to generate_insights on failure.
+        
+        Args:
+            test_results: Dictionary containing test results from various psychological tests
+            
+        Yields:
+            (section_name, section_value) for each top-level field as soon as it is complete
+        """
+        print("Streaming AI insights...")
+        
+        # The trial is released if the client disconnects (GeneratorExit) before an outcome is recorded
+        trial = self.circuit_breaker.before_call()
+        
+        try:
+            model, full_prompt = self.prepare_request(test_results)
+            start = time.perf_counter()
+            outcome = 'upstream_error'
             try:
-                print(f"Generating AI insights (attempt {attempt + 1}/{max_retries})...")
-                
-                # Format test results
-                formatted_results = self.format_test_results(test_results)
-                
-                # Create the complete prompt
-                full_prompt = f"{self.system_prompt}\n\nHere are the test results:\n\n{formatted_results}"
-                
-                # Generate insights using Gemini with specific parameters
-                response = self.model.generate_content(
+                response = model.generate_content(
                     full_prompt,
-                    generation_config={
-                        'temperature': 0.7,
-                        'top_p': 0.8,
-                        'top_k': 40,
-                        'max_output_tokens': 4000,
-                    }
+                    generation_config=self.GENERATION_CONFIG,
+                    stream=True
                 )
                 
-                if not response.text:
-                    raise ValueError("Empty response from AI model")
-                
-                # Clean the response text
-                response_text = response.text.strip()
-                
-                # Remove any markdown code blocks if present
-                if response_text.startswith('```json'):
-                    response_text = response_text[7:]
-                if response_text.endswith('```'):
-                    response_text = response_text[:-3]
-                
-                response_text = response_text.strip()
-                
-                # Parse the JSON response
-                insights_json = json.loads(response_text)
-                
-                # Validate that we have the required fields
-                required_fields = ['best_field', 'roadmap', 'result_analysis', 'career_recommendations']
-                for field in required_fields:
-                    if field not in insights_json:
-                        raise ValueError(f"Missing required field: {field}")
-                
-                print("AI insights generated successfully!")
-                return insights_json
-                
-            except json.JSONDecodeError as e:
-                last_error = f"JSON parsing error: {e}"
-                print(f"Attempt {attempt + 1} failed: {last_error}")
-                if attempt < max_retries - 1:
-                    print("Retrying...")
-                    continue
-                    
-            except Exception as e:
-                last_error = f"Generation error: {e}"
-                print(f"Attempt {attempt + 1} failed: {last_error}")
-                if attempt < max_retries - 1:
-                    print("Retrying...")
-                    continue
-        
-        # If all attempts failed, raise an exception instead of returning fallback
-        raise Exception(f"Failed to generate AI insights after {max_retries} attempts. Last error: {last_error}")
-
-    def _get_fallback_insights(self) -> Dict[str, Any]:
-        """Provide fallback insights in case of API failure"""
-        return {
-            "best_field": {
-                "field": "ટેકનોલોજી અને IT",
-                "reasoning": "તમારા મૂલ્યાંકન પરિણામોના આધારે, ટેકનોલોજી ક્ષેત્ર વૃદ્ધિ અને શિક્ષણ માટે વિવિધ તકો પ્રદાન કરે છે.",
-                "match_percentage": 85,
-                "gujarat_opportunities": "ગુજરાતમાં અમદાવાદ, સુરત, અને ગાંધીનગરમાં IT કંપનીઓ વધી રહી છે",
-                "indian_market_outlook": "ભારતમાં IT ક્ષેત્ર ઝડપથી વિકસી રહ્યું છે અને રોજગારની તકો વધી રહી છે",
-                "specific_companies": ["TCS", "Infosys", "Wipro", "HCL"],
-                "salary_expectations": "₹25,000 થી ₹80,000 પ્રતિ મહિનો (અનુભવ પ્રમાણે)",
-                "growth_potential": "ઉચ્ચ વૃદ્ધિની સંભાવના",
-                "entry_requirements": "કોમ્પ્યુટર સાયન્સ અથવા સંબંધિત ક્ષેત્રમાં ડિગ્રી"
-            },
-            "roadmap": {
-                "short_term": {
-                    "duration": "1–3 મહિના",
-                    "goals": ["મૂળભૂત પ્રોગ્રામિંગ શીખો", "પોર્ટફોલિયો બનાવો"],
-                    "skills_to_develop": ["HTML/CSS", "JavaScript", "Python"],
-                    "resources": ["Coursera", "YouTube", "FreeCodeCamp"],
-                    "specific_actions": ["દરરોજ 2 કલાક કોડિંગ પ્રેક્ટિસ", "ઓનલાઈન કોર્સ પૂર્ણ કરો"]
-                },
-                "mid_term": {
-                    "duration": "6–12 મહિના",
-                    "goals": ["અદ્યતન પ્રોગ્રામિંગ શીખો", "પ્રોજેક્ટ બનાવો"],
-                    "skills_to_develop": ["React", "Node.js", "Database Management"],
-                    "milestones": ["3 પ્રોજેક્ટ પૂર્ણ કરો", "GitHub પર કોડ અપલોડ કરો"]
-                },
-                "long_term": {
-                    "duration": "1–2 વર્ષ",
-                    "goals": ["નોકરી મેળવો", "નિપુણતા વિકસાવો"],
-                    "expertise_areas": ["Full Stack Development", "Cloud Computing"],
-                    "entrepreneurship_opportunities": "ગુજરાતમાં સ્ટાર્ટઅપ ઇકોસિસ્ટમ વિકસી રહ્યું છે"
-                }
-            },
-            "result_analysis": {
-                "strengths": [
-                    {
-                        "strength": "વિશ્લેષણાત્મક વિચારસરણી",
-                        "reasoning": "તમારા પરિણામો દર્શાવે છે કે તમે સમસ્યાઓનું વિશ્લેષણ કરવામાં સારા છો",
-                        "career_application": "પ્રોગ્રામિંગ અને ડેટા એનાલિસિસમાં ઉપયોગી"
-                    }
-                ],
-                "weaknesses": [
-                    {
-                        "weakness": "તકનીકી કુશળતાની જરૂર",
-                        "reasoning": "આધુનિક કારકિર્દી માટે તકનીકી જ્ઞાન જરૂરી છે",
-                        "improvement_strategy": "ઓનલાઈન કોર્સ અને પ્રેક્ટિકલ પ્રોજેક્ટ દ્વારા શીખો"
-                    }
-                ]
-            },
-            "career_recommendations": [
-                {
-                    "job_role": "સોફ્ટવેર ડેવલપર",
-                    "industry": "IT અને ટેકનોલોજી",
-                    "explanation": "તમારી વિશ્લેષણાત્મક કુશળતા પ્રોગ્રામિંગ માટે યોગ્ય છે",
-                    "growth_potential": "ઉચ્ચ",
-                    "salary_range": "₹30,000 થી ₹1,00,000 પ્રતિ મહિનો",
-                    "gujarat_companies": ["TCS Gandhinagar", "Infosys Ahmedabad"],
-                    "required_skills": ["Java", "Python", "Problem Solving"]
-                }
-            ],
-            "skill_recommendations": {
-                "technical_skills": [
-                    {
-                        "skill": "પ્રોગ્રામિંગ (Python/Java)",
-                        "importance": "ઉચ્ચ",
-                        "learning_resources": ["https://www.coursera.org/learn/python"]
-                    }
-                ],
-                "soft_skills": [
-                    {
-                        "skill": "સંવાદ કુશળતા",
-                        "importance": "ઉચ્ચ",
-                        "development_approach": "ટીમ પ્રોજેક્ટ અને પ્રેઝન્ટેશન દ્વારા"
-                    }
-                ]
-            },
-            "skill_gaps": [
-                {
-                    "gap": "પ્રેક્ટિકલ પ્રોગ્રામિંગ અનુભવ",
-                    "impact": "નોકરી મેળવવામાં મુશ્કેલી",
-                    "priority": "ઉચ્ચ",
-                    "learning_path": "ઓનલાઈન કોર્સ અને પ્રોજેક્ટ બિલ્ડિંગ",
-                    "free_resources": ["https://www.freecodecamp.org"]
-                }
-            ],
-            "future_plans": {
-                "3_year_plan": {
-                    "career_position": "સિનિયર સોફ્ટવેર ડેવલપર",
-                    "key_achievements": ["ટીમ લીડ બનવું", "મુખ્ય પ્રોજેક્ટ હેન્ડલ કરવું"]
-                },
-                "5_year_plan": {
-                    "career_position": "ટેકનિકલ આર્કિટેક્ટ",
-                    "expertise_areas": ["Cloud Computing", "System Design"]
-                },
-                "10_year_plan": {
-                    "career_vision": "ટેકનોલોજી કંપનીના CTO અથવા પોતાનું સ્ટાર્ટઅપ",
-                    "entrepreneurial_potential": "ગુજરાતમાં ટેક સ્ટાર્ટઅપ શરૂ કરવાની સારી સંભાવના"
-                }
-            },
-            "daily_habits": [
-                {
-                    "habit": "દરરોજ 1 કલાક કોડિંગ પ્રેક્ટિસ",
-                    "purpose": "તકનીકી કુશળતા સુધારવા માટે",
-                    "implementation": "સવારે અથવા સાંજે નિયમિત સમય નક્કી કરો"
-                }
-            ],
-            "certifications": [
-                {
-                    "name": "Google IT Support Certificate",
-                    "provider": "Google",
-                    "direct_enrollment_link": "https://grow.google/certificates/it-support/",
-                    "why_recommended": "IT ક્ષેત્રમાં પ્રવેશ માટે ઉત્તમ પ્રમાણપત્ર",
-                    "difficulty_level": "શરૂઆત",
-                    "estimated_duration": "3-6 મહિના"
-                }
-            ],
-            "additional_insights": {
-                "work_environment": "સહયોગી ટીમ વાતાવરણ, લવચીક કામના કલાકો",
-                "stress_management": "નિયમિત વિરામ, યોગ, અને સમય વ્યવસ્થાપન",
-                "gujarat_specific_advice": "ગુજરાતમાં GIFT City અને અમદાવાદના IT હબમાં તકો શોધો"
-            }
-        }
+                parser = SectionStreamParser(lenient=True)
+                received = set()
+                for chunk in response:
+                    for name, value in parser.feed(chunk.text):
+                        try:
+                            value = self.SCHEMA.validate_section(name, value)
+                        except ValueError as e:
+                            # Left out of received, so it is re-requested below
+                            print(f"Warning: Invalid streamed section {e}")
+                            continue
+                        received.add(name)
+                        yield name, value
+                outcome = 'ok'
+            except GeneratorExit:
+                # The client disconnected mid-stream
+                outcome = 'cancelled'
+                raise
+            finally:
+                LLM_CALL_SECONDS.observe(time.perf_counter() - start, kind='stream', outcome=outcome)
+            record_llm_usage(response, 'stream')
+            self.prompt_cache.record_usage(response)
+            
+            # Re-request only the sections that were cut off or did not decode
+            missing = [name for name in self.SECTION_TYPES if name not in received]
+            if missing:
+                print(f"Stream incomplete, re-requesting only: {', '.join(missing)}")
+                repair = self._call_model(self.model, self.build_section_prompt(test_results, missing), 'salvage',
+                                          extra=True)
+                repaired, _ = salvage_sections(repair.text, {name: self.SECTION_TYPES[name] for name in missing})
+                for name, value in self.SCHEMA.validate(repaired, missing).document.items():
+                    yield name, value
+            self.circuit_breaker.record_success()
+        except Exception as e:
+            if is_upstream_failure(e):
+                self.circuit_breaker.record_failure()
+            raise
+        finally:
+            if trial:
+                self.circuit_breaker.release_trial()
+        
+        print("AI insights streamed successfully!")
 
     def save_insights_to_file(self, insights: Dict[str, Any], filename: str = "ai_insights_report.json"):
         """Save generated insights to a JSON file"""
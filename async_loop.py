@@ -0,0 +1,44 @@
+"""
+Background Event Loop
+Runs a single asyncio event loop in a daemon thread so synchronous Flask views can share it
+"""
+
+import asyncio
+import threading
+from typing import Any, Coroutine
+
+
+class BackgroundEventLoop:
+    def __init__(self, name: str = 'insights-event-loop'):
+        """Initialize the runner; the loop thread is started lazily on first use"""
+        self.name = name
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        """Start the loop thread if it is not running yet (e.g. after a gunicorn fork)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def submit(self, coroutine: Coroutine):
+        """Schedule a coroutine on the loop and return a concurrent.futures.Future"""
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coroutine, loop)
+
+    def run(self, coroutine: Coroutine, timeout: float = None) -> Any:
+        """Run a coroutine on the loop and block the calling thread until it finishes"""
+        future = self.submit(coroutine)
+        try:
+            return future.result(timeout)
+        except Exception:
+            future.cancel()
+            raise
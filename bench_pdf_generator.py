@@ -0,0 +1,81 @@
+"""
+Report Generator Benchmark
+Per-request cost of building a fresh MarkdownPDFGenerator versus reusing the shared one
+
+Usage:
+    python bench_pdf_generator.py
+    python bench_pdf_generator.py --iterations 200 --renders 20
+"""
+
+import argparse
+import io
+import time
+import tracemalloc
+
+from ai_insights_gemini import AIInsightsGenerator, FORMAT_EXAMPLE
+from markdown_pdf_generator import MarkdownPDFGenerator, shared_generator
+
+SAMPLE_TEST_RESULTS = {
+    'mbtiScreen': 'INTJ',
+    'intelligenceScreen': 'logical',
+    'bigFiveScreen': 'openness',
+    'riasecScreen': 'investigative',
+    'decisionScreen': 'analytical',
+    'lifeScreen': 'career',
+    'varkScreen': 'reading'
+}
+
+
+def measure(fn, iterations: int):
+    """Return (seconds per call, peak bytes allocated during one call)"""
+    fn()  # Warm up imports and caches
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    seconds = (time.perf_counter() - start) / iterations
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def report(label: str, result):
+    seconds, peak = result
+    print(f"  {label:<28} {seconds * 1000:9.3f} ms   {peak / 1024:9.1f} KiB peak")
+
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark per-request report generator setup")
+    parser.add_argument('--iterations', type=int, default=100, help="Calls measured for setup only")
+    parser.add_argument('--renders', type=int, default=10, help="Calls measured for full renders")
+    args = parser.parse_args()
+
+    ai_insights = AIInsightsGenerator.SCHEMA.normalize(FORMAT_EXAMPLE)
+
+    print("Generator setup per request:")
+    fresh = measure(MarkdownPDFGenerator, args.iterations)
+    shared = measure(shared_generator, args.iterations)
+    report("fresh MarkdownPDFGenerator()", fresh)
+    report("shared_generator()", shared)
+
+    print("Markdown render per request:")
+    report("fresh", measure(lambda: MarkdownPDFGenerator().generate_markdown(SAMPLE_TEST_RESULTS, ai_insights),
+                            args.iterations))
+    report("shared", measure(lambda: shared_generator().generate_markdown(SAMPLE_TEST_RESULTS, ai_insights),
+                             args.iterations))
+
+    print("PDF render per request:")
+    report("fresh", measure(lambda: MarkdownPDFGenerator().generate_pdf(SAMPLE_TEST_RESULTS, ai_insights, io.BytesIO()),
+                            args.renders))
+    report("shared", measure(lambda: shared_generator().generate_pdf(SAMPLE_TEST_RESULTS, ai_insights, io.BytesIO()),
+                             args.renders))
+
+    print(f"Saved per request: {(fresh[0] - shared[0]) * 1000:.3f} ms, {(fresh[1] - shared[1]) / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Fake Gemini Server
+Local stand-in for the Gemini API that replays recorded insight JSON for offline load testing
+
+Point the web app at it with LLM_BACKEND=fake and FAKE_GEMINI_URL=http://127.0.0.1:8089.
+
+Usage:
+    python fake_gemini_server.py --port 8089 --latency-median 6 --latency-sigma 0.4
+    python fake_gemini_server.py --recordings precomputed_insights.jsonl --error-rate 0.05 --malformed-rate 0.1
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+
+def load_recordings(path: str = None) -> List[Dict[str, Any]]:
+    """
+    Load recorded insight documents
+
+    Accepts a single .json document, a .jsonl store written by warm_insights_cache.py,
+    or a directory of .json files. Without a path the built-in fallback insights are used.
+    """
+    if not path:
+        from ai_insights_gemini import FALLBACK_INSIGHTS
+        return [FALLBACK_INSIGHTS]
+
+    paths = sorted(glob.glob(os.path.join(path, '*.json'))) if os.path.isdir(path) else [path]
+    recordings = []
+    for file_path in paths:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            if file_path.endswith('.jsonl'):
+                for line in f:
+                    if line.strip():
+                        recordings.append(json.loads(line)['insights'])
+            else:
+                recordings.append(json.load(f))
+
+    if not recordings:
+        raise ValueError(f"No recordings found in {path}")
+    return recordings
+
+
+class FakeGeminiConfig:
+    def __init__(self, recordings: List[Dict[str, Any]], latency_dist: str = 'lognormal',
+                 latency_median: float = 6.0, latency_sigma: float = 0.4, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, malformed_rate: float = 0.0, stream_chunks: int = 40):
+        self.recordings = recordings
+        self.latency_dist = latency_dist
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.malformed_rate = malformed_rate
+        self.stream_chunks = stream_chunks
+
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def sample_latency(self, scale: float = 1.0) -> float:
+        """Seconds the full response takes, scaled by the share of the document requested"""
+        if self.latency_dist == 'fixed':
+            latency = self.latency_median
+        elif self.latency_dist == 'uniform':
+            spread = self.latency_median * self.latency_sigma
+            latency = random.uniform(self.latency_median - spread, self.latency_median + spread)
+        else:
+            latency = random.lognormvariate(math.log(self.latency_median), self.latency_sigma)
+        return max(0.0, latency * scale)
+
+
+def requested_sections(prompt: str) -> List[str]:
+    """Sections named by AIInsightsGenerator.build_section_prompt, or [] for a full report"""
+    marker = 'Generate ONLY these fields of the Gujarati AI Career Insight Report: '
+    if marker not in prompt:
+        return []
+    names = prompt.split(marker, 1)[1].split('.\n', 1)[0]
+    return [name.strip() for name in names.split(',') if name.strip()]
+
+
+def malform(text: str) -> str:
+    """Damage a JSON document the way real model output goes wrong"""
+    kind = random.choice(['truncate', 'trailing_comma', 'fence', 'drop_section'])
+    if kind == 'truncate':
+        return text[:random.randint(len(text) // 3, len(text) - 1)]
+    if kind == 'trailing_comma':
+        return text[:-1].rstrip() + ',\n}'
+    if kind == 'fence':
+        return f"```json\n{text}\n```"
+    document = json.loads(text)
+    if document:
+        document.pop(random.choice(list(document.keys())))
+    return json.dumps(document, ensure_ascii=False)
+
+
+def make_handler(config: FakeGeminiConfig):
+    class FakeGeminiHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload: Dict[str, Any]):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                with config.lock:
+                    requests = config.requests
+                self._send_json(200, {'status': 'healthy', 'requests': requests})
+            else:
+                self._send_json(404, {'error': 'Not found'})
+
+        def do_POST(self):
+            if self.path != '/generate':
+                self._send_json(404, {'error': 'Not found'})
+                return
+
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length))
+            prompt = request.get('prompt', '')
+            with config.lock:
+                config.requests += 1
+
+            roll = random.random()
+            if roll < config.throttle_rate:
+                time.sleep(config.sample_latency(0.05))
+                self._send_json(429, {'error': 'Resource has been exhausted (e.g. check quota).'})
+                return
+            if roll < config.throttle_rate + config.error_rate:
+                time.sleep(config.sample_latency(0.2))
+                self._send_json(503, {'error': 'The model is overloaded. Please try again later.'})
+                return
+
+            document = random.choice(config.recordings)
+            sections = requested_sections(prompt)
+            if sections:
+                document = {name: document[name] for name in sections if name in document}
+            text = json.dumps(document, ensure_ascii=False, indent=2)
+            if random.random() < config.malformed_rate:
+                text = malform(text)
+
+            total_sections = max(len(config.recordings[0]), 1)
+            latency = config.sample_latency(len(sections) / total_sections if sections else 1.0)
+            usage = {
+                # Roughly four characters per token, as for Latin text; Gujarati is worse
+                'prompt_token_count': len(prompt) // 4,
+                'candidates_token_count': len(text) // 4,
+                'cached_content_token_count': 0
+            }
+
+            if request.get('stream'):
+                self._stream(text, latency, usage)
+            else:
+                time.sleep(latency)
+                self._send_json(200, {'text': text, 'usage_metadata': usage})
+
+        def _stream(self, text: str, latency: float, usage: Dict[str, int]):
+            """Send newline-delimited chunks spread evenly over the sampled latency"""
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.end_headers()
+
+            chunk_count = max(1, config.stream_chunks)
+            chunk_size = max(1, math.ceil(len(text) / chunk_count))
+            chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+            for i, chunk in enumerate(chunks):
+                time.sleep(latency / len(chunks))
+                payload = {'text': chunk}
+                if i == len(chunks) - 1:
+                    payload['usage_metadata'] = usage
+                self.wfile.write((json.dumps(payload, ensure_ascii=False) + '\n').encode('utf-8'))
+                self.wfile.flush()
+
+    return FakeGeminiHandler
+
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Local fake Gemini server for load testing")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--recordings', default=None, help="Recorded insights: .json, .jsonl store or directory")
+    parser.add_argument('--latency-dist', choices=['lognormal', 'uniform', 'fixed'], default='lognormal')
+    parser.add_argument('--latency-median', type=float, default=6.0, help="Median seconds for a full report")
+    parser.add_argument('--latency-sigma', type=float, default=0.4, help="Lognormal sigma, or relative spread for uniform")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of calls answered with 503")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Share of calls answered with 429")
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help="Share of responses with broken JSON")
+    parser.add_argument('--stream-chunks', type=int, default=40, help="Chunks per streamed response")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    config = FakeGeminiConfig(
+        recordings=load_recordings(args.recordings),
+        latency_dist=args.latency_dist,
+        latency_median=args.latency_median,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        malformed_rate=args.malformed_rate,
+        stream_chunks=args.stream_chunks
+    )
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(config))
+    print(f"Fake Gemini server with {len(config.recordings)} recordings at http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down...")
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Insights Cache
+In-process, content-addressed cache for AI insights keyed on structured test results
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from insights_codec import CompactInsights, InsightsCodec
+
+
+class InsightsCache:
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 24 * 60 * 60, codec: InsightsCodec = None):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of cached profiles before LRU eviction
+            ttl_seconds: Seconds an entry stays valid after it is stored
+            codec: Stores entries as CompactInsights when given; get() then returns them undecoded
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.codec = codec
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return cached insights for key, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, insights = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return insights
+
+    def set(self, key: str, insights: Dict[str, Any]):
+        """Store insights under key, evicting the least recently used entries if full"""
+        if self.codec is not None:
+            insights = self.codec.encode(insights)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, insights)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all cached entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            compact = [insights for _, insights in self._entries.values() if isinstance(insights, CompactInsights)]
+            return {
+                'entries': len(self._entries),
+                'compact_bytes': sum(insights.nbytes for insights in compact),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+def create_cache_from_env(codec: InsightsCodec = None) -> InsightsCache:
+    """Build a cache using INSIGHTS_CACHE_MAX_ENTRIES and INSIGHTS_CACHE_TTL from the environment"""
+    return InsightsCache(
+        max_entries=int(os.environ.get('INSIGHTS_CACHE_MAX_ENTRIES', 1024)),
+        ttl_seconds=float(os.environ.get('INSIGHTS_CACHE_TTL', 24 * 60 * 60)),
+        codec=codec
+    )
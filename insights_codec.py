@@ -0,0 +1,215 @@
+"""
+Insights Storage Codec
+Compact in-memory form of insight documents: shared string table plus zlib with a trained preset dictionary
+"""
+
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+from collections import Counter
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List
+
+# Interned strings are stored as this marker followed by their table index
+_REF = '\x00'
+
+# zlib only looks back 32 KB, so a longer preset dictionary is wasted
+MAX_ZDICT_SIZE = 32 * 1024
+
+# Written by warm_insights_cache.py, loaded by every web worker
+DEFAULT_CODEC_PATH = 'insights_codec.json'
+
+
+def _strings(value: Any) -> Iterator[str]:
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+
+
+class InsightsCodec:
+    def __init__(self, strings: List[str], zdict: bytes, level: int = 6):
+        """
+        Encoder and decoder sharing one string table and preset dictionary
+
+        Args:
+            strings: Values replaced by a short reference, e.g. company names and links
+            zdict: Preset zlib dictionary of text typical for insight documents
+            level: zlib compression level
+        """
+        self.strings = list(strings)
+        self._index = {value: index for index, value in enumerate(self.strings)}
+        self.zdict = zdict[-MAX_ZDICT_SIZE:]
+        self.level = level
+        self.fingerprint = hashlib.sha256(
+            json.dumps(self.strings, ensure_ascii=False).encode('utf-8') + b'\x00' + self.zdict
+        ).hexdigest()[:16]
+
+    def _intern(self, value: Any) -> Any:
+        if isinstance(value, str):
+            index = self._index.get(value)
+            return f"{_REF}{index}" if index is not None else value
+        if isinstance(value, dict):
+            return {key: self._intern(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._intern(item) for item in value]
+        return value
+
+    def _resolve(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return self.strings[int(value[1:])] if value.startswith(_REF) else value
+        if isinstance(value, dict):
+            return {key: self._resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._resolve(item) for item in value]
+        return value
+
+    def encode_section(self, value: Any) -> bytes:
+        text = json.dumps(self._intern(value), ensure_ascii=False, separators=(',', ':'))
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=self.zdict)
+        return compressor.compress(text.encode('utf-8')) + compressor.flush()
+
+    def decode_section(self, data: bytes) -> Any:
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS, zdict=self.zdict)
+        text = decompressor.decompress(data) + decompressor.flush()
+        return self._resolve(json.loads(text))
+
+    def encode(self, insights: Dict[str, Any]) -> 'CompactInsights':
+        """Encode each top-level section separately so they can be decoded one at a time"""
+        if isinstance(insights, CompactInsights) and insights.codec is self:
+            return insights
+        return CompactInsights(self, {name: self.encode_section(value) for name, value in insights.items()})
+
+    def save(self, path: str):
+        """Write the string table and dictionary as JSON, replacing path atomically"""
+        payload = {
+            'fingerprint': self.fingerprint,
+            'level': self.level,
+            'strings': self.strings,
+            'zdict': base64.b64encode(self.zdict).decode('ascii')
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'fingerprint': self.fingerprint,
+            'strings': len(self.strings),
+            'zdict_bytes': len(self.zdict)
+        }
+
+
+class CompactInsights(Mapping):
+    """Read-only insights document whose sections are decompressed on access"""
+
+    __slots__ = ('codec', '_sections')
+
+    def __init__(self, codec: InsightsCodec, sections: Dict[str, bytes]):
+        self.codec = codec
+        self._sections = sections
+
+    def __getitem__(self, name: str) -> Any:
+        return self.codec.decode_section(self._sections[name])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sections)
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._sections
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: self[name] for name in self._sections}
+
+    @property
+    def nbytes(self) -> int:
+        """Compressed size of all sections"""
+        return sum(len(data) for data in self._sections.values())
+
+
+def decode_insights(insights: Any) -> Any:
+    """Return a plain dict for a CompactInsights document; other values are returned as they are"""
+    if isinstance(insights, CompactInsights):
+        return insights.to_dict()
+    return insights
+
+
+def load_codec(path: str) -> InsightsCodec:
+    """
+    Load a codec written by InsightsCodec.save
+
+    Raises:
+        FileNotFoundError: if no codec has been trained yet
+        ValueError: if the file is malformed or does not match its fingerprint
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        payload = json.load(f)
+    try:
+        codec = InsightsCodec(payload['strings'], base64.b64decode(payload['zdict']), payload.get('level', 6))
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Malformed codec file {path}: {e}") from e
+    if codec.fingerprint != payload.get('fingerprint'):
+        raise ValueError(f"Codec file {path} does not match its fingerprint")
+    return codec
+
+
+def train_codec(samples: Iterable[Dict[str, Any]], max_strings: int = 4096,
+                max_string_length: int = 120, level: int = 6) -> InsightsCodec:
+    """
+    Build a codec from representative insight documents
+
+    Short strings seen in more than one sample (company names, providers,
+    links, duration labels) go into the string table. The preset dictionary
+    is filled with the most common remaining text, most frequent last since
+    zlib finds nearer matches more cheaply.
+
+    Args:
+        samples: Insight documents, e.g. precomputed reports and the fallback report
+        max_strings: Largest string table
+        max_string_length: Longer strings are left to zlib
+        level: zlib compression level
+    """
+    samples = [decode_insights(sample) for sample in samples]
+
+    document_frequency = Counter()
+    for sample in samples:
+        # De-duplicated in document order: a set's order varies with the per-process hash seed,
+        # and ties in most_common() would then give each worker a different string table
+        distinct = dict.fromkeys(value for value in _strings(sample) if len(value) <= max_string_length)
+        document_frequency.update(list(distinct))
+    min_frequency = 2 if len(samples) > 1 else 1
+    strings = [
+        value for value, count in document_frequency.most_common(max_strings)
+        if count >= min_frequency and len(value.encode('utf-8')) > 3
+    ]
+
+    # Dictionary text: interned samples' JSON, one fragment per distinct section value
+    codec = InsightsCodec(strings, b'', level)
+    fragments = Counter()
+    for sample in samples:
+        for name, value in sample.items():
+            fragment = json.dumps({name: codec._intern(value)}, ensure_ascii=False, separators=(',', ':'))
+            fragments[fragment] += 1
+    zdict = b''
+    for fragment, _ in fragments.most_common():
+        encoded = fragment.encode('utf-8')
+        if len(zdict) + len(encoded) > MAX_ZDICT_SIZE:
+            continue
+        zdict = encoded + zdict
+    return InsightsCodec(strings, zdict, level)
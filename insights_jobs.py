@@ -0,0 +1,332 @@
+"""
+Insights Job Queue
+Runs insight generation in a bounded background pool; job state lives in SQLite so any worker can answer a poll
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+
+# Outside the app directory, which also holds the front-end files
+DEFAULT_JOBS_DB = os.path.join(tempfile.gettempdir(), 'insights_jobs.sqlite3')
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue has no room for another job"""
+
+
+class _RefuseRedirect(urllib.request.HTTPRedirectHandler):
+    """Fail on 3xx: an allowed webhook host must not be able to forward the POST to any other address"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        raise urllib.error.HTTPError(req.full_url, code, f"Webhook redirect to {newurl} refused", headers, fp)
+
+
+_webhook_opener = urllib.request.build_opener(_RefuseRedirect)
+
+
+class JobStore:
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    # Rows covered by the unique index: jobs still queued or running that other submits may share
+    _ACTIVE_SHARED = "status IN ('queued', 'running') AND webhook_url IS NULL"
+
+    def __init__(self, path: str = DEFAULT_JOBS_DB):
+        """
+        SQLite job table shared by every worker process on the host
+
+        Each call opens its own connection, so the store is safe to use from
+        any thread; WAL mode lets polls read while a worker writes. A partial
+        unique index allows one active job without a webhook per key, so
+        workers submitting the same profile at once share a job.
+        """
+        self.path = path
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                ' id TEXT PRIMARY KEY,'
+                ' key TEXT NOT NULL,'
+                ' status TEXT NOT NULL,'
+                ' pid INTEGER,'
+                ' created_at REAL NOT NULL,'
+                ' updated_at REAL NOT NULL,'
+                ' result TEXT,'
+                ' error TEXT,'
+                ' retry_after REAL,'
+                ' webhook_url TEXT)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, status)')
+            # Tables created before the unique index may hold duplicate active jobs; keep the newest
+            conn.execute(
+                f'UPDATE jobs SET status = ?, error = ? WHERE {self._ACTIVE_SHARED} AND rowid NOT IN '
+                f'(SELECT MAX(rowid) FROM jobs WHERE {self._ACTIVE_SHARED} GROUP BY key)',
+                (self.FAILED, 'Superseded by a newer job for the same profile')
+            )
+            conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_key ON jobs (key) WHERE {self._ACTIVE_SHARED}')
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create_or_join(self, key: str, webhook_url: str = None) -> Tuple[str, bool]:
+        """
+        Create a job for the key unless one is already queued or running, in one atomic insert
+
+        A job with a webhook is always created, since each webhook must be notified.
+
+        Returns:
+            (job_id, existing) where existing is True if an active job was found
+        """
+        while True:
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            with self._connect() as conn:
+                cursor = conn.execute(
+                    'INSERT INTO jobs (id, key, status, pid, created_at, updated_at, webhook_url) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT DO NOTHING',
+                    (job_id, key, self.QUEUED, os.getpid(), now, now, webhook_url)
+                )
+                if cursor.rowcount:
+                    return job_id, False
+                row = conn.execute(
+                    f'SELECT id, pid FROM jobs WHERE key = ? AND {self._ACTIVE_SHARED}', (key,)
+                ).fetchone()
+            if row is None:
+                # Finished between the insert and the lookup
+                continue
+            if _pid_alive(row['pid']):
+                return row['id'], True
+            # Left behind by a worker that exited; fail it so the insert can take its place
+            self.update(row['id'], self.FAILED, error='Worker exited before the job finished')
+
+    def update(self, job_id: str, status: str, result: Any = None, error: str = None, retry_after: float = None):
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE jobs SET status = ?, updated_at = ?, result = ?, error = ?, retry_after = ? WHERE id = ?',
+                (status, time.time(), json.dumps(result, ensure_ascii=False) if result is not None else None,
+                 error, retry_after, job_id)
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the job as a dict, marking it failed if the worker that owned it has exited"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = dict(row)
+        if job['status'] in (self.QUEUED, self.RUNNING) and not _pid_alive(job['pid']):
+            self.update(job_id, self.FAILED, error='Worker exited before the job finished')
+            job['status'] = self.FAILED
+            job['error'] = 'Worker exited before the job finished'
+        if job['result'] is not None:
+            job['result'] = json.loads(job['result'])
+        return job
+
+    def wait(self, job_id: str, timeout: float, interval: float = 0.25) -> Optional[Dict[str, Any]]:
+        """Long-poll: return the job once it has finished or timeout seconds have passed"""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job['status'] in (self.DONE, self.FAILED) or time.monotonic() >= deadline:
+                return job
+            time.sleep(interval)
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs last updated more than older_than seconds ago"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?',
+                (self.DONE, self.FAILED, time.time() - older_than)
+            )
+        return cursor.rowcount
+
+
+def _pid_alive(pid: int) -> bool:
+    if not pid or pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    def __init__(self, store: JobStore, max_workers: int = 8, max_pending: int = 256,
+                 job_ttl: float = 3600, webhook_hosts: set = None, webhook_timeout: float = 10):
+        """
+        Bounded pool running submitted jobs in this process
+
+        Args:
+            store: Where job state is recorded
+            max_workers: Jobs running at once
+            max_pending: Jobs queued or running before submit raises QueueFullError
+            job_ttl: Seconds finished jobs are kept for polling
+            webhook_hosts: Hosts allowed as completion webhook targets (none allowed if empty)
+            webhook_timeout: Seconds to wait for a webhook target to accept the notification
+        """
+        self.store = store
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.job_ttl = job_ttl
+        self.webhook_hosts = webhook_hosts or set()
+        self.webhook_timeout = webhook_timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.webhook_failures = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created on first use so the pool's threads belong to the forked worker
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='insights-job')
+        return self._executor
+
+    def webhook_allowed(self, url: str) -> bool:
+        parsed = urlparse(url)
+        return parsed.scheme in ('http', 'https') and parsed.hostname in self.webhook_hosts
+
+    def submit(self, key: str, fn: Callable[[], Any], webhook_url: str = None) -> Tuple[str, bool]:
+        """
+        Queue fn to run in the background
+
+        A job already queued or running for the same key is reused instead.
+
+        Returns:
+            (job_id, existing) where existing is True if an active job was reused
+
+        Raises:
+            QueueFullError: if max_pending jobs are already queued or running
+            ValueError: if webhook_url is not an allowed target
+        """
+        if webhook_url and not self.webhook_allowed(webhook_url):
+            raise ValueError(f"Webhook host not allowed: {urlparse(webhook_url).hostname}")
+
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise QueueFullError(f"{self.pending} insight jobs already pending")
+            self.pending += 1
+
+        try:
+            # A new webhook gets its own job; the generation itself is still shared upstream
+            job_id, existing = self.store.create_or_join(key, webhook_url)
+        except BaseException:
+            with self._lock:
+                self.pending -= 1
+            raise
+
+        with self._lock:
+            if existing:
+                self.pending -= 1
+                return job_id, True
+            self.submitted += 1
+            purge = self.submitted % 100 == 0
+
+        if purge:
+            self.store.purge(self.job_ttl)
+
+        self._get_executor().submit(self._run, job_id, fn, webhook_url)
+        return job_id, False
+
+    def _run(self, job_id: str, fn: Callable[[], Any], webhook_url: Optional[str]):
+        try:
+            self.store.update(job_id, JobStore.RUNNING)
+            try:
+                result = fn()
+            except Exception as e:
+                self.store.update(job_id, JobStore.FAILED, error=str(e), retry_after=getattr(e, 'retry_after', None))
+                with self._lock:
+                    self.failed += 1
+            else:
+                self.store.update(job_id, JobStore.DONE, result=result)
+                with self._lock:
+                    self.completed += 1
+        except Exception as e:
+            print(f"Warning: Could not record insight job {job_id}: {e}")
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+        if webhook_url:
+            self._notify(job_id, webhook_url)
+
+    def _notify(self, job_id: str, webhook_url: str):
+        """POST the finished job to its webhook; failures are counted, not retried"""
+        job = self.store.get(job_id)
+        body = json.dumps(job_payload(job), ensure_ascii=False).encode('utf-8')
+        request = urllib.request.Request(
+            webhook_url, data=body, headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        try:
+            with _webhook_opener.open(request, timeout=self.webhook_timeout):
+                pass
+        except Exception as e:
+            print(f"Warning: Webhook for insight job {job_id} failed: {e}")
+            with self._lock:
+                self.webhook_failures += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and counters for monitoring"""
+        with self._lock:
+            return {
+                'pending': self.pending,
+                'max_pending': self.max_pending,
+                'workers': self.max_workers,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'webhook_failures': self.webhook_failures
+            }
+
+
+def job_payload(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Public view of a job for API responses and webhooks"""
+    payload = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'created_at': job['created_at'],
+        'updated_at': job['updated_at']
+    }
+    if job['status'] == JobStore.DONE:
+        payload['insights'] = job['result']
+    elif job['status'] == JobStore.FAILED:
+        payload['error'] = job['error']
+        if job['retry_after'] is not None:
+            payload['retry_after'] = job['retry_after']
+    return payload
+
+
+def create_job_queue_from_env() -> JobQueue:
+    """Build a queue from INSIGHTS_JOBS_DB, INSIGHTS_JOB_WORKERS, INSIGHTS_JOB_MAX_PENDING, INSIGHTS_JOB_TTL and INSIGHTS_WEBHOOK_HOSTS"""
+    hosts = os.environ.get('INSIGHTS_WEBHOOK_HOSTS', '')
+    return JobQueue(
+        store=JobStore(os.environ.get('INSIGHTS_JOBS_DB') or DEFAULT_JOBS_DB),
+        max_workers=int(os.environ.get('INSIGHTS_JOB_WORKERS', 8)),
+        max_pending=int(os.environ.get('INSIGHTS_JOB_MAX_PENDING', 256)),
+        job_ttl=float(os.environ.get('INSIGHTS_JOB_TTL', 3600)),
+        webhook_hosts={host.strip() for host in hosts.split(',') if host.strip()}
+    )
@@ -0,0 +1,214 @@
+"""
+Insights JSON Helpers
+Parsing utilities for the JSON documents returned by the AI model
+"""
+
+import json
+from typing import Any, Dict, List, Tuple
+
+
+def strip_code_fence(response_text: str) -> str:
+    """Remove a surrounding ```json markdown code block if present"""
+    response_text = response_text.strip()
+    if response_text.startswith('```json'):
+        response_text = response_text[7:]
+    elif response_text.startswith('```'):
+        response_text = response_text[3:]
+    if response_text.endswith('```'):
+        response_text = response_text[:-3]
+    return response_text.strip()
+
+
+class SectionStreamParser:
+    """
+    Incrementally parse a streamed JSON object and report each top-level member
+    as soon as its value is complete.
+
+    Text before the opening brace (such as a ```json fence) and after the closing
+    brace is ignored. In lenient mode a member whose value does not decode is
+    recorded in invalid_keys and skipped instead of raising.
+    """
+
+    def __init__(self, lenient: bool = False):
+        self.lenient = lenient
+        self.invalid_keys = []
+        self.buffer = ''
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.expect_key = False
+        self.key_start = None
+        self.current_key = None
+        self.value_start = None
+        self.complete = False
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """Consume more text and return the (key, value) pairs completed by it"""
+        completed = []
+        if self.complete:
+            return completed
+
+        self.buffer += text
+        while self.pos < len(self.buffer):
+            i = self.pos
+            c = self.buffer[i]
+            self.pos += 1
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == '\\':
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.expect_key:
+                        self.current_key = json.loads(self.buffer[self.key_start:i + 1])
+                continue
+
+            if self.depth == 0 and c != '{':
+                continue
+
+            if c == '"':
+                self.in_string = True
+                if self.depth == 1 and self.expect_key:
+                    self.key_start = i
+            elif c in '{[':
+                self.depth += 1
+                if self.depth == 1:
+                    self.expect_key = True
+            elif c in '}]':
+                if self.depth == 1:
+                    if self.value_start is not None:
+                        self._finish_member(i, completed)
+                    self.complete = True
+                    self.depth = 0
+                    break
+                self.depth -= 1
+            elif c == ':' and self.depth == 1:
+                self.value_start = i + 1
+                self.expect_key = False
+            elif c == ',' and self.depth == 1:
+                self._finish_member(i, completed)
+                self.expect_key = True
+
+        return completed
+
+    def _finish_member(self, end: int, completed: List[Tuple[str, Any]]):
+        """Decode the value that ends at buffer index `end` and append it to completed"""
+        raw_value = self.buffer[self.value_start:end].strip()
+        self.value_start = None
+        try:
+            completed.append((self.current_key, json.loads(raw_value)))
+        except json.JSONDecodeError:
+            if not self.lenient:
+                raise
+            self.invalid_keys.append(self.current_key)
+
+
+def _repair(text: str) -> Tuple[str, bool]:
+    """
+    Repair common malformations in a JSON object
+
+    Drops trailing commas, ignores stray closing brackets and, if the text ends
+    early, cuts back to the last complete value and closes every open container.
+
+    Returns:
+        (repaired_text, section_cut) where section_cut is True if the text ended
+        inside a top-level member, so that member is incomplete
+    """
+    text = strip_code_fence(text)
+    start = text.find('{')
+    if start == -1:
+        return '', True
+
+    out = []
+    stack = []
+    in_string = False
+    escape = False
+    # (length of out, open containers) at the last point where cutting yields valid JSON
+    safe_point = (0, ())
+
+    for c in text[start:]:
+        if in_string:
+            out.append(c)
+            if escape:
+                escape = False
+            elif c == '\\':
+                escape = True
+            elif c == '"':
+                in_string = False
+            continue
+
+        if c == '"':
+            in_string = True
+            out.append(c)
+        elif c in '{[':
+            stack.append(c)
+            out.append(c)
+            if len(stack) == 1:
+                safe_point = (len(out), tuple(stack))
+        elif c in '}]':
+            if not stack or (stack[-1] == '{') != (c == '}'):
+                continue
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ',':
+                out.pop()
+            stack.pop()
+            out.append(c)
+            safe_point = (len(out), tuple(stack))
+            if not stack:
+                return ''.join(out), False
+        elif c == ',':
+            safe_point = (len(out), tuple(stack))
+            out.append(c)
+        else:
+            out.append(c)
+
+    length, open_containers = safe_point
+    repaired = ''.join(out[:length]).rstrip().rstrip(',')
+    for opener in reversed(open_containers):
+        repaired += '}' if opener == '{' else ']'
+    return repaired, len(open_containers) > 1
+
+
+def repair_json(text: str) -> str:
+    """Return text with trailing commas, truncated arrays and unbalanced braces repaired"""
+    return _repair(text)[0]
+
+
+def salvage_sections(text: str, section_types: Dict[str, type]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Keep every top-level section of a malformed response that can be recovered
+
+    Args:
+        text: Raw model output
+        section_types: Expected top-level sections and the JSON type (dict or list) of each
+
+    Returns:
+        (sections, missing) where missing lists expected sections that are absent or invalid
+    """
+    sections = {}
+    repaired, section_cut = _repair(text)
+    try:
+        document = json.loads(repaired)
+        if isinstance(document, dict):
+            sections = document
+            if section_cut and sections:
+                # The last section was cut off; only a list keeps its complete items
+                last_key = list(sections.keys())[-1]
+                if not (isinstance(sections[last_key], list) and sections[last_key]):
+                    del sections[last_key]
+    except json.JSONDecodeError:
+        parser = SectionStreamParser(lenient=True)
+        sections = dict(parser.feed(strip_code_fence(text)))
+
+    missing = [
+        name for name, expected_type in section_types.items()
+        if not isinstance(sections.get(name), expected_type) or not sections.get(name)
+    ]
+    for name in missing:
+        sections.pop(name, None)
+
+    return sections, missing
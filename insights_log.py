@@ -0,0 +1,193 @@
+"""
+Insights Log
+Background writer appending generated insights to a rotating JSON Lines log without blocking requests
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; rotation is then only safe with a single process
+    fcntl = None
+
+
+class InsightsLog:
+    # Records written per batch, so one lock and one write cover many records
+    BATCH_SIZE = 64
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024, backups: int = 5, queue_size: int = 1000):
+        """
+        Append-only log shared by every worker process
+
+        Args:
+            path: JSON Lines file; rotated files are path.1 ... path.<backups>
+            max_bytes: Rotate once the file grows past this size
+            backups: Rotated files kept
+            queue_size: Records waiting to be written before new ones are dropped
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._file = None
+        # Counters are updated by request threads and the writer
+        self._counter_lock = threading.Lock()
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+        self.errors = 0
+
+    def _ensure_started(self):
+        # Started on first use so the writer thread belongs to the forked worker
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._file = None
+                self._thread = threading.Thread(target=self._run, name='insights-log', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush, 2.0)
+
+    def log(self, record: Dict[str, Any]) -> bool:
+        """
+        Queue a record for writing; never blocks
+
+        Returns:
+            False if the queue was full and the record was dropped
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((time.time(), record))
+        except queue.Full:
+            with self._counter_lock:
+                self.dropped += 1
+            return False
+        with self._counter_lock:
+            self.enqueued += 1
+        return True
+
+    def _count(self, name: str, amount: int = 1):
+        with self._counter_lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Nothing may escape this loop: a dead writer would silently drop every later record
+            lines = []
+            for timestamp, record in batch:
+                try:
+                    lines.append(json.dumps(dict(record, ts=round(timestamp, 3)), ensure_ascii=False,
+                                            separators=(',', ':')))
+                except Exception as e:
+                    print(f"Warning: Could not serialize insights log record: {e!r}")
+                    self._count('errors')
+
+            try:
+                if lines:
+                    self._write(('\n'.join(lines) + '\n').encode('utf-8'))
+                    self._count('written', len(lines))
+            except Exception as e:
+                print(f"Warning: Could not write insights log: {e!r}")
+                self._count('errors')
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, data: bytes):
+        """Append data, rotating first if needed, while holding the cross-process lock"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f"{self.path}.lock", 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._reopen_if_rotated()
+                if self._file.tell() + len(data) > self.max_bytes and self._file.tell() > 0:
+                    self._rotate()
+                os.write(self._file.fileno(), data)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _reopen_if_rotated(self):
+        # Another worker may have rotated the file since this one opened it
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            current = None
+        if self._file is not None and current is not None:
+            opened = os.fstat(self._file.fileno())
+            if (opened.st_dev, opened.st_ino) == (current.st_dev, current.st_ino):
+                self._file.seek(0, os.SEEK_END)
+                return
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.path, 'ab')
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, 'ab')
+        self._count('rotations')
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until queued records are written; returns False on timeout"""
+        if self._pid != os.getpid():
+            return True
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and write counters for monitoring"""
+        with self._counter_lock:
+            return {
+                'path': self.path,
+                'queued': self._queue.qsize(),
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'dropped': self.dropped,
+                'rotations': self.rotations,
+                'errors': self.errors
+            }
+
+
+def create_insights_log_from_env() -> InsightsLog:
+    """Build a log from INSIGHTS_LOG_PATH, INSIGHTS_LOG_MAX_BYTES, INSIGHTS_LOG_BACKUPS and INSIGHTS_LOG_QUEUE"""
+    return InsightsLog(
+        path=os.environ.get('INSIGHTS_LOG_PATH', 'insights_log.jsonl'),
+        max_bytes=int(os.environ.get('INSIGHTS_LOG_MAX_BYTES', 50 * 1024 * 1024)),
+        backups=int(os.environ.get('INSIGHTS_LOG_BACKUPS', 5)),
+        queue_size=int(os.environ.get('INSIGHTS_LOG_QUEUE', 1000))
+    )
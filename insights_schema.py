@@ -0,0 +1,259 @@
+"""
+Insights Schema Validator
+Compiles the JSON format example from the system prompt into a fast validator and normalizer
+"""
+
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+
+class SchemaValidationError(ValueError):
+    """Raised when sections of an insights document are missing or cannot be repaired"""
+
+    def __init__(self, message: str, document: Dict[str, Any], invalid_sections: List[str]):
+        super().__init__(message)
+        self.document = document
+        self.invalid_sections = invalid_sections
+
+
+class SalvageError(SchemaValidationError):
+    """Raised when the sections re-requested after a partial response still leave the report invalid"""
+
+
+class _Invalid(Exception):
+    pass
+
+
+class ValidationResult:
+    def __init__(self, document: Dict[str, Any], invalid_sections: List[str],
+                 errors: Dict[str, str], coercions: List[str]):
+        self.document = document
+        self.invalid_sections = invalid_sections
+        self.errors = errors
+        self.coercions = coercions
+
+    @property
+    def valid(self) -> bool:
+        return not self.invalid_sections
+
+
+def extract_format_example(prompt: str) -> Dict[str, Any]:
+    """Return the ```json example embedded in a prompt, or {} if there is none"""
+    start = prompt.find('```json')
+    end = prompt.find('```', start + 7)
+    if start == -1 or end == -1:
+        return {}
+    return json.loads(prompt[start + 7:end])
+
+
+_NUMBER = re.compile(r'-?\d+(?:\.\d+)?')
+
+# A node is (validate(value, path, coercions, lenient) -> value, default() -> value).
+# In lenient mode nothing is dropped or filled in: values that cannot be coerced are kept as they are.
+_Node = Tuple[Callable[[Any, str, List[str], bool], Any], Callable[[], Any]]
+
+
+def _compile_string() -> _Node:
+    def validate(value, path, coercions, lenient=False):
+        if isinstance(value, str):
+            return value
+        if value is None:
+            coercions.append(f"{path}: null -> ''")
+            return ''
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            coercions.append(f"{path}: number -> string")
+            return str(value)
+        if isinstance(value, list) and all(isinstance(item, str) for item in value):
+            coercions.append(f"{path}: list -> string")
+            return ', '.join(value)
+        raise _Invalid(f"{path}: expected string, got {type(value).__name__}")
+
+    return validate, str
+
+
+def _compile_number(value_range: Tuple[float, float] = None) -> _Node:
+    def validate(value, path, coercions, lenient=False):
+        if isinstance(value, bool):
+            raise _Invalid(f"{path}: expected number, got boolean")
+        if isinstance(value, str):
+            match = _NUMBER.search(value)
+            if not match:
+                raise _Invalid(f"{path}: expected number, got {value!r}")
+            coercions.append(f"{path}: string -> number")
+            value = float(match.group())
+        if not isinstance(value, (int, float)):
+            raise _Invalid(f"{path}: expected number, got {type(value).__name__}")
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        if value_range is not None:
+            low, high = value_range
+            if not low <= value <= high:
+                coercions.append(f"{path}: {value} clamped to [{low}, {high}]")
+                value = min(max(value, low), high)
+        return value
+
+    return validate, int
+
+
+def _compile_list(item_node: _Node, item_is_object: bool) -> _Node:
+    validate_item = item_node[0] if item_node else None
+
+    def validate(value, path, coercions, lenient=False):
+        if isinstance(value, str) and not item_is_object:
+            coercions.append(f"{path}: string -> list")
+            value = [value]
+        elif isinstance(value, dict) and item_is_object:
+            coercions.append(f"{path}: object -> list")
+            value = [value]
+        if not isinstance(value, list):
+            raise _Invalid(f"{path}: expected list, got {type(value).__name__}")
+        if validate_item is None:
+            return value
+
+        items = []
+        for index, item in enumerate(value):
+            try:
+                items.append(validate_item(item, f"{path}[{index}]", coercions, lenient))
+            except _Invalid as e:
+                if lenient:
+                    coercions.append(f"kept {e}")
+                    items.append(item)
+                else:
+                    coercions.append(f"dropped {e}")
+        if value and not items:
+            raise _Invalid(f"{path}: no valid items")
+        return items
+
+    return validate, list
+
+
+def _compile_object(fields: Dict[str, _Node]) -> _Node:
+    field_items = list(fields.items())
+
+    def validate(value, path, coercions, lenient=False):
+        if isinstance(value, list) and len(value) == 1 and isinstance(value[0], dict):
+            coercions.append(f"{path}: single-item list -> object")
+            value = value[0]
+        if not isinstance(value, dict):
+            raise _Invalid(f"{path}: expected object, got {type(value).__name__}")
+
+        normalized = dict(value)
+        for name, (validate_field, default) in field_items:
+            field_path = f"{path}.{name}"
+            if name not in value:
+                if not lenient:
+                    coercions.append(f"{field_path}: missing, filled with default")
+                    normalized[name] = default()
+                continue
+            try:
+                normalized[name] = validate_field(value[name], field_path, coercions, lenient)
+            except _Invalid as e:
+                if not lenient:
+                    raise
+                coercions.append(f"kept {e}")
+        return normalized
+
+    return validate, dict
+
+
+def _compile(example: Any, path: str, ranges: Dict[str, Tuple[float, float]]) -> _Node:
+    if isinstance(example, dict):
+        return _compile_object({name: _compile(value, f"{path}.{name}", ranges) for name, value in example.items()})
+    if isinstance(example, list):
+        item_example = example[0] if example else None
+        item_node = _compile(item_example, f"{path}[]", ranges) if item_example is not None else None
+        return _compile_list(item_node, isinstance(item_example, dict))
+    if isinstance(example, bool):
+        raise TypeError(f"Unsupported boolean in schema example at {path}")
+    if isinstance(example, (int, float)):
+        return _compile_number(ranges.get(path))
+    return _compile_string()
+
+
+class SchemaValidator:
+    def __init__(self, example: Dict[str, Any], required: Iterable[str] = (),
+                 ranges: Dict[str, Tuple[float, float]] = None):
+        """
+        Compile a validator from a JSON example document
+
+        Every key in the example is expected with the example value's type. Lists
+        take the type of their first item. Fixable deviations are coerced and
+        recorded; a section that cannot be fixed is reported as invalid.
+
+        Args:
+            example: Example document, e.g. the format block of the system prompt
+            required: Sections that must be present and valid
+            ranges: Inclusive (low, high) bounds for numbers, keyed by dotted path
+        """
+        ranges = ranges or {}
+        self.required = list(required)
+        self.sections = {name: _compile(value, name, ranges) for name, value in example.items()}
+        self.section_names = list(example.keys())
+
+    def validate(self, document: Dict[str, Any], sections: Iterable[str] = None,
+                 lenient: bool = False) -> ValidationResult:
+        """
+        Validate and normalize the given sections (all schema sections by default)
+
+        In lenient mode the document is only coerced where that succeeds: missing
+        fields are not filled in, and values and sections that cannot be coerced
+        are kept as they are (invalid sections are still reported).
+        """
+        if not isinstance(document, dict):
+            names = list(sections) if sections is not None else self.section_names
+            return ValidationResult({}, names, {name: 'document is not an object' for name in names}, [])
+
+        normalized = {}
+        invalid_sections = []
+        errors = {}
+        coercions = []
+
+        for name in (sections if sections is not None else self.section_names):
+            node = self.sections.get(name)
+            if node is None:
+                continue
+            if name not in document:
+                invalid_sections.append(name)
+                errors[name] = 'missing'
+                continue
+            try:
+                value = node[0](document[name], name, coercions, lenient)
+            except _Invalid as e:
+                invalid_sections.append(name)
+                errors[name] = str(e)
+                if lenient:
+                    normalized[name] = document[name]
+                continue
+            if value in ({}, [], ''):
+                invalid_sections.append(name)
+                errors[name] = 'empty'
+                if lenient:
+                    normalized[name] = document[name]
+                continue
+            normalized[name] = value
+
+        # Keep sections the schema does not know about
+        if sections is None:
+            for name, value in document.items():
+                if name not in self.sections:
+                    normalized[name] = value
+
+        return ValidationResult(normalized, invalid_sections, errors, coercions)
+
+    def validate_section(self, name: str, value: Any) -> Any:
+        """Return the normalized section, or raise ValueError if it cannot be repaired"""
+        if name not in self.sections:
+            return value
+        result = self.validate({name: value}, [name])
+        if result.invalid_sections:
+            raise ValueError(result.errors[name])
+        return result.document[name]
+
+    def normalize(self, document: Dict[str, Any], lenient: bool = False) -> Dict[str, Any]:
+        """
+        Return the document with fixable deviations coerced and broken sections dropped
+
+        With lenient=True nothing is dropped or filled in, e.g. for reports edited by a client.
+        """
+        return self.validate(document, lenient=lenient).document
@@ -0,0 +1,67 @@
+"""
+Precomputed Insights Store
+Append-only JSON Lines store of pre-generated insights, loaded by the web app at boot
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Any, Iterator
+
+
+DEFAULT_STORE_PATH = 'precomputed_insights.jsonl'
+
+
+class InsightsStore:
+    def __init__(self, path: str = None):
+        """
+        Initialize the store
+
+        Args:
+            path: JSON Lines file holding one {"key", "test_results", "insights"} record per line
+        """
+        self.path = path or os.environ.get('INSIGHTS_STORE_PATH', DEFAULT_STORE_PATH)
+        self._lock = threading.Lock()
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Yield every readable {"key", "test_results", "insights"} record in file order"""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    # A run interrupted mid-write leaves a truncated last line
+                    print(f"Warning: Skipping unreadable record {line_number} in {self.path}: {e}")
+                    continue
+                if 'key' not in record or 'insights' not in record:
+                    print(f"Warning: Skipping incomplete record {line_number} in {self.path}")
+                    continue
+                yield record
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Return every stored insight keyed by its cache key"""
+        return {record['key']: record['insights'] for record in self.records()}
+
+    def keys(self) -> set:
+        """Return the set of cache keys already present in the store"""
+        return set(self.load().keys())
+
+    def append(self, key: str, test_results: Dict[str, Any], insights: Dict[str, Any]):
+        """Append one generated record and flush it to disk immediately"""
+        record = json.dumps({
+            'key': key,
+            'test_results': test_results,
+            'insights': insights
+        }, ensure_ascii=False, separators=(',', ':'))
+
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(record + '\n')
+                f.flush()
+                os.fsync(f.fileno())
@@ -0,0 +1,149 @@
+"""
+LLM Backends
+Interchangeable model backends for AIInsightsGenerator: Gemini, or a local fake-Gemini server
+
+Every backend exposes a `model` with the subset of the google.generativeai
+GenerativeModel interface the generator uses (generate_content with optional
+streaming, and generate_content_async), plus a prompt cache for the static
+system prompt.
+"""
+
+import asyncio
+import json
+import os
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator
+from urllib.parse import urlparse
+
+from prompt_cache import StaticPromptCache, create_prompt_cache_from_env
+from startup import lazy_import
+
+
+class GeminiBackend:
+    def __init__(self, model_name: str):
+        """Configure the Gemini API from GEMINI_API_KEY"""
+        genai = lazy_import('google.generativeai')
+
+        api_key = os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not found in environment variables")
+
+        genai.configure(api_key=api_key)
+
+        self.name = 'gemini'
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+
+    def create_prompt_cache(self, system_prompt: str) -> StaticPromptCache:
+        return create_prompt_cache_from_env(self.model_name, system_prompt)
+
+
+class _FakeResponse:
+    """Response object shaped like a GenerateContentResponse"""
+
+    def __init__(self, payload: Dict[str, Any]):
+        self.text = payload.get('text', '')
+        usage = payload.get('usage_metadata')
+        self.usage_metadata = SimpleNamespace(**usage) if usage else None
+
+
+class HTTPFakeModel:
+    def __init__(self, base_url: str, timeout: float = 120):
+        """Client for fake_gemini_server.py"""
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        parsed = urlparse(self.base_url)
+        self._host = parsed.hostname
+        self._port = parsed.port or 80
+
+    def _request_body(self, prompt: str, generation_config: Dict[str, Any], stream: bool) -> bytes:
+        return json.dumps({
+            'prompt': prompt,
+            'generation_config': generation_config or {},
+            'stream': stream
+        }, ensure_ascii=False).encode('utf-8')
+
+    @staticmethod
+    def _raise_for_status(status: int, body: bytes):
+        if status >= 400:
+            try:
+                message = json.loads(body).get('error', '')
+            except (json.JSONDecodeError, AttributeError):
+                message = body.decode('utf-8', 'replace')
+            google_exceptions = lazy_import('google.api_core.exceptions')
+            raise google_exceptions.from_http_status(status, message)
+
+    def generate_content(self, prompt: str, generation_config: Dict[str, Any] = None, stream: bool = False):
+        request = urllib.request.Request(
+            f"{self.base_url}/generate",
+            data=self._request_body(prompt, generation_config, stream),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        try:
+            response = urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            self._raise_for_status(e.code, e.read())
+            raise
+
+        if stream:
+            return self._iter_stream(response)
+
+        with response:
+            return _FakeResponse(json.loads(response.read()))
+
+    def _iter_stream(self, response) -> Iterator[_FakeResponse]:
+        with response:
+            for line in response:
+                line = line.strip()
+                if line:
+                    yield _FakeResponse(json.loads(line))
+
+    async def generate_content_async(self, prompt: str, generation_config: Dict[str, Any] = None):
+        body = self._request_body(prompt, generation_config, False)
+        reader, writer = await asyncio.open_connection(self._host, self._port)
+        try:
+            writer.write(
+                f"POST /generate HTTP/1.0\r\n"
+                f"Host: {self._host}:{self._port}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode('ascii') + body
+            )
+            await writer.drain()
+            raw = await reader.read()
+        finally:
+            writer.close()
+
+        head, _, payload = raw.partition(b'\r\n\r\n')
+        status = int(head.split(b' ', 2)[1])
+        self._raise_for_status(status, payload)
+        return _FakeResponse(json.loads(payload))
+
+
+class FakeGeminiBackend:
+    def __init__(self, base_url: str):
+        """Send every call to a fake_gemini_server.py instance instead of Gemini"""
+        self.name = 'fake'
+        self.model_name = 'fake-gemini'
+        self.base_url = base_url
+        self.model = HTTPFakeModel(base_url)
+
+    def create_prompt_cache(self, system_prompt: str) -> StaticPromptCache:
+        # The fake server has no cached content, so the prompt always goes inline
+        return StaticPromptCache(
+            self.model_name, system_prompt,
+            mode=StaticPromptCache.INLINE,
+            model_factory=lambda **kwargs: self.model
+        )
+
+
+def create_backend_from_env(model_name: str):
+    """Pick the backend from LLM_BACKEND ('gemini' or 'fake'; the fake uses FAKE_GEMINI_URL)"""
+    backend = os.environ.get('LLM_BACKEND', 'gemini').lower()
+    if backend == 'fake':
+        return FakeGeminiBackend(os.environ.get('FAKE_GEMINI_URL', 'http://127.0.0.1:8089'))
+    if backend != 'gemini':
+        raise ValueError(f"Unknown LLM_BACKEND: {backend}")
+    return GeminiBackend(model_name)
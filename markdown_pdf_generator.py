@@ -10,8 +10,43 @@ from reportlab.lib.colors import HexColor, black, white
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
 from datetime import datetime
+import io
 import os
 import re
+import tempfile
+import threading
+import time
+from metrics import PDF_RENDER_SECONDS
+from report_fonts import font_for
+
+
+def _read_only(self, *args):
+    raise AttributeError(f"Style '{self.name}' is shared by every report and cannot be changed")
+
+
+_frozen_classes = {}
+
+
+def freeze_styles(styles):
+    """
+    Make a style sheet and its styles read-only so one instance can serve concurrent renders
+    
+    Each style's class is swapped for a subclass that rejects attribute writes,
+    and the sheet rejects new styles.
+    """
+    for style in list(styles.byName.values()):
+        cls = type(style)
+        if cls in _frozen_classes.values():
+            continue
+        if cls not in _frozen_classes:
+            _frozen_classes[cls] = type(f"Frozen{cls.__name__}", (cls,), {
+                '__setattr__': _read_only,
+                '__delattr__': _read_only
+            })
+        style.__class__ = _frozen_classes[cls]
+    styles.add = lambda style, alias=None: _read_only(style)
+    return styles
+
 
 class MarkdownPDFGenerator:
     def __init__(self):
@@ -21,6 +56,12 @@ class MarkdownPDFGenerator:
     def setup_custom_styles(self):
         """Setup custom styles for the PDF report"""
         
+        # Sample styles used directly or as parents switch to the Gujarati-capable family
+        for style in self.styles.byName.values():
+            if isinstance(style, ParagraphStyle):
+                style.fontName = font_for(style.fontName)
+                style.bulletFontName = font_for(style.bulletFontName)
+        
         # Title style
         self.styles.add(ParagraphStyle(
             name='CustomTitle',
@@ -29,7 +70,7 @@ class MarkdownPDFGenerator:
             spaceAfter=30,
             textColor=HexColor('#667eea'),
             alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
+            fontName=font_for('Helvetica-Bold')
         ))
         
         # Subtitle style
@@ -40,7 +81,7 @@ class MarkdownPDFGenerator:
             spaceAfter=20,
             spaceBefore=15,
             textColor=HexColor('#667eea'),
-            fontName='Helvetica-Bold'
+            fontName=font_for('Helvetica-Bold')
         ))
         
         # Section header style
@@ -51,7 +92,7 @@ class MarkdownPDFGenerator:
             spaceAfter=12,
             spaceBefore=20,
             textColor=HexColor('#4c51bf'),
-            fontName='Helvetica-Bold'
+            fontName=font_for('Helvetica-Bold')
         ))
         
         # Body text style
@@ -62,7 +103,7 @@ class MarkdownPDFGenerator:
             spaceAfter=12,
             textColor=HexColor('#2d3748'),
             alignment=TA_JUSTIFY,
-            fontName='Helvetica',
+            fontName=font_for('Helvetica'),
             leading=16
         ))
         
@@ -73,7 +114,7 @@ class MarkdownPDFGenerator:
             fontSize=12,
             spaceAfter=10,
             textColor=HexColor('#667eea'),
-            fontName='Helvetica-Bold'
+            fontName=font_for('Helvetica-Bold')
         ))
         
         # Field name style
@@ -83,7 +124,7 @@ class MarkdownPDFGenerator:
             fontSize=16,
             spaceAfter=15,
             textColor=HexColor('#2d3748'),
-            fontName='Helvetica-Bold',
+            fontName=font_for('Helvetica-Bold'),
             alignment=TA_CENTER
         ))
         
@@ -94,7 +135,7 @@ class MarkdownPDFGenerator:
             fontSize=18,
             spaceAfter=15,
             textColor=HexColor('#f6ad55'),
-            fontName='Helvetica-Bold',
+            fontName=font_for('Helvetica-Bold'),
             alignment=TA_CENTER
         ))
 
@@ -540,14 +581,14 @@ class MarkdownPDFGenerator:
         markdown_content.append("- મુખ્ય જીવન અથવા કારકિર્દીના નિર્ણયો માટે વ્યાવસાયિક માર્ગદર્શન લેવાનું વિચારો")
         markdown_content.append("- આ સાધન માત્ર શૈક્ષણિક અને સ્વ-જાગૃતિના હેતુઓ માટે છે")
         markdown_content.append("")
-        markdown_content.append(f"*રિપોર્ટ બનાવવાની તારીખ: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}*")
+        markdown_content.append(f"*રિપોર્ટ બનાવવાની તારીખ: {datetime.now().strftime('%B %d, %Y')}*")
         markdown_content.append("")
         markdown_content.append("**AI-આધારિત મનોવૈજ્ઞાનિક પરીક્ષણ પ્લેટફોર્મ**")
         
         return "\n".join(markdown_content)
 
     def generate_pdf(self, test_results, ai_insights=None, filename=None):
-        """Generate PDF using ReportLab directly"""
+        """Generate PDF using ReportLab directly; filename may also be a writable binary file object"""
         if filename is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"psychological_report_{timestamp}.pdf"
@@ -951,12 +992,61 @@ class MarkdownPDFGenerator:
         story.append(Paragraph("• This tool is for educational and self-awareness purposes only", self.styles['CustomBody']))
         
         story.append(Spacer(1, 20))
-        story.append(Paragraph(f"Report generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", self.styles['CustomBody']))
+        story.append(Paragraph(f"Report generated on {datetime.now().strftime('%B %d, %Y')}", self.styles['CustomBody']))
         story.append(Paragraph("AI-Powered Psychological Testing Platform", self.styles['CustomBody']))
         
         return story
 
+_shared_generator = None
+_shared_generator_lock = threading.Lock()
+
+
+def shared_generator():
+    """
+    Process-wide generator with frozen styles, built on first use
+    
+    The generator keeps no per-report state, so concurrent requests can share it
+    instead of rebuilding the sample style sheet and custom styles each time.
+    """
+    global _shared_generator
+    if _shared_generator is None:
+        with _shared_generator_lock:
+            if _shared_generator is None:
+                generator = MarkdownPDFGenerator()
+                freeze_styles(generator.styles)
+                _shared_generator = generator
+    return _shared_generator
+
+
 def generate_pdf_report(test_results, ai_insights=None, filename=None):
-    """Generate PDF report using markdown approach"""
-    generator = MarkdownPDFGenerator()
-    return generator.generate_pdf(test_results, ai_insights, filename)
+    """Generate PDF report using markdown approach; filename may also be a writable binary file object"""
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        generator = shared_generator()
+        pdf_path = generator.generate_pdf(test_results, ai_insights, filename)
+        outcome = 'ok'
+        return pdf_path
+    finally:
+        PDF_RENDER_SECONDS.observe(time.perf_counter() - start, outcome=outcome)
+
+def render_pdf_report(test_results, ai_insights=None, spill_bytes=0):
+    """
+    Render a PDF report into an unnamed buffer instead of a file in the working directory
+    
+    Args:
+        test_results: Test results as sent by the client
+        ai_insights: Optional AI insights
+        spill_bytes: If set, a report larger than this moves from memory to an anonymous temporary file
+        
+    Returns:
+        A binary file object positioned at the start; the caller closes it
+    """
+    buffer = tempfile.SpooledTemporaryFile(max_size=spill_bytes) if spill_bytes else io.BytesIO()
+    try:
+        generate_pdf_report(test_results, ai_insights, buffer)
+    except Exception:
+        buffer.close()
+        raise
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,202 @@
+"""
+Metrics
+Minimal thread-safe counters and histograms rendered in the Prometheus text format
+
+Values are per process; with several gunicorn workers each worker reports its own.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Tuple
+
+
+def _format_labels(labelnames: Tuple[str, ...], labelvalues: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return '\n'.join(lines)
+
+
+class Histogram:
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 20, 30, 60)
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                    lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return '\n'.join(lines)
+
+
+class CallbackGauge:
+    TYPE = 'gauge'
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float]):
+        """Gauge whose value is read from callback at scrape time"""
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+        try:
+            lines.append(f"{self.name} {_format_value(self.callback())}")
+        except Exception as e:
+            print(f"Warning: Could not collect metric {self.name}: {e}")
+        return '\n'.join(lines)
+
+
+class CallbackCounter(CallbackGauge):
+    """Counter kept by another object (e.g. its hit count), read from callback at scrape time"""
+    TYPE = 'counter'
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = Histogram.DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(self, name: str, documentation: str, callback: Callable[[], float]) -> CallbackGauge:
+        return self.register(CallbackGauge(name, documentation, callback))
+
+    def counter_callback(self, name: str, documentation: str, callback: Callable[[], float]) -> CallbackCounter:
+        """Register a monotonic value read at scrape time; by convention name ends in _total"""
+        return self.register(CallbackCounter(name, documentation, callback))
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+registry = MetricsRegistry()
+
+# LLM hot path
+LLM_CALL_SECONDS = registry.histogram(
+    'insights_llm_call_duration_seconds',
+    'Latency of individual Gemini calls',
+    ['kind', 'outcome']
+)
+LLM_ATTEMPT_FAILURES = registry.counter(
+    'insights_llm_attempt_failures_total',
+    'Failed generation attempts by reason',
+    ['reason']
+)
+LLM_PROMPT_TOKENS = registry.counter(
+    'insights_llm_prompt_tokens_total',
+    'Prompt tokens sent to Gemini',
+    ['kind']
+)
+LLM_CACHED_TOKENS = registry.counter(
+    'insights_llm_cached_prompt_tokens_total',
+    'Prompt tokens served from upstream cached content',
+    ['kind']
+)
+LLM_OUTPUT_TOKENS = registry.counter(
+    'insights_llm_output_tokens_total',
+    'Output tokens generated by Gemini',
+    ['kind']
+)
+
+# PDF rendering
+PDF_RENDER_SECONDS = registry.histogram(
+    'insights_pdf_render_duration_seconds',
+    'Time spent building PDF reports',
+    ['outcome'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+)
+
+
+def record_llm_usage(response, kind: str):
+    """Add the token counts from a Gemini response's usage metadata"""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return
+    LLM_PROMPT_TOKENS.inc(getattr(usage, 'prompt_token_count', 0) or 0, kind=kind)
+    LLM_CACHED_TOKENS.inc(getattr(usage, 'cached_content_token_count', 0) or 0, kind=kind)
+    LLM_OUTPUT_TOKENS.inc(getattr(usage, 'candidates_token_count', 0) or 0, kind=kind)
@@ -0,0 +1,174 @@
+"""
+Profile Similarity Index
+Finds previously generated insights for the closest answer profile by weighted Hamming distance
+"""
+
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Answer categories of convert_to_structured_format and how much a difference in each changes the advice
+DEFAULT_WEIGHTS = OrderedDict([
+    ('mbti_test', 3.0),
+    ('riasec', 3.0),
+    ('multiple_intelligence', 2.0),
+    ('big_five', 2.0),
+    ('decision_making', 1.0),
+    ('life_situation', 1.0),
+    ('learning_style', 0.5),
+])
+
+
+class ProfileIndex:
+    # Below this many profiles a linear scan is cheaper than enumerating neighbours
+    SCAN_LIMIT = 256
+
+    def __init__(self, weights: Dict[str, float] = None, max_entries: int = 50000, max_distance: float = 4.0):
+        """
+        Index of answer profiles with generated insights
+
+        Each profile is encoded as one byte per category (0 for unanswered), with
+        the answer texts interned into per-category vocabularies.
+
+        Args:
+            weights: Category name to the cost of a differing answer
+            max_entries: Profiles kept; the oldest are dropped first
+            max_distance: Neighbours further than this are never returned
+        """
+        self.weights = OrderedDict(weights or DEFAULT_WEIGHTS)
+        self.categories = list(self.weights.keys())
+        self._weight_list = [self.weights[name] for name in self.categories]
+        self.total_weight = sum(self._weight_list)
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self._vocab = [{} for _ in self.categories]
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.found = 0
+
+        # Sets of categories to vary, cheapest first, for neighbour enumeration
+        self._variations = sorted(
+            (combo for size in range(1, len(self.categories) + 1)
+             for combo in itertools.combinations(range(len(self.categories)), size)
+             if sum(self._weight_list[i] for i in combo) <= max_distance),
+            key=lambda combo: sum(self._weight_list[i] for i in combo)
+        )
+
+    def _encode(self, structured: Dict[str, Any], add: bool) -> Optional[bytes]:
+        codes = bytearray()
+        for position, name in enumerate(self.categories):
+            answer = structured.get(name)
+            if isinstance(answer, dict):
+                answer = answer.get('selected_option')
+            if answer is None:
+                codes.append(0)
+                continue
+            vocab = self._vocab[position]
+            code = vocab.get(answer)
+            if code is None:
+                if not add:
+                    # An answer never seen before cannot match; treat it as differing
+                    codes.append(255)
+                    continue
+                if len(vocab) >= 254:
+                    return None
+                code = len(vocab) + 1
+                vocab[answer] = code
+            codes.append(code)
+        return bytes(codes)
+
+    def add(self, structured: Dict[str, Any], insights: Dict[str, Any]):
+        """Index the insights generated for a structured profile"""
+        with self._lock:
+            code = self._encode(structured, add=True)
+            if code is None:
+                return
+            self._entries[code] = insights
+            self._entries.move_to_end(code)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _distance(self, a: bytes, b: bytes) -> float:
+        return sum(weight for weight, x, y in zip(self._weight_list, a, b) if x != y)
+
+    def _scan(self, code: bytes) -> Tuple[Optional[bytes], float]:
+        best, best_distance = None, None
+        for candidate in self._entries:
+            distance = self._distance(code, candidate)
+            if best_distance is None or distance < best_distance:
+                best, best_distance = candidate, distance
+                if distance == 0:
+                    break
+        return best, best_distance
+
+    def _enumerate(self, code: bytes) -> Tuple[Optional[bytes], float]:
+        """Look up every profile within max_distance, nearest variations first"""
+        if code in self._entries:
+            return code, 0.0
+        for combo in self._variations:
+            # 0 (unanswered) is a value like any other, as it is for _scan
+            alternatives = [
+                [value for value in range(len(self._vocab[i]) + 1) if value != code[i]]
+                for i in combo
+            ]
+            candidate = bytearray(code)
+            for values in itertools.product(*alternatives):
+                for i, value in zip(combo, values):
+                    candidate[i] = value
+                if bytes(candidate) in self._entries:
+                    return bytes(candidate), sum(self._weight_list[i] for i in combo)
+        return None, None
+
+    def nearest(self, structured: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Return (insights, similarity) for the closest indexed profile
+
+        Similarity is 1.0 for an identical profile and 0.0 when every category
+        differs. Returns None if nothing is within max_distance.
+        """
+        with self._lock:
+            self.lookups += 1
+            code = self._encode(structured, add=False)
+            if not self._entries:
+                return None
+            if len(self._entries) <= self.SCAN_LIMIT:
+                match, distance = self._scan(code)
+            else:
+                match, distance = self._enumerate(code)
+            if match is None or distance > self.max_distance:
+                return None
+            self.found += 1
+            return self._entries[match], round(1 - distance / self.total_weight, 4)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return index size and lookup counts for monitoring"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'lookups': self.lookups,
+                'found': self.found
+            }
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Parse 'mbti_test=3,riasec=3,...' into weights, keeping defaults for unnamed categories"""
+    weights = OrderedDict(DEFAULT_WEIGHTS)
+    for item in spec.split(','):
+        if '=' in item:
+            name, value = item.split('=', 1)
+            if name.strip() in weights:
+                weights[name.strip()] = float(value)
+    return weights
+
+
+def create_profile_index_from_env() -> ProfileIndex:
+    """Build an index from PROFILE_INDEX_WEIGHTS, PROFILE_INDEX_MAX_ENTRIES and PROFILE_INDEX_MAX_DISTANCE"""
+    return ProfileIndex(
+        weights=parse_weights(os.environ.get('PROFILE_INDEX_WEIGHTS', '')),
+        max_entries=int(os.environ.get('PROFILE_INDEX_MAX_ENTRIES', 50000)),
+        max_distance=float(os.environ.get('PROFILE_INDEX_MAX_DISTANCE', 4.0))
+    )
@@ -0,0 +1,229 @@
+"""
+Static Prompt Cache
+Sends the large static system prompt once per process instead of with every request
+"""
+
+import asyncio
+import datetime
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple
+
+from startup import lazy_import
+
+# Context caching needs an explicit model version; aliases and experimental models are rejected
+DEFAULT_CACHE_MODEL = 'models/gemini-1.5-flash-002'
+
+
+class StaticPromptCache:
+    # Ways of sending the static prompt, best first
+    CACHED_CONTENT = 'cached_content'
+    SYSTEM_INSTRUCTION = 'system_instruction'
+    INLINE = 'inline'
+
+    def __init__(self, model_name: str, system_prompt: str, ttl_seconds: float = 3600,
+                 refresh_margin: float = 300, mode: str = 'auto', model_factory: Callable[..., Any] = None,
+                 retry_delay: float = 60, max_retry_delay: float = 3600, cache_model: str = None):
+        """
+        Initialize the cache; nothing is sent upstream until the first call
+
+        Args:
+            model_name: Gemini model the static prompt is cached for
+            system_prompt: Static instructions and JSON schema shared by every request
+            ttl_seconds: Lifetime of the upstream cached-content handle
+            refresh_margin: Extend the handle this many seconds before it expires
+            mode: 'auto' to use the best supported mode, or one of the mode constants
+            model_factory: Builds models for the system-instruction and inline modes
+                (defaults to genai.GenerativeModel for model_name)
+            retry_delay: Seconds before creating cached content is tried again after a
+                failure; doubles on each further failure
+            max_retry_delay: Cap on the delay between creation attempts
+            cache_model: Versioned model the cached content is created for, e.g.
+                'models/gemini-1.5-flash-002'; requests in cached-content mode run on it
+                (defaults to model_name)
+        """
+        self.model_name = model_name
+        cache_model = cache_model or model_name
+        self.cache_model = cache_model if cache_model.startswith('models/') else f"models/{cache_model}"
+        self.system_prompt = system_prompt
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin = refresh_margin
+        self.requested_mode = mode
+        self.model_factory = model_factory or (
+            lambda **kwargs: lazy_import('google.generativeai').GenerativeModel(model_name, **kwargs)
+        )
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        # (model, mode) replaced as one value so callers can read it without the lock
+        self._active = (None, None)
+        self._cached_content = None
+        self._expires_at = 0.0
+        self._failures = 0
+        self._retry_at = None
+        self.last_error = None
+        # Held only by the thread talking to Gemini; request paths never wait on it once set up
+        self._setup_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.refreshes = 0
+
+    @property
+    def mode(self):
+        return self._active[1]
+
+    def _due(self) -> bool:
+        """True if the cached-content handle needs extending or creating is due for another attempt"""
+        mode = self.mode
+        if mode == self.CACHED_CONTENT:
+            return time.monotonic() >= self._expires_at - self.refresh_margin
+        return self._retry_at is not None and time.monotonic() >= self._retry_at
+
+    def get_model(self) -> Tuple[Any, bool]:
+        """
+        Return the model to call and whether it already carries the static prompt
+
+        When the second value is False the caller must include system_prompt inline.
+        Only the first call waits for setup; a due refresh is done by one caller
+        while the others keep using the current model.
+        """
+        if self.mode is None:
+            with self._setup_lock:
+                if self.mode is None:
+                    self._setup()
+        elif self._due() and self._setup_lock.acquire(blocking=False):
+            try:
+                if self._due():
+                    if self.mode == self.CACHED_CONTENT:
+                        self._refresh()
+                    else:
+                        self._retry_create()
+            finally:
+                self._setup_lock.release()
+        model, mode = self._active
+        return model, mode != self.INLINE
+
+    async def get_model_async(self) -> Tuple[Any, bool]:
+        """get_model for event-loop code: setup and refreshes run in a worker thread"""
+        if self.mode is None or self._due():
+            return await asyncio.to_thread(self.get_model)
+        model, mode = self._active
+        return model, mode != self.INLINE
+
+    def _caching_supported(self) -> bool:
+        return self.requested_mode in ('auto', self.CACHED_CONTENT) and \
+            hasattr(lazy_import('google.generativeai'), 'caching')
+
+    def _setup(self):
+        if self._caching_supported():
+            try:
+                self._create_cached_content()
+                print(f"Static prompt cached upstream as {self._cached_content.name}")
+                return
+            except Exception as e:
+                # Unversioned models and prompts below the minimum cacheable size are rejected
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"Warning: Could not cache the static prompt for {self.cache_model}, sending it as a "
+                      f"system instruction with every request (no input tokens saved): {self.last_error}")
+                self._schedule_retry()
+
+        if self.requested_mode in ('auto', self.CACHED_CONTENT, self.SYSTEM_INSTRUCTION):
+            try:
+                self._active = (self.model_factory(system_instruction=self.system_prompt), self.SYSTEM_INSTRUCTION)
+                return
+            except TypeError:
+                print("Warning: google-generativeai does not support system instructions, sending prompt inline")
+                self._retry_at = None
+
+        self._active = (self.model_factory(), self.INLINE)
+
+    def _schedule_retry(self):
+        """Try creating cached content again after an exponentially growing delay"""
+        delay = min(self.max_retry_delay, self.retry_delay * (2 ** self._failures))
+        self._failures += 1
+        self._retry_at = time.monotonic() + delay
+
+    def _create_cached_content(self):
+        genai = lazy_import('google.generativeai')
+        self._cached_content = genai.caching.CachedContent.create(
+            model=self.cache_model,
+            display_name='insights-system-prompt',
+            system_instruction=self.system_prompt,
+            ttl=datetime.timedelta(seconds=self.ttl_seconds)
+        )
+        self._expires_at = time.monotonic() + self.ttl_seconds
+        self._active = (genai.GenerativeModel.from_cached_content(self._cached_content), self.CACHED_CONTENT)
+        self._failures = 0
+        self._retry_at = None
+        self.last_error = None
+
+    def _retry_create(self):
+        """Switch back from the system-instruction fallback once cached content can be created"""
+        try:
+            self._create_cached_content()
+            print(f"Static prompt cached upstream as {self._cached_content.name}")
+        except Exception as e:
+            self._schedule_retry()
+            self.last_error = f"{type(e).__name__}: {e}"
+            print(f"Warning: Could not cache the static prompt for {self.cache_model}, retrying in "
+                  f"{self._retry_at - time.monotonic():.0f}s: {self.last_error}")
+
+    def _refresh(self):
+        """Extend the cached-content handle, recreating it if it is already gone"""
+        try:
+            self._cached_content.update(ttl=datetime.timedelta(seconds=self.ttl_seconds))
+            self._expires_at = time.monotonic() + self.ttl_seconds
+        except Exception as e:
+            print(f"Warning: Could not extend cached content, recreating it: {e}")
+            try:
+                self._create_cached_content()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"Warning: Could not recreate cached content, using system instruction: {self.last_error}")
+                self._active = (self.model_factory(system_instruction=self.system_prompt), self.SYSTEM_INSTRUCTION)
+                self._schedule_retry()
+                return
+        self.refreshes += 1
+
+    def record_usage(self, response: Any):
+        """Record prompt and cached token counts from a response's usage metadata"""
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is None:
+            return
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += getattr(usage, 'prompt_token_count', 0) or 0
+            self.cached_tokens += getattr(usage, 'cached_content_token_count', 0) or 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the active mode and input-token savings for monitoring"""
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'cache_model': self.cache_model,
+                'last_error': self.last_error,
+                'calls': self.calls,
+                'prompt_tokens': self.prompt_tokens,
+                'cached_tokens': self.cached_tokens,
+                'cached_token_ratio': round(self.cached_tokens / self.prompt_tokens, 4) if self.prompt_tokens else 0.0,
+                'refreshes': self.refreshes
+            }
+
+
+def create_prompt_cache_from_env(model_name: str, system_prompt: str) -> StaticPromptCache:
+    """
+    Build a cache using GEMINI_PROMPT_CACHE (auto/cached_content/system_instruction/inline),
+    GEMINI_PROMPT_CACHE_TTL, GEMINI_PROMPT_CACHE_RETRY (seconds before a failed creation is retried)
+    and GEMINI_CACHE_MODEL (versioned model that supports context caching)
+    """
+    return StaticPromptCache(
+        model_name=model_name,
+        cache_model=os.environ.get('GEMINI_CACHE_MODEL') or DEFAULT_CACHE_MODEL,
+        system_prompt=system_prompt,
+        ttl_seconds=float(os.environ.get('GEMINI_PROMPT_CACHE_TTL', 3600)),
+        mode=os.environ.get('GEMINI_PROMPT_CACHE', 'auto'),
+        retry_delay=float(os.environ.get('GEMINI_PROMPT_CACHE_RETRY', 60))
+    )
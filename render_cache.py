@@ -0,0 +1,195 @@
+"""
+Render Cache
+Content-addressed on-disk store of rendered reports, served straight from the file system
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, BinaryIO, Dict, Optional, Union
+
+
+def source_fingerprint(*paths: str) -> str:
+    """Hash of the renderer sources, so a deploy that changes rendering never serves old output"""
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(path.encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class RenderCache:
+    # Eviction frees space down to this fraction of max_bytes so it does not run on every store
+    EVICT_TO = 0.9
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, version: str = '',
+                 max_age: float = 24 * 60 * 60):
+        """
+        Rendered files named by a hash of everything that went into them
+
+        The directory may be shared by several worker processes: files are
+        written under a temporary name and renamed into place, and the least
+        recently used ones are removed once the total size exceeds max_bytes
+        or they have not been used for max_age seconds.
+
+        Reports hold personal results, so the directory is private to the
+        user running the app.
+
+        Args:
+            directory: Where rendered files are kept
+            max_bytes: Total size kept on disk
+            version: Mixed into every key, e.g. source_fingerprint of the renderer
+            max_age: Seconds an unused render is kept
+
+        Raises:
+            PermissionError: if the directory exists and belongs to another user
+        """
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.version = version
+        self.max_age = max_age
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self._make_private()
+        self._lock = threading.Lock()
+        self._size = sum(size for _, size, _ in self._entries())
+        self._swept_at = time.time()
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def _make_private(self):
+        # A directory with a predictable name under /tmp may have been created by someone else
+        stat = os.stat(self.directory)
+        if hasattr(os, 'getuid') and stat.st_uid != os.getuid():
+            raise PermissionError(f"Render cache directory {self.directory} belongs to another user")
+        if stat.st_mode & 0o077:
+            os.chmod(self.directory, 0o700)
+
+    def key(self, kind: str, *inputs: Any) -> str:
+        """Hash of the render kind and its inputs as canonical JSON"""
+        canonical = json.dumps([self.version, kind, inputs], sort_keys=True, separators=(',', ':'),
+                               ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{key}{suffix}")
+
+    def get(self, key: str, suffix: str) -> Optional[str]:
+        """Return the path of a stored render, or None"""
+        path = self.path(key, suffix)
+        try:
+            if time.time() - os.stat(path).st_mtime > self.max_age:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            # Access time is not reliable (noatime mounts), so mtime records recency
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def put(self, key: str, suffix: str, content: Union[bytes, BinaryIO]) -> str:
+        """
+        Store a render and return its path
+
+        Args:
+            content: The rendered bytes, or a binary file object positioned at the start
+        """
+        path = self.path(key, suffix)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if isinstance(content, (bytes, bytearray, memoryview)):
+                    f.write(content)
+                else:
+                    shutil.copyfileobj(content, f)
+                size = f.tell()
+            try:
+                replaced = os.stat(path).st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self.stores += 1
+            self._size += size - replaced
+            # Expired files are swept a few times per max_age even while the size limit is not reached
+            if self._size > self.max_bytes or time.time() - self._swept_at > self.max_age / 4:
+                self._evict(keep=path)
+        return path
+
+    def _entries(self):
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield entry.path, stat.st_size, stat.st_mtime
+
+    def _evict(self, keep: str):
+        """Remove expired, then least recently used files; sizes are re-read as workers share the directory"""
+        now = time.time()
+        self._swept_at = now
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, mtime in entries:
+            if total <= self.max_bytes * self.EVICT_TO and now - mtime <= self.max_age:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+        self._size = total
+
+    def stats(self) -> Dict[str, Any]:
+        """Return disk usage and hit counts for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'directory': self.directory,
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'max_age': self.max_age,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'stores': self.stores,
+                'evictions': self.evictions
+            }
+
+
+def create_render_cache_from_env(version: str = '') -> Optional[RenderCache]:
+    """
+    Build a cache from RENDER_CACHE_DIR, RENDER_CACHE_MAX_BYTES and RENDER_CACHE_MAX_AGE (seconds)
+
+    Returns None when RENDER_CACHE_MAX_BYTES is 0.
+    """
+    max_bytes = int(os.environ.get('RENDER_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    if max_bytes <= 0:
+        return None
+    directory = os.environ.get('RENDER_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'report_render_cache')
+    return RenderCache(directory, max_bytes=max_bytes, version=version,
+                       max_age=float(os.environ.get('RENDER_CACHE_MAX_AGE', 24 * 60 * 60)))
@@ -0,0 +1,201 @@
+"""
+PDF Render Service
+Renders reports in a pool of warm worker processes so ReportLab never holds a web worker's GIL
+"""
+
+import io
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+
+from metrics import PDF_RENDER_SECONDS
+
+
+class RenderQueueFull(Exception):
+    """Raised when max_pending renders are already queued or running"""
+
+
+class RenderTimeout(Exception):
+    """Raised when a render does not finish within its time limit"""
+
+
+def _on_alarm(signum, frame):
+    raise RenderTimeout("PDF render exceeded its time limit")
+
+
+def _init_worker():
+    """Preload ReportLab and the shared generator's styles before the first render"""
+    from markdown_pdf_generator import shared_generator
+    shared_generator()
+    # Renders run on the worker's main thread, so an interval timer can interrupt them
+    if hasattr(signal, 'setitimer'):
+        signal.signal(signal.SIGALRM, _on_alarm)
+
+
+def _warm() -> int:
+    return os.getpid()
+
+
+def _render(test_results: Dict[str, Any], ai_insights: Optional[Dict[str, Any]], timeout: float) -> Tuple[bytes, float]:
+    """Render in a pool worker; returns (pdf bytes, render seconds)"""
+    from markdown_pdf_generator import shared_generator
+    start = time.perf_counter()
+    if hasattr(signal, 'setitimer'):
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        buffer = io.BytesIO()
+        shared_generator().generate_pdf(test_results, ai_insights, buffer)
+        return buffer.getvalue(), time.perf_counter() - start
+    except RenderTimeout:
+        # ReportLab prefixes the message with the paragraph it was rendering
+        raise RenderTimeout(f"PDF render exceeded {timeout:g}s") from None
+    finally:
+        if hasattr(signal, 'setitimer'):
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class RenderService:
+    def __init__(self, max_workers: int = 2, max_pending: int = 16, timeout: float = 30, queue_timeout: float = 30,
+                 start_method: str = None):
+        """
+        Bounded pool of render processes shared by the request threads of one web worker
+
+        Args:
+            max_workers: Render processes
+            max_pending: Renders queued or running before render_pdf raises RenderQueueFull
+            timeout: Seconds a single render may run before it is interrupted
+            queue_timeout: Seconds a render may wait for a free process
+            start_method: multiprocessing start method; defaults to forkserver where available,
+                since forking a threaded web worker directly is unsafe
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        if start_method is None:
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self.start_method = start_method
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created on first use so the pool belongs to the forked web worker
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                context = multiprocessing.get_context(self.start_method)
+                if self.start_method == 'forkserver':
+                    context.set_forkserver_preload(['markdown_pdf_generator'])
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context,
+                                                     initializer=_init_worker)
+                self._pid = os.getpid()
+            return self._executor
+
+    def warm(self) -> 'RenderService':
+        """Start every render process now instead of on the first download"""
+        executor = self._get_executor()
+        for _ in range(self.max_workers):
+            executor.submit(_warm)
+        return self
+
+    def _reset(self, executor: ProcessPoolExecutor):
+        """Replace a pool whose process died, e.g. killed for memory"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self.restarts += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def render_pdf(self, test_results: Dict[str, Any], ai_insights: Optional[Dict[str, Any]] = None) -> bytes:
+        """
+        Render a PDF report in a pool process and wait for its bytes
+
+        Raises:
+            RenderQueueFull: if max_pending renders are already queued or running
+            RenderTimeout: if the render waited or ran too long
+        """
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise RenderQueueFull(f"{self.pending} PDF renders already pending")
+            self.pending += 1
+
+        outcome = 'error'
+        start = time.perf_counter()
+        try:
+            for attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    future = executor.submit(_render, test_results, ai_insights, self.timeout)
+                    pdf, seconds = future.result(timeout=self.queue_timeout + self.timeout)
+                    break
+                except FutureTimeoutError:
+                    future.cancel()
+                    raise RenderTimeout("Timed out waiting for a PDF render process")
+                except BrokenProcessPool:
+                    # A render process died (e.g. killed for memory); retry once on a fresh pool
+                    self._reset(executor)
+                    if attempt:
+                        raise
+            outcome = 'ok'
+            PDF_RENDER_SECONDS.observe(seconds, outcome=outcome)
+            return pdf
+        except RenderTimeout:
+            outcome = 'timeout'
+            raise
+        finally:
+            if outcome != 'ok':
+                PDF_RENDER_SECONDS.observe(time.perf_counter() - start, outcome=outcome)
+            with self._lock:
+                self.pending -= 1
+                if outcome == 'ok':
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                    if outcome == 'timeout':
+                        self.timeouts += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool size and counters for monitoring"""
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'start_method': self.start_method,
+                'pending': self.pending,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'restarts': self.restarts
+            }
+
+
+def create_render_service_from_env() -> Optional[RenderService]:
+    """
+    Build a service from RENDER_WORKERS, RENDER_MAX_PENDING, RENDER_TIMEOUT and RENDER_QUEUE_TIMEOUT
+
+    Returns None when RENDER_WORKERS is 0, in which case reports render on the request thread,
+    and inside a render process, which may import the app again while starting.
+    """
+    max_workers = int(os.environ.get('RENDER_WORKERS', 2))
+    if max_workers <= 0 or multiprocessing.parent_process() is not None:
+        return None
+    return RenderService(
+        max_workers=max_workers,
+        max_pending=int(os.environ.get('RENDER_MAX_PENDING', 16)),
+        timeout=float(os.environ.get('RENDER_TIMEOUT', 30)),
+        queue_timeout=float(os.environ.get('RENDER_QUEUE_TIMEOUT', 30)),
+        start_method=os.environ.get('RENDER_START_METHOD') or None
+    )
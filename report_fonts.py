@@ -0,0 +1,117 @@
+"""
+Report Fonts
+Registers a Gujarati-capable TrueType family once per process for the PDF reports
+"""
+
+import os
+import threading
+from collections import namedtuple
+
+FONT_FAMILY = 'ReportGujarati'
+FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fonts')
+
+# Regular face lookup order after REPORT_FONT_PATH; the bold face is the sibling file named '...Bold...'.
+# ReportLab embeds TrueType outlines only, so CFF-based .otf files cannot be used.
+FONT_CANDIDATES = (
+    os.path.join(FONT_DIR, 'NotoSansGujarati-Regular.ttf'),
+    '/usr/share/fonts/truetype/noto/NotoSansGujarati-Regular.ttf',
+    '/usr/share/fonts/noto/NotoSansGujarati-Regular.ttf',
+    '/usr/share/fonts/google-noto/NotoSansGujarati-Regular.ttf',
+    '/usr/share/fonts/truetype/lohit-gujarati/Lohit-Gujarati.ttf',
+    '/usr/share/fonts/lohit-gujarati/Lohit-Gujarati.ttf',
+    '/Library/Fonts/NotoSansGujarati-Regular.ttf',
+    'C:\\Windows\\Fonts\\shruti.ttf',
+)
+
+# Built-in faces used when no Gujarati font is installed
+FALLBACK = ('Helvetica', 'Helvetica-Bold')
+
+ReportFonts = namedtuple('ReportFonts', ['regular', 'bold', 'path'])
+
+_fonts = None
+_lock = threading.Lock()
+
+
+def _bold_sibling(path: str):
+    directory, name = os.path.split(path)
+    if 'Regular' in name:
+        candidate = os.path.join(directory, name.replace('Regular', 'Bold'))
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def find_font_files():
+    """Return (regular_path, bold_path or None), or (None, None) if no Gujarati font is available"""
+    regular = os.environ.get('REPORT_FONT_PATH')
+    if not regular:
+        regular = next((path for path in FONT_CANDIDATES if os.path.exists(path)), None)
+    if not regular:
+        return None, None
+    return regular, os.environ.get('REPORT_FONT_BOLD_PATH') or _bold_sibling(regular)
+
+
+def _register() -> ReportFonts:
+    # Imported here so the web workers can fingerprint the fonts without loading ReportLab
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    regular_path, bold_path = find_font_files()
+    if regular_path is None:
+        print("Warning: No Gujarati TrueType font found (set REPORT_FONT_PATH); "
+              "Gujarati text in PDF reports will not render")
+        return ReportFonts(*FALLBACK, None)
+
+    try:
+        # Parsed once here; each document then embeds only the glyphs it uses
+        pdfmetrics.registerFont(TTFont(FONT_FAMILY, regular_path))
+        bold = FONT_FAMILY
+        if bold_path:
+            bold = f"{FONT_FAMILY}-Bold"
+            pdfmetrics.registerFont(TTFont(bold, bold_path))
+    except Exception as e:
+        print(f"Warning: Could not load report font {regular_path}: {e}")
+        return ReportFonts(*FALLBACK, None)
+
+    # <b> and <i> in paragraph markup resolve through the family mapping
+    pdfmetrics.registerFontFamily(FONT_FAMILY, normal=FONT_FAMILY, bold=bold, italic=FONT_FAMILY, boldItalic=bold)
+    return ReportFonts(FONT_FAMILY, bold, regular_path)
+
+
+def report_fonts() -> ReportFonts:
+    """Font names for report styles, registering the Gujarati family on first use in this process"""
+    global _fonts
+    if _fonts is None:
+        with _lock:
+            if _fonts is None:
+                _fonts = _register()
+    return _fonts
+
+
+def font_for(name: str) -> str:
+    """Map a built-in Helvetica face to the registered family, keeping other faces (e.g. Courier)"""
+    fonts = report_fonts()
+    if name in ('Helvetica', 'Helvetica-Oblique'):
+        return fonts.regular
+    if name in ('Helvetica-Bold', 'Helvetica-BoldOblique'):
+        return fonts.bold
+    return name
+
+
+def font_fingerprint() -> str:
+    """
+    Path, size and modification time of the font files a renderer would register, for keys of cached renders
+
+    Only looks the files up, so it is cheap to call on the request path of a worker that never renders.
+    """
+    parts = []
+    for path in find_font_files():
+        if path is None:
+            parts.append('-')
+            continue
+        try:
+            stat = os.stat(path)
+            parts.append(f"{path}:{stat.st_size}:{int(stat.st_mtime)}")
+        except OSError:
+            parts.append(path)
+    return '|'.join(parts)
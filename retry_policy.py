@@ -0,0 +1,234 @@
+"""
+Retry Policy for Gemini Calls
+Error classification, exponential backoff with jitter and a process-wide circuit breaker
+"""
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+
+class InsightsGenerationError(Exception):
+    """Raised when insights could not be generated"""
+
+    def __init__(self, message: str, retryable: bool = True, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(InsightsGenerationError):
+    """Raised without calling Gemini while the circuit breaker is open"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(
+            f"AI service is temporarily unavailable. Please retry in {int(retry_after) + 1} seconds.",
+            retryable=True,
+            retry_after=retry_after
+        )
+
+
+_TRANSIENT_NETWORK = (asyncio.TimeoutError, TimeoutError, ConnectionError)
+
+_upstream_exceptions = None
+
+
+def _google_exceptions(*names: str) -> Tuple[type, ...]:
+    try:
+        from google.api_core import exceptions as google_exceptions
+    except ImportError:
+        return ()
+    return tuple(getattr(google_exceptions, name) for name in names if hasattr(google_exceptions, name))
+
+
+def _classes() -> Tuple[Tuple[type, ...], Tuple[type, ...], Tuple[type, ...]]:
+    """
+    (retryable, fatal, throttled) upstream exception classes
+
+    google.api_core is imported on the first failure rather than at startup.
+    """
+    global _upstream_exceptions
+    if _upstream_exceptions is None:
+        _upstream_exceptions = (
+            # Worth retrying: throttling, overload and transient server faults
+            _google_exceptions('ResourceExhausted', 'TooManyRequests', 'ServiceUnavailable',
+                               'DeadlineExceeded', 'InternalServerError', 'BadGateway', 'GatewayTimeout'),
+            # Will fail the same way again: bad key, bad request, missing model
+            _google_exceptions('InvalidArgument', 'PermissionDenied', 'Unauthenticated', 'NotFound',
+                               'FailedPrecondition'),
+            _google_exceptions('ResourceExhausted', 'TooManyRequests')
+        )
+    return _upstream_exceptions
+
+
+def is_retryable(error: Exception) -> bool:
+    """Return True if a failed attempt may succeed when repeated"""
+    retryable_upstream, fatal_upstream, _ = _classes()
+    if fatal_upstream and isinstance(error, fatal_upstream):
+        return False
+    if retryable_upstream and isinstance(error, retryable_upstream):
+        return True
+    if isinstance(error, _TRANSIENT_NETWORK):
+        return True
+    # Malformed JSON or missing fields: the model is healthy, the sample was bad
+    if isinstance(error, (json.JSONDecodeError, ValueError)):
+        return True
+    return False
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    """Return True if the error indicates Gemini itself is unhealthy (counts towards the breaker)"""
+    retryable_upstream, _, _ = _classes()
+    if retryable_upstream and isinstance(error, retryable_upstream):
+        return True
+    return isinstance(error, _TRANSIENT_NETWORK)
+
+
+def is_throttled(error: Exception) -> bool:
+    """Return True if Gemini rejected the call for quota reasons"""
+    _, _, throttled = _classes()
+    return bool(throttled) and isinstance(error, throttled)
+
+
+class RetryPolicy:
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 20.0, multiplier: float = 2.0):
+        """
+        Exponential backoff with full jitter
+
+        Args:
+            base_delay: Upper bound of the first delay in seconds
+            max_delay: Cap on any single delay in seconds
+            multiplier: Growth factor of the upper bound per attempt
+        """
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+
+    def backoff_ceiling(self, attempt: int) -> float:
+        """Upper bound of the delay after the given zero-based attempt"""
+        return min(self.max_delay, self.base_delay * (self.multiplier ** attempt))
+
+    def compute_delay(self, attempt: int) -> float:
+        """Random delay in [0, ceiling] so synchronized clients spread out"""
+        return random.uniform(0, self.backoff_ceiling(attempt))
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, trial_timeout: float = 120.0):
+        """
+        Fail fast while the upstream is unhealthy
+
+        Args:
+            failure_threshold: Consecutive upstream failures that open the circuit
+            reset_timeout: Seconds to stay open before letting one trial call through
+            trial_timeout: Seconds after which a trial call that never reported back is
+                given up on and another trial is let through
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.trial_timeout = trial_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_started = 0.0
+        self.rejected_calls = 0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """
+        Raise CircuitOpenError if calls are currently being rejected
+
+        Returns:
+            True if this call is the half-open trial, which must be followed by
+            record_success, record_failure or release_trial
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return False
+
+            now = time.monotonic()
+            remaining = self.opened_at + self.reset_timeout - now
+            if (self.state == self.OPEN and remaining <= 0) or \
+                    (self.state == self.HALF_OPEN and now - self.trial_started > self.trial_timeout):
+                # Let a single trial call through
+                self.state = self.HALF_OPEN
+                self.trial_started = now
+                return True
+
+            self.rejected_calls += 1
+            raise CircuitOpenError(max(remaining, 1.0))
+
+    def release_trial(self):
+        """
+        Reopen the circuit if the trial call ended without recording an outcome
+
+        Covers trials that raised a non-upstream error, were cancelled or whose
+        stream was closed by the client; otherwise the breaker would stay half
+        open and reject every call.
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Check the breaker before one upstream call and release a trial however the call ends"""
+        trial = self.before_call()
+        try:
+            yield
+        finally:
+            if trial:
+                self.release_trial()
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def retry_after(self) -> Optional[float]:
+        """Seconds until the next trial call is allowed, or None when closed"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return None
+            return max(self.opened_at + self.reset_timeout - time.monotonic(), 1.0)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'rejected_calls': self.rejected_calls
+            }
+
+
+def create_retry_policy_from_env() -> RetryPolicy:
+    """Build a policy from GEMINI_RETRY_BASE_DELAY and GEMINI_RETRY_MAX_DELAY"""
+    return RetryPolicy(
+        base_delay=float(os.environ.get('GEMINI_RETRY_BASE_DELAY', 1.0)),
+        max_delay=float(os.environ.get('GEMINI_RETRY_MAX_DELAY', 20.0))
+    )
+
+
+# Shared by every generator in the process so all requests see the same upstream health
+gemini_circuit_breaker = CircuitBreaker(
+    failure_threshold=int(os.environ.get('GEMINI_BREAKER_THRESHOLD', 5)),
+    reset_timeout=float(os.environ.get('GEMINI_BREAKER_RESET_TIMEOUT', 30.0)),
+    trial_timeout=float(os.environ.get('GEMINI_BREAKER_TRIAL_TIMEOUT', 120.0))
+)
@@ -200,8 +200,37 @@ async function generateReport() {
     button.disabled = true;
     
     try {
-        // Generate AI insights
-        const aiInsights = await generateAIInsights();
+        // Generate AI insights, streaming sections as they are completed
+        let receivedSections = 0;
+        let draftInsights = null;
+        let aiInsights;
+        let complete = true;
+        try {
+            aiInsights = await generateAIInsightsStream((name, value) => {
+                receivedSections++;
+                button.innerHTML = `<i class="fas fa-spinner fa-spin"></i> Generating AI Insights... (${receivedSections} sections ready)`;
+                if (name === 'best_field' && value && value.field) {
+                    showNotification(`શ્રેષ્ઠ કારકિર્દી ક્ષેત્ર: ${value.field}`, 'success');
+                }
+            }, (insights) => {
+                draftInsights = insights;
+                if (insights.best_field && insights.best_field.field) {
+                    showNotification(`પ્રારંભિક અંદાજ: ${insights.best_field.field}`, 'info');
+                }
+            });
+        } catch (error) {
+            const partialInsights = error.partialInsights || {};
+            if (!draftInsights && !Object.keys(partialInsights).length) {
+                throw error;
+            }
+            // Better the sections received so far, completed by the closest profile's insights, than none
+            console.error('AI insights generation failed, keeping what was received:', error);
+            showNotification(error.retryAfter
+                ? `AI insights are incomplete. Please retry in ${error.retryAfter} seconds.`
+                : 'AI insights are incomplete. Please retry later.', 'error');
+            aiInsights = Object.assign({}, draftInsights, partialInsights);
+            complete = false;
+        }
         
         // Store insights for display
         window.aiInsights = aiInsights;
@@ -214,7 +243,9 @@ async function generateReport() {
         updateProgressBar();
         updateBackButton();
         
-        showNotification('AI insights generated successfully!', 'success');
+        if (complete) {
+            showNotification('AI insights generated successfully!', 'success');
+        }
         
     } catch (error) {
         console.error('Error generating AI insights:', error);
@@ -260,8 +291,119 @@ async function generateReport() {
     }
 }
 
+async function generateAIInsightsStream(onSection, onDraft, retryCount = 0) {
+    // Falls back to the regular endpoint only if streaming is unsupported. A stream that
+    // failed has already cost a generation, so its error is reported instead of starting another.
+    if (!window.ReadableStream || !window.TextDecoder) {
+        return await generateAIInsights();
+    }
+    const maxRetries = 1;
+    
+    let response;
+    try {
+        response = await fetch('/api/generate-insights/stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                testResults: testResults
+            })
+        });
+    } catch (error) {
+        console.error('Streaming request failed, falling back:', error);
+        return await generateAIInsights();
+    }
+    
+    if (response.status === 404 || response.status === 405 || (response.ok && !response.body)) {
+        console.log(`Streaming unavailable (status ${response.status}), falling back`);
+        return await generateAIInsights();
+    }
+    
+    if (!response.ok) {
+        // Rejected before generating (busy, rate limited or invalid input)
+        const data = await response.json().catch(() => ({}));
+        const retryAfter = data.retry_after || parseInt(response.headers.get('Retry-After'), 10);
+        if ((response.status === 429 || response.status === 503) && data.retry_suggested !== false &&
+                retryAfter && retryCount < maxRetries) {
+            console.log(`AI service busy, retrying in ${retryAfter}s...`);
+            await new Promise(resolve => setTimeout(resolve, Math.min(retryAfter, 30) * 1000));
+            return await generateAIInsightsStream(onSection, onDraft, retryCount + 1);
+        }
+        throw new Error(data.error || `Streaming request failed with status ${response.status}`);
+    }
+    
+    const insights = {};
+    let receivedEvent = false;
+    
+    try {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+            
+            // Server-Sent Events are separated by a blank line
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                
+                let eventName = 'message';
+                let eventData = '';
+                rawEvent.split('\n').forEach(line => {
+                    if (line.startsWith('event: ')) {
+                        eventName = line.slice(7);
+                    } else if (line.startsWith('data: ')) {
+                        eventData += line.slice(6);
+                    }
+                });
+                
+                const payload = JSON.parse(eventData);
+                receivedEvent = true;
+                if (eventName === 'draft') {
+                    // Insights of the most similar earlier profile, shown until ours are ready
+                    if (onDraft) {
+                        onDraft(payload.insights, payload.similarity);
+                    }
+                } else if (eventName === 'section') {
+                    insights[payload.name] = payload.value;
+                    if (onSection) {
+                        onSection(payload.name, payload.value);
+                    }
+                } else if (eventName === 'done') {
+                    return insights;
+                } else if (eventName === 'error') {
+                    const error = new Error(payload.error || 'Failed to generate AI insights');
+                    error.retryAfter = payload.retry_after;
+                    throw error;
+                }
+            }
+        }
+        
+        throw new Error('Insights stream ended unexpectedly');
+        
+    } catch (error) {
+        if (error instanceof TypeError && !receivedEvent) {
+            // The connection was dropped (e.g. by a proxy that does not stream) before anything arrived
+            console.error('Streaming connection failed, falling back:', error);
+            return await generateAIInsights();
+        }
+        // Sections already received are kept by the caller
+        error.partialInsights = insights;
+        throw error;
+    }
+}
+
 async function generateAIInsights(retryCount = 0) {
-    const maxRetries = 2;
+    // The server already retries with backoff, so only retry once when it
+    // tells us how long to wait (Retry-After) or the network failed
+    const maxRetries = 1;
     
     try {
         const response = await fetch('/api/generate-insights', {
@@ -279,13 +421,15 @@ async function generateAIInsights(retryCount = 0) {
         if (data.success) {
             return data.insights;
         } else {
-            // If the server suggests retry and we haven't exceeded max retries
-            if (data.retry_suggested && retryCount < maxRetries) {
-                console.log(`Retrying AI insights generation (attempt ${retryCount + 2}/${maxRetries + 1})...`);
-                await new Promise(resolve => setTimeout(resolve, 2000)); // Wait 2 seconds before retry
+            const retryAfter = data.retry_after || parseInt(response.headers.get('Retry-After'), 10);
+            if (data.retry_suggested && retryAfter && retryCount < maxRetries) {
+                console.log(`AI service busy, retrying in ${retryAfter}s (attempt ${retryCount + 2}/${maxRetries + 1})...`);
+                await new Promise(resolve => setTimeout(resolve, Math.min(retryAfter, 30) * 1000));
                 return await generateAIInsights(retryCount + 1);
             } else {
-                throw new Error(data.error || 'Failed to generate AI insights');
+                const error = new Error(data.error || 'Failed to generate AI insights');
+                error.fromServer = true;
+                throw error;
             }
         }
         
@@ -293,7 +437,7 @@ async function generateAIInsights(retryCount = 0) {
         console.error('API Error:', error);
         
         // If it's a network error and we haven't exceeded max retries
-        if (retryCount < maxRetries && (error.message.includes('fetch') || error.message.includes('network'))) {
+        if (!error.fromServer && retryCount < maxRetries && (error.message.includes('fetch') || error.message.includes('network'))) {
             console.log(`Retrying due to network error (attempt ${retryCount + 2}/${maxRetries + 1})...`);
             await new Promise(resolve => setTimeout(resolve, 2000));
             return await generateAIInsights(retryCount + 1);
@@ -318,303 +462,317 @@ function displayAIInsights(container) {
     container.appendChild(aiHeader);
     
     // Best Field Recommendation with enhanced display
-    const bestFieldCard = document.createElement('div');
-    bestFieldCard.className = 'result-card ai-insight-card best-field-card';
-    bestFieldCard.innerHTML = `
-        <h3><i class="fas fa-bullseye"></i> શ્રેષ્ઠ કારકિર્દી ક્ષેત્ર | Best Career Field</h3>
-        <div class="ai-field-name">${insights.best_field.field}</div>
-        <div class="match-percentage">
-            <span class="percentage-label">મેચ પર્સેન્ટેજ:</span>
-            <span class="percentage-value">${insights.best_field.match_percentage || 85}%</span>
-        </div>
-        <div class="ai-reasoning">${insights.best_field.reasoning}</div>
-        
-        <div class="field-details">
-            <div class="detail-item">
-                <strong>ગુજરાતમાં તકો:</strong>
-                <p>${insights.best_field.gujarat_opportunities}</p>
-            </div>
-            <div class="detail-item">
-                <strong>પગાર અપેક્ષા:</strong>
-                <p>${insights.best_field.salary_expectations}</p>
+    if (insights.best_field) {
+        const bestFieldCard = document.createElement('div');
+        bestFieldCard.className = 'result-card ai-insight-card best-field-card';
+        bestFieldCard.innerHTML = `
+            <h3><i class="fas fa-bullseye"></i> શ્રેષ્ઠ કારકિર્દી ક્ષેત્ર | Best Career Field</h3>
+            <div class="ai-field-name">${insights.best_field.field}</div>
+            <div class="match-percentage">
+                <span class="percentage-label">મેચ પર્સેન્ટેજ:</span>
+                <span class="percentage-value">${insights.best_field.match_percentage || 85}%</span>
             </div>
-            <div class="detail-item">
-                <strong>કંપનીઓ:</strong>
-                <div class="company-tags">
-                    ${insights.best_field.specific_companies?.map(company => `<span class="company-tag">${company}</span>`).join('') || ''}
+            <div class="ai-reasoning">${insights.best_field.reasoning}</div>
+        
+            <div class="field-details">
+                <div class="detail-item">
+                    <strong>ગુજરાતમાં તકો:</strong>
+                    <p>${insights.best_field.gujarat_opportunities}</p>
+                </div>
+                <div class="detail-item">
+                    <strong>પગાર અપેક્ષા:</strong>
+                    <p>${insights.best_field.salary_expectations}</p>
+                </div>
+                <div class="detail-item">
+                    <strong>કંપનીઓ:</strong>
+                    <div class="company-tags">
+                        ${insights.best_field.specific_companies?.map(company => `<span class="company-tag">${company}</span>`).join('') || ''}
+                    </div>
                 </div>
             </div>
-        </div>
-    `;
-    container.appendChild(bestFieldCard);
+        `;
+        container.appendChild(bestFieldCard);
+    }
     
     // Enhanced Career Recommendations
-    const careerCard = document.createElement('div');
-    careerCard.className = 'result-card ai-insight-card';
-    careerCard.innerHTML = `
-        <h3><i class="fas fa-briefcase"></i> કારકિર્દી ભલામણો | Career Recommendations</h3>
-        <div class="career-list">
-            ${insights.career_recommendations.map(career => `
-                <div class="career-item enhanced-career">
-                    <div class="career-header">
-                        <strong class="job-role">${career.job_role}</strong>
-                        <span class="industry-tag">${career.industry}</span>
-                    </div>
-                    <p class="career-explanation">${career.explanation}</p>
-                    <div class="career-details">
-                        <div class="detail-row">
-                            <span class="label">વૃદ્ધિ સંભાવના:</span>
-                            <span class="value growth-${career.growth_potential?.toLowerCase()}">${career.growth_potential}</span>
+    if (insights.career_recommendations) {
+        const careerCard = document.createElement('div');
+        careerCard.className = 'result-card ai-insight-card';
+        careerCard.innerHTML = `
+            <h3><i class="fas fa-briefcase"></i> કારકિર્દી ભલામણો | Career Recommendations</h3>
+            <div class="career-list">
+                ${insights.career_recommendations.map(career => `
+                    <div class="career-item enhanced-career">
+                        <div class="career-header">
+                            <strong class="job-role">${career.job_role}</strong>
+                            <span class="industry-tag">${career.industry}</span>
                         </div>
-                        <div class="detail-row">
-                            <span class="label">પગાર શ્રેણી:</span>
-                            <span class="value salary">${career.salary_range}</span>
-                        </div>
-                        <div class="detail-row">
-                            <span class="label">જરૂરી કુશળતા:</span>
-                            <div class="skills-tags">
-                                ${career.required_skills?.map(skill => `<span class="skill-tag">${skill}</span>`).join('') || ''}
+                        <p class="career-explanation">${career.explanation}</p>
+                        <div class="career-details">
+                            <div class="detail-row">
+                                <span class="label">વૃદ્ધિ સંભાવના:</span>
+                                <span class="value growth-${career.growth_potential?.toLowerCase()}">${career.growth_potential}</span>
+                            </div>
+                            <div class="detail-row">
+                                <span class="label">પગાર શ્રેણી:</span>
+                                <span class="value salary">${career.salary_range}</span>
+                            </div>
+                            <div class="detail-row">
+                                <span class="label">જરૂરી કુશળતા:</span>
+                                <div class="skills-tags">
+                                    ${career.required_skills?.map(skill => `<span class="skill-tag">${skill}</span>`).join('') || ''}
+                                </div>
                             </div>
                         </div>
                     </div>
-                </div>
-            `).join('')}
-        </div>
-    `;
-    container.appendChild(careerCard);
+                `).join('')}
+            </div>
+        `;
+        container.appendChild(careerCard);
+    }
     
     // Enhanced Skills & Roadmap
-    const skillsCard = document.createElement('div');
-    skillsCard.className = 'result-card ai-insight-card';
-    skillsCard.innerHTML = `
-        <h3><i class="fas fa-cogs"></i> કુશળતા અને શિક્ષણ માર્ગ | Skills & Learning Roadmap</h3>
-        <div class="skills-section">
-            <div class="skills-grid">
-                <div class="technical-skills">
-                    <h4><i class="fas fa-code"></i> તકનીકી કુશળતા:</h4>
-                    <div class="skills-list">
-                        ${insights.skill_recommendations.technical_skills.map(skillObj => `
-                            <div class="skill-item">
-                                <span class="skill-name">${typeof skillObj === 'object' ? skillObj.skill : skillObj}</span>
-                                ${typeof skillObj === 'object' ? `<span class="importance ${skillObj.importance?.toLowerCase()}">${skillObj.importance}</span>` : ''}
-                            </div>
-                        `).join('')}
+    if (insights.skill_recommendations && insights.roadmap) {
+        const skillsCard = document.createElement('div');
+        skillsCard.className = 'result-card ai-insight-card';
+        skillsCard.innerHTML = `
+            <h3><i class="fas fa-cogs"></i> કુશળતા અને શિક્ષણ માર્ગ | Skills & Learning Roadmap</h3>
+            <div class="skills-section">
+                <div class="skills-grid">
+                    <div class="technical-skills">
+                        <h4><i class="fas fa-code"></i> તકનીકી કુશળતા:</h4>
+                        <div class="skills-list">
+                            ${insights.skill_recommendations.technical_skills.map(skillObj => `
+                                <div class="skill-item">
+                                    <span class="skill-name">${typeof skillObj === 'object' ? skillObj.skill : skillObj}</span>
+                                    ${typeof skillObj === 'object' ? `<span class="importance ${skillObj.importance?.toLowerCase()}">${skillObj.importance}</span>` : ''}
+                                </div>
+                            `).join('')}
+                        </div>
                     </div>
-                </div>
                 
-                <div class="soft-skills">
-                    <h4><i class="fas fa-users"></i> સોફ્ટ સ્કિલ્સ:</h4>
-                    <div class="skills-list">
-                        ${insights.skill_recommendations.soft_skills.map(skillObj => `
-                            <div class="skill-item">
-                                <span class="skill-name">${typeof skillObj === 'object' ? skillObj.skill : skillObj}</span>
-                                ${typeof skillObj === 'object' ? `<span class="importance ${skillObj.importance?.toLowerCase()}">${skillObj.importance}</span>` : ''}
-                            </div>
-                        `).join('')}
+                    <div class="soft-skills">
+                        <h4><i class="fas fa-users"></i> સોફ્ટ સ્કિલ્સ:</h4>
+                        <div class="skills-list">
+                            ${insights.skill_recommendations.soft_skills.map(skillObj => `
+                                <div class="skill-item">
+                                    <span class="skill-name">${typeof skillObj === 'object' ? skillObj.skill : skillObj}</span>
+                                    ${typeof skillObj === 'object' ? `<span class="importance ${skillObj.importance?.toLowerCase()}">${skillObj.importance}</span>` : ''}
+                                </div>
+                            `).join('')}
+                        </div>
                     </div>
                 </div>
-            </div>
             
-            <h4><i class="fas fa-map-marked-alt"></i> શિક્ષણ માર્ગ:</h4>
-            <div class="roadmap enhanced-roadmap">
-                <div class="roadmap-item short-term">
-                    <div class="roadmap-header">
-                        <strong>${insights.roadmap.short_term.duration}</strong>
-                        <span class="phase-label">તાત્કાલિક</span>
-                    </div>
-                    <div class="roadmap-content">
-                        <div class="goals">
-                            <strong>લક્ષ્યો:</strong>
-                            <ul>${insights.roadmap.short_term.goals?.map(goal => `<li>${goal}</li>`).join('') || ''}</ul>
+                <h4><i class="fas fa-map-marked-alt"></i> શિક્ષણ માર્ગ:</h4>
+                <div class="roadmap enhanced-roadmap">
+                    <div class="roadmap-item short-term">
+                        <div class="roadmap-header">
+                            <strong>${insights.roadmap.short_term.duration}</strong>
+                            <span class="phase-label">તાત્કાલિક</span>
                         </div>
-                        <div class="actions">
-                            <strong>કાર્યો:</strong>
-                            <ul>${insights.roadmap.short_term.specific_actions?.map(action => `<li>${action}</li>`).join('') || ''}</ul>
+                        <div class="roadmap-content">
+                            <div class="goals">
+                                <strong>લક્ષ્યો:</strong>
+                                <ul>${insights.roadmap.short_term.goals?.map(goal => `<li>${goal}</li>`).join('') || ''}</ul>
+                            </div>
+                            <div class="actions">
+                                <strong>કાર્યો:</strong>
+                                <ul>${insights.roadmap.short_term.specific_actions?.map(action => `<li>${action}</li>`).join('') || ''}</ul>
+                            </div>
                         </div>
                     </div>
-                </div>
                 
-                <div class="roadmap-item mid-term">
-                    <div class="roadmap-header">
-                        <strong>${insights.roadmap.mid_term.duration}</strong>
-                        <span class="phase-label">મધ્યમ ગાળો</span>
-                    </div>
-                    <div class="roadmap-content">
-                        <div class="goals">
-                            <strong>લક્ષ્યો:</strong>
-                            <ul>${insights.roadmap.mid_term.goals?.map(goal => `<li>${goal}</li>`).join('') || ''}</ul>
+                    <div class="roadmap-item mid-term">
+                        <div class="roadmap-header">
+                            <strong>${insights.roadmap.mid_term.duration}</strong>
+                            <span class="phase-label">મધ્યમ ગાળો</span>
                         </div>
-                        <div class="milestones">
-                            <strong>પડાવો:</strong>
-                            <ul>${insights.roadmap.mid_term.milestones?.map(milestone => `<li>${milestone}</li>`).join('') || ''}</ul>
+                        <div class="roadmap-content">
+                            <div class="goals">
+                                <strong>લક્ષ્યો:</strong>
+                                <ul>${insights.roadmap.mid_term.goals?.map(goal => `<li>${goal}</li>`).join('') || ''}</ul>
+                            </div>
+                            <div class="milestones">
+                                <strong>પડાવો:</strong>
+                                <ul>${insights.roadmap.mid_term.milestones?.map(milestone => `<li>${milestone}</li>`).join('') || ''}</ul>
+                            </div>
                         </div>
                     </div>
-                </div>
                 
-                <div class="roadmap-item long-term">
-                    <div class="roadmap-header">
-                        <strong>${insights.roadmap.long_term.duration}</strong>
-                        <span class="phase-label">લાંબા ગાળો</span>
-                    </div>
-                    <div class="roadmap-content">
-                        <div class="goals">
-                            <strong>લક્ષ્યો:</strong>
-                            <ul>${insights.roadmap.long_term.goals?.map(goal => `<li>${goal}</li>`).join('') || ''}</ul>
+                    <div class="roadmap-item long-term">
+                        <div class="roadmap-header">
+                            <strong>${insights.roadmap.long_term.duration}</strong>
+                            <span class="phase-label">લાંબા ગાળો</span>
                         </div>
-                        <div class="entrepreneurship">
-                            <strong>ઉદ્યોગસાહસિક તકો:</strong>
-                            <p>${insights.roadmap.long_term.entrepreneurship_opportunities || ''}</p>
+                        <div class="roadmap-content">
+                            <div class="goals">
+                                <strong>લક્ષ્યો:</strong>
+                                <ul>${insights.roadmap.long_term.goals?.map(goal => `<li>${goal}</li>`).join('') || ''}</ul>
+                            </div>
+                            <div class="entrepreneurship">
+                                <strong>ઉદ્યોગસાહસિક તકો:</strong>
+                                <p>${insights.roadmap.long_term.entrepreneurship_opportunities || ''}</p>
+                            </div>
                         </div>
                     </div>
                 </div>
             </div>
-        </div>
-    `;
-    container.appendChild(skillsCard);
+        `;
+        container.appendChild(skillsCard);
+    }
     
     // Enhanced Strengths & Weaknesses Analysis
-    const analysisCard = document.createElement('div');
-    analysisCard.className = 'result-card ai-insight-card';
-    analysisCard.innerHTML = `
-        <h3><i class="fas fa-chart-line"></i> શક્તિઓ અને સુધારાના ક્ષેત્રો | Strengths & Areas for Improvement</h3>
-        <div class="analysis-section enhanced-analysis">
-            <div class="strengths">
-                <h4><i class="fas fa-plus-circle"></i> તમારી શક્તિઓ:</h4>
-                <div class="strength-items">
-                    ${insights.result_analysis.strengths.map(strengthObj => `
-                        <div class="strength-item">
-                            <strong class="strength-title">${typeof strengthObj === 'object' ? strengthObj.strength : strengthObj}</strong>
-                            ${typeof strengthObj === 'object' ? `
-                                <p class="strength-reasoning">${strengthObj.reasoning}</p>
-                                <p class="career-application"><strong>કારકિર્દીમાં ઉપયોગ:</strong> ${strengthObj.career_application}</p>
-                            ` : ''}
-                        </div>
-                    `).join('')}
+    if (insights.result_analysis) {
+        const analysisCard = document.createElement('div');
+        analysisCard.className = 'result-card ai-insight-card';
+        analysisCard.innerHTML = `
+            <h3><i class="fas fa-chart-line"></i> શક્તિઓ અને સુધારાના ક્ષેત્રો | Strengths & Areas for Improvement</h3>
+            <div class="analysis-section enhanced-analysis">
+                <div class="strengths">
+                    <h4><i class="fas fa-plus-circle"></i> તમારી શક્તિઓ:</h4>
+                    <div class="strength-items">
+                        ${insights.result_analysis.strengths.map(strengthObj => `
+                            <div class="strength-item">
+                                <strong class="strength-title">${typeof strengthObj === 'object' ? strengthObj.strength : strengthObj}</strong>
+                                ${typeof strengthObj === 'object' ? `
+                                    <p class="strength-reasoning">${strengthObj.reasoning}</p>
+                                    <p class="career-application"><strong>કારકિર્દીમાં ઉપયોગ:</strong> ${strengthObj.career_application}</p>
+                                ` : ''}
+                            </div>
+                        `).join('')}
+                    </div>
                 </div>
-            </div>
             
-            <div class="weaknesses">
-                <h4><i class="fas fa-exclamation-triangle"></i> સુધારાના ક્ષેત્રો:</h4>
-                <div class="weakness-items">
-                    ${insights.result_analysis.weaknesses.map(weaknessObj => `
-                        <div class="weakness-item">
-                            <strong class="weakness-title">${typeof weaknessObj === 'object' ? weaknessObj.weakness : weaknessObj}</strong>
-                            ${typeof weaknessObj === 'object' ? `
-                                <p class="weakness-reasoning">${weaknessObj.reasoning}</p>
-                                <p class="improvement-strategy"><strong>સુધારાની રીત:</strong> ${weaknessObj.improvement_strategy}</p>
-                            ` : ''}
-                        </div>
-                    `).join('')}
+                <div class="weaknesses">
+                    <h4><i class="fas fa-exclamation-triangle"></i> સુધારાના ક્ષેત્રો:</h4>
+                    <div class="weakness-items">
+                        ${insights.result_analysis.weaknesses.map(weaknessObj => `
+                            <div class="weakness-item">
+                                <strong class="weakness-title">${typeof weaknessObj === 'object' ? weaknessObj.weakness : weaknessObj}</strong>
+                                ${typeof weaknessObj === 'object' ? `
+                                    <p class="weakness-reasoning">${weaknessObj.reasoning}</p>
+                                    <p class="improvement-strategy"><strong>સુધારાની રીત:</strong> ${weaknessObj.improvement_strategy}</p>
+                                ` : ''}
+                            </div>
+                        `).join('')}
+                    </div>
                 </div>
             </div>
-        </div>
-    `;
-    container.appendChild(analysisCard);
+        `;
+        container.appendChild(analysisCard);
+    }
     
     // Enhanced Future Plans
-    const futureCard = document.createElement('div');
-    futureCard.className = 'result-card ai-insight-card';
-    futureCard.innerHTML = `
-        <h3><i class="fas fa-rocket"></i> ભવિષ્યની વૃદ્ધિ યોજના | Future Growth Plans</h3>
-        <div class="future-plans enhanced-future">
-            <div class="plan-item three-year">
-                <div class="plan-header">
-                    <strong>3 વર્ષની યોજના</strong>
-                    <span class="timeline-badge">2027</span>
-                </div>
-                <div class="plan-content">
-                    <p class="position"><strong>અપેક્ષિત પદ:</strong> ${insights.future_plans['3_year_plan']?.career_position || insights.future_plans['3_year_plan']}</p>
-                    ${insights.future_plans['3_year_plan']?.key_achievements ? `
-                        <div class="achievements">
-                            <strong>મુખ્ય સિદ્ધિઓ:</strong>
-                            <ul>${insights.future_plans['3_year_plan'].key_achievements.map(achievement => `<li>${achievement}</li>`).join('')}</ul>
-                        </div>
-                    ` : ''}
+    if (insights.future_plans) {
+        const futureCard = document.createElement('div');
+        futureCard.className = 'result-card ai-insight-card';
+        futureCard.innerHTML = `
+            <h3><i class="fas fa-rocket"></i> ભવિષ્યની વૃદ્ધિ યોજના | Future Growth Plans</h3>
+            <div class="future-plans enhanced-future">
+                <div class="plan-item three-year">
+                    <div class="plan-header">
+                        <strong>3 વર્ષની યોજના</strong>
+                        <span class="timeline-badge">2027</span>
+                    </div>
+                    <div class="plan-content">
+                        <p class="position"><strong>અપેક્ષિત પદ:</strong> ${insights.future_plans['3_year_plan']?.career_position || insights.future_plans['3_year_plan']}</p>
+                        ${insights.future_plans['3_year_plan']?.key_achievements ? `
+                            <div class="achievements">
+                                <strong>મુખ્ય સિદ્ધિઓ:</strong>
+                                <ul>${insights.future_plans['3_year_plan'].key_achievements.map(achievement => `<li>${achievement}</li>`).join('')}</ul>
+                            </div>
+                        ` : ''}
+                    </div>
                 </div>
-            </div>
             
-            <div class="plan-item five-year">
-                <div class="plan-header">
-                    <strong>5 વર્ષની યોજના</strong>
-                    <span class="timeline-badge">2029</span>
-                </div>
-                <div class="plan-content">
-                    <p class="position"><strong>વરિષ્ઠ પદ:</strong> ${insights.future_plans['5_year_plan']?.career_position || insights.future_plans['5_year_plan']}</p>
-                    ${insights.future_plans['5_year_plan']?.expertise_areas ? `
-                        <div class="expertise">
-                            <strong>નિપુણતા ક્ષેત્રો:</strong>
-                            <div class="expertise-tags">
-                                ${insights.future_plans['5_year_plan'].expertise_areas.map(area => `<span class="expertise-tag">${area}</span>`).join('')}
+                <div class="plan-item five-year">
+                    <div class="plan-header">
+                        <strong>5 વર્ષની યોજના</strong>
+                        <span class="timeline-badge">2029</span>
+                    </div>
+                    <div class="plan-content">
+                        <p class="position"><strong>વરિષ્ઠ પદ:</strong> ${insights.future_plans['5_year_plan']?.career_position || insights.future_plans['5_year_plan']}</p>
+                        ${insights.future_plans['5_year_plan']?.expertise_areas ? `
+                            <div class="expertise">
+                                <strong>નિપુણતા ક્ષેત્રો:</strong>
+                                <div class="expertise-tags">
+                                    ${insights.future_plans['5_year_plan'].expertise_areas.map(area => `<span class="expertise-tag">${area}</span>`).join('')}
+                                </div>
                             </div>
-                        </div>
-                    ` : ''}
+                        ` : ''}
+                    </div>
                 </div>
-            </div>
             
-            <div class="plan-item ten-year">
-                <div class="plan-header">
-                    <strong>10 વર્ષની દ્રષ્ટિ</strong>
-                    <span class="timeline-badge">2034</span>
-                </div>
-                <div class="plan-content">
-                    <p class="vision"><strong>કારકિર્દી દ્રષ્ટિ:</strong> ${insights.future_plans['10_year_plan']?.career_vision || insights.future_plans['10_year_plan']}</p>
-                    ${insights.future_plans['10_year_plan']?.entrepreneurial_potential ? `
-                        <p class="entrepreneurship"><strong>ઉદ્યોગસાહસિક સંભાવના:</strong> ${insights.future_plans['10_year_plan'].entrepreneurial_potential}</p>
-                    ` : ''}
+                <div class="plan-item ten-year">
+                    <div class="plan-header">
+                        <strong>10 વર્ષની દ્રષ્ટિ</strong>
+                        <span class="timeline-badge">2034</span>
+                    </div>
+                    <div class="plan-content">
+                        <p class="vision"><strong>કારકિર્દી દ્રષ્ટિ:</strong> ${insights.future_plans['10_year_plan']?.career_vision || insights.future_plans['10_year_plan']}</p>
+                        ${insights.future_plans['10_year_plan']?.entrepreneurial_potential ? `
+                            <p class="entrepreneurship"><strong>ઉદ્યોગસાહસિક સંભાવના:</strong> ${insights.future_plans['10_year_plan'].entrepreneurial_potential}</p>
+                        ` : ''}
+                    </div>
                 </div>
             </div>
-        </div>
-    `;
-    container.appendChild(futureCard);
+        `;
+        container.appendChild(futureCard);
+    }
     
     // Enhanced Daily Habits
-    const habitsCard = document.createElement('div');
-    habitsCard.className = 'result-card ai-insight-card';
-    habitsCard.innerHTML = `
-        <h3><i class="fas fa-calendar-check"></i> દૈનિક સફળતાની આદતો | Daily Success Habits</h3>
-        <div class="habits-list enhanced-habits">
-            ${insights.daily_habits.map(habitObj => `
-                <div class="habit-item">
-                    <div class="habit-header">
-                        <strong class="habit-name">${typeof habitObj === 'object' ? habitObj.habit : habitObj}</strong>
+    if (insights.daily_habits) {
+        const habitsCard = document.createElement('div');
+        habitsCard.className = 'result-card ai-insight-card';
+        habitsCard.innerHTML = `
+            <h3><i class="fas fa-calendar-check"></i> દૈનિક સફળતાની આદતો | Daily Success Habits</h3>
+            <div class="habits-list enhanced-habits">
+                ${insights.daily_habits.map(habitObj => `
+                    <div class="habit-item">
+                        <div class="habit-header">
+                            <strong class="habit-name">${typeof habitObj === 'object' ? habitObj.habit : habitObj}</strong>
+                        </div>
+                        ${typeof habitObj === 'object' ? `
+                            <p class="habit-purpose"><strong>હેતુ:</strong> ${habitObj.purpose}</p>
+                            <p class="habit-implementation"><strong>અમલીકરણ:</strong> ${habitObj.implementation}</p>
+                        ` : ''}
                     </div>
-                    ${typeof habitObj === 'object' ? `
-                        <p class="habit-purpose"><strong>હેતુ:</strong> ${habitObj.purpose}</p>
-                        <p class="habit-implementation"><strong>અમલીકરણ:</strong> ${habitObj.implementation}</p>
-                    ` : ''}
-                </div>
-            `).join('')}
-        </div>
-    `;
-    container.appendChild(habitsCard);
+                `).join('')}
+            </div>
+        `;
+        container.appendChild(habitsCard);
+    }
     
     // Enhanced Certifications
-    const certsCard = document.createElement('div');
-    certsCard.className = 'result-card ai-insight-card';
-    certsCard.innerHTML = `
-        <h3><i class="fas fa-certificate"></i> ભલામણ કરેલ પ્રમાણપત્રો | Recommended Certifications</h3>
-        <div class="certifications-list enhanced-certs">
-            ${insights.certifications.map(cert => `
-                <div class="cert-item enhanced-cert">
-                    <div class="cert-header">
-                        <h4 class="cert-name">${cert.name}</h4>
-                        <div class="cert-badges">
-                            <span class="provider-badge">${cert.provider}</span>
-                            <span class="level-badge ${cert.difficulty_level?.toLowerCase()}">${cert.difficulty_level}</span>
+    if (insights.certifications) {
+        const certsCard = document.createElement('div');
+        certsCard.className = 'result-card ai-insight-card';
+        certsCard.innerHTML = `
+            <h3><i class="fas fa-certificate"></i> ભલામણ કરેલ પ્રમાણપત્રો | Recommended Certifications</h3>
+            <div class="certifications-list enhanced-certs">
+                ${insights.certifications.map(cert => `
+                    <div class="cert-item enhanced-cert">
+                        <div class="cert-header">
+                            <h4 class="cert-name">${cert.name}</h4>
+                            <div class="cert-badges">
+                                <span class="provider-badge">${cert.provider}</span>
+                                <span class="level-badge ${cert.difficulty_level?.toLowerCase()}">${cert.difficulty_level}</span>
+                            </div>
                         </div>
+                        <p class="cert-recommendation">${cert.why_recommended}</p>
+                        <div class="cert-details">
+                            <span class="duration"><i class="fas fa-clock"></i> ${cert.estimated_duration}</span>
+                        </div>
+                        <a href="${cert.direct_enrollment_link}" target="_blank" class="btn-primary cert-link">
+                            <i class="fas fa-external-link-alt"></i> હવે નોંધણી કરો | Enroll Now
+                        </a>
                     </div>
-                    <p class="cert-recommendation">${cert.why_recommended}</p>
-                    <div class="cert-details">
-                        <span class="duration"><i class="fas fa-clock"></i> ${cert.estimated_duration}</span>
-                    </div>
-                    <a href="${cert.direct_enrollment_link}" target="_blank" class="btn-primary cert-link">
-                        <i class="fas fa-external-link-alt"></i> હવે નોંધણી કરો | Enroll Now
-                    </a>
-                </div>
-            `).join('')}
-        </div>
-    `;
-    container.appendChild(certsCard);
+                `).join('')}
+            </div>
+        `;
+        container.appendChild(certsCard);
+    }
     
     // Additional Insights
     if (insights.additional_insights) {
@@ -0,0 +1,224 @@
+"""
+Single-Flight Request Coalescing
+Concurrent callers asking for the same key share one execution of the expensive call
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; cross-process mode is disabled there
+    fcntl = None
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+def _fresh_error(error: BaseException) -> BaseException:
+    """Copy of the leader's exception for one follower, so threads never raise the same object"""
+    try:
+        # __init__ is skipped: subclasses often take different arguments than they store in args
+        fresh = type(error).__new__(type(error), *error.args)
+        fresh.__dict__.update(error.__dict__)
+    except Exception:
+        return error
+    return fresh
+
+
+class SingleFlight:
+    def __init__(self):
+        """Coalesce identical in-flight calls across the threads of one process"""
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn once for all concurrent callers with the same key
+
+        Returns:
+            (result, shared) where shared is True if this caller waited on another caller's execution
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.followers += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise _fresh_error(call.error) from call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    def stats(self) -> Dict[str, int]:
+        """Return coalescing counters for monitoring"""
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'leaders': self.leaders,
+                'followers': self.followers
+            }
+
+
+class FileLockSingleFlight(SingleFlight):
+    def __init__(self, directory: str, result_ttl: float = 60):
+        """
+        Coalesce identical calls across threads and across worker processes
+
+        The in-process leader takes an exclusive lock on <directory>/<key>.lock. A
+        leader in another worker that was blocked on the same lock reads the
+        result file written by the first one instead of calling fn again.
+
+        The lock file is removed by its holder once the result is written;
+        lockers check that the file they locked is still the one at the path.
+        Result files, and files left behind by crashed workers, are swept
+        once they are older than result_ttl.
+
+        Args:
+            directory: Directory shared by all workers for lock and result files
+            result_ttl: Seconds a result file may be reused by waiting workers
+        """
+        super().__init__()
+        if fcntl is None:
+            raise RuntimeError("Cross-process single-flight requires fcntl (POSIX only)")
+        self.directory = directory
+        self.result_ttl = result_ttl
+        self._swept_at = time.time()
+        os.makedirs(directory, exist_ok=True)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        (result, from_other_worker), shared = super().do(key, lambda: self._do_locked(key, fn))
+        return result, shared or from_other_worker
+
+    @staticmethod
+    def _lock_file(lock_path: str, blocking: bool = True):
+        """
+        Open and lock the file at lock_path, or return None if blocking is False and it is held
+
+        A holder may unlink the file before unlocking it, so the lock only
+        counts if the locked file is still the one at the path.
+        """
+        while True:
+            lock_file = open(lock_path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                lock_file.close()
+                return None
+            try:
+                opened, current = os.fstat(lock_file.fileno()), os.stat(lock_path)
+                if (opened.st_dev, opened.st_ino) == (current.st_dev, current.st_ino):
+                    return lock_file
+            except FileNotFoundError:
+                pass
+            lock_file.close()
+
+    def _do_locked(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (result, True) for a result stored by another worker, (fn(), False) otherwise"""
+        lock_path = os.path.join(self.directory, f"{key}.lock")
+        result_path = os.path.join(self.directory, f"{key}.json")
+        self._sweep_if_due()
+
+        lock_file = self._lock_file(lock_path)
+        try:
+            result = self._read_fresh_result(result_path)
+            if result is not None:
+                with self._lock:
+                    self.followers += 1
+                return result, True
+
+            result = fn()
+
+            temp_path = f"{result_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_path, result_path)
+            return result, False
+        finally:
+            # Workers blocked on this file see it is gone, lock a new one and read the result
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+            lock_file.close()
+
+    def _sweep_if_due(self):
+        now = time.time()
+        if now - self._swept_at < self.result_ttl:
+            return
+        self._swept_at = now
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if now - entry.stat().st_mtime <= self.result_ttl:
+                    continue
+                if entry.name.endswith('.lock'):
+                    # Only a lock nobody holds, e.g. left by a worker that was killed
+                    lock_file = self._lock_file(entry.path, blocking=False)
+                    if lock_file is not None:
+                        os.remove(entry.path)
+                        lock_file.close()
+                elif entry.name.endswith(('.json', '.tmp')):
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def _read_fresh_result(self, result_path: str) -> Any:
+        """Return the result another worker stored within result_ttl, removing stale files"""
+        try:
+            age = time.time() - os.path.getmtime(result_path)
+        except OSError:
+            return None
+
+        if age > self.result_ttl:
+            try:
+                os.remove(result_path)
+            except OSError:
+                pass
+            return None
+
+        try:
+            with open(result_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+
+def create_single_flight_from_env() -> SingleFlight:
+    """Use cross-process coalescing when INSIGHTS_SINGLEFLIGHT_DIR is set, in-process otherwise"""
+    directory = os.environ.get('INSIGHTS_SINGLEFLIGHT_DIR')
+    if directory and fcntl is not None:
+        return FileLockSingleFlight(directory, float(os.environ.get('INSIGHTS_SINGLEFLIGHT_TTL', 60)))
+    return SingleFlight()
@@ -0,0 +1,129 @@
+"""
+Startup Report
+Lazy imports, background initialization and a boot-time breakdown for regression tracking
+"""
+
+import importlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+
+class StartupReport:
+    def __init__(self):
+        """Timings measured from the moment this module is first imported"""
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.pid = os.getpid()
+        self.phases = OrderedDict()
+        self.imports = OrderedDict()
+        self.ready_seconds = None
+        self._last_mark = self.started
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Record how long the body takes under name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases[name] = round(time.perf_counter() - start, 4)
+
+    def mark(self, name: str):
+        """Record the time since the previous mark (or the start) under name"""
+        now = time.perf_counter()
+        with self._lock:
+            self.phases[name] = round(now - self._last_mark, 4)
+            self._last_mark = now
+
+    def record_import(self, name: str, seconds: float):
+        with self._lock:
+            self.imports[name] = round(seconds, 4)
+
+    def mark_ready(self):
+        """Record the time until the app can serve requests"""
+        self.ready_seconds = round(time.perf_counter() - self.started, 4)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'pid': self.pid,
+                'started_at': self.started_at,
+                'ready_seconds': self.ready_seconds,
+                'phases': dict(self.phases),
+                'lazy_imports': dict(self.imports)
+            }
+
+
+report = StartupReport()
+
+
+def lazy_import(name: str):
+    """Import a module on first use, recording how long the first import took"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    report.record_import(name, time.perf_counter() - start)
+    return module
+
+
+class BackgroundInit:
+    PENDING = 'pending'
+    READY = 'ready'
+    FAILED = 'failed'
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        """
+        Build a value on a background thread so startup does not wait for it
+
+        The thread is started in the process that calls start() or get(), so a
+        value started before a fork is built again in the child.
+        """
+        self.name = name
+        self.factory = factory
+        self.value = None
+        self.error = None
+        self._done = threading.Event()
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self) -> 'BackgroundInit':
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self.value = None
+                self.error = None
+                self._done = threading.Event()
+                threading.Thread(target=self._run, args=(self._done,), name=f"init-{self.name}", daemon=True).start()
+        return self
+
+    def _run(self, done: threading.Event):
+        with report.phase(self.name):
+            try:
+                self.value = self.factory()
+            except Exception as e:
+                self.error = e
+                print(f"Warning: {self.name} failed to initialize: {e}")
+            finally:
+                done.set()
+
+    def get(self, timeout: float = None) -> Any:
+        """Return the value, waiting up to timeout seconds; None if it failed or is not ready"""
+        self.start()
+        self._done.wait(timeout)
+        return self.value
+
+    @property
+    def state(self) -> str:
+        if not self._done.is_set():
+            return self.PENDING
+        return self.FAILED if self.error is not None else self.READY
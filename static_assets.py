@@ -0,0 +1,336 @@
+"""
+Static Asset Pipeline
+Minified, fingerprinted and precompressed copies of the front-end files, held in memory
+"""
+
+import gzip
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+try:
+    import brotli
+except ImportError:  # Optional; only gzip variants are built without it
+    brotli = None
+
+# Files referenced by the entry page, built in this order
+STATIC_ASSETS = ('styles.css', 'test-data.js', 'script.js')
+
+# Entry page of the front end
+ENTRY_PAGE = 'index.html'
+
+# Every file that may be served from the app directory; it also holds the job database,
+# the insights log and .env, so nothing outside this list is ever sent
+PUBLIC_FILES = frozenset(STATIC_ASSETS + (ENTRY_PAGE,))
+
+CONTENT_TYPES = {
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'application/javascript; charset=utf-8',
+    '.html': 'text/html; charset=utf-8'
+}
+
+# A '/' after one of these characters or keywords starts a regular expression literal rather than a division
+_REGEX_PREFIX = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'delete', 'throw', 'new',
+                   'instanceof', 'yield', 'await'}
+
+
+def _is_word(char: str) -> bool:
+    return char.isalnum() or char in '_$\\' or ord(char) > 127
+
+
+def _string_end(source: str, start: int, quote: str) -> int:
+    i = start + 1
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+        elif char == quote:
+            return i + 1
+        elif char == '\n':
+            return i
+        else:
+            i += 1
+    return len(source)
+
+
+def _regex_end(source: str, start: int) -> int:
+    i, in_class = start + 1, False
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            return i + 1
+        elif char == '\n':
+            return i
+        i += 1
+    return len(source)
+
+
+def _template_end(source: str, start: int):
+    """Scan template literal text from start; returns (end, closed) where closed is False at a '${'"""
+    i = start
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+        elif char == '`':
+            return i + 1, True
+        elif source.startswith('${', i):
+            return i + 2, False
+        else:
+            i += 1
+    return len(source), True
+
+
+def _needs_space(before: str, after: str) -> bool:
+    if _is_word(before) and _is_word(after):
+        return True
+    if before in '+-' and after in '+-':
+        return True
+    if before == '/' and after in '/*':
+        return True
+    return before.isdigit() and after == '.'
+
+
+def minify_js(source: str) -> str:
+    """
+    Remove comments and redundant whitespace from JavaScript
+
+    Strings, template literals and regular expressions are copied unchanged.
+    Line breaks are kept wherever automatic semicolon insertion could depend
+    on them, so the result behaves exactly like the source.
+    """
+    out = []
+    braces = []  # One entry per open '{': True if it opened a template substitution
+    space = newline = False
+    last = ''    # Last character written
+    word = ''    # Last token written, if it was an identifier or keyword
+    i, n = 0, len(source)
+
+    def write(text: str):
+        nonlocal space, newline, last
+        if out and (space or newline):
+            if newline and last not in '{[(,;' and text[0] not in '}]),;':
+                out.append('\n')
+            elif _needs_space(last, text[0]):
+                out.append(' ')
+        out.append(text)
+        last = text[-1]
+        space = newline = False
+
+    while i < n:
+        char = source[i]
+        if char.isspace() or char == '\ufeff':
+            if char in '\n\r\u2028\u2029':
+                newline = True
+            else:
+                space = True
+            i += 1
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end < 0 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end < 0 else end + 2
+            if '\n' in source[i:end]:
+                newline = True
+            else:
+                space = True
+            i = end
+        elif char in '"\'':
+            end = _string_end(source, i, char)
+            write(source[i:end])
+            word, i = '', end
+        elif char == '`' or (char == '}' and braces and braces[-1]):
+            if char == '}':
+                braces.pop()
+            end, closed = _template_end(source, i + 1)
+            write(source[i:end])
+            if not closed:
+                braces.append(True)
+            word, i = '', end
+        elif char == '/' and (not last or last in _REGEX_PREFIX or word in _REGEX_KEYWORDS):
+            end = _regex_end(source, i)
+            write(source[i:end])
+            word, i = '', end
+        elif _is_word(char):
+            end = i
+            while end < n and _is_word(source[end]):
+                end += 1
+            word = source[i:end]
+            write(word)
+            i = end
+        else:
+            if char == '{':
+                braces.append(False)
+            elif char == '}' and braces:
+                braces.pop()
+            write(char)
+            word = ''
+            i += 1
+    return ''.join(out) + '\n'
+
+
+def minify_css(source: str) -> str:
+    """Remove comments and redundant whitespace from CSS, leaving strings and selectors intact"""
+    out = []
+    space = False
+    i, n = 0, len(source)
+
+    def write(text: str):
+        nonlocal space
+        if out and space and out[-1][-1] not in '{};,>:' and text[0] not in '{};,>':
+            out.append(' ')
+        if text == '}' and out and out[-1] == ';':
+            out.pop()
+        out.append(text)
+        space = False
+
+    while i < n:
+        char = source[i]
+        if char in '"\'':
+            end = _string_end(source, i, char)
+            write(source[i:end])
+            i = end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end < 0 else end + 2
+            space = True
+        elif char.isspace():
+            space = True
+            i += 1
+        else:
+            write(char)
+            i += 1
+    return ''.join(out) + '\n'
+
+
+MINIFIERS = {
+    '.css': minify_css,
+    '.js': minify_js
+}
+
+
+class StaticAsset:
+    __slots__ = ('name', 'content_type', 'etag', 'immutable', 'encodings')
+
+    def __init__(self, name: str, content_type: str, body: bytes, immutable: bool,
+                 gzip_level: int = 9, brotli_quality: int = 11):
+        """
+        One file with its precompressed variants
+
+        Args:
+            name: URL path the asset is served under
+            content_type: Content-Type header value
+            body: Uncompressed bytes
+            immutable: True for fingerprinted names, whose content never changes
+        """
+        self.name = name
+        self.content_type = content_type
+        self.immutable = immutable
+        self.etag = hashlib.sha256(body).hexdigest()[:20]
+
+        # Preferred encoding first; a variant is only kept if it is smaller
+        self.encodings = OrderedDict()
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=brotli_quality)
+            if len(compressed) < len(body):
+                self.encodings['br'] = compressed
+        compressed = gzip.compress(body, compresslevel=gzip_level, mtime=0)
+        if len(compressed) < len(body):
+            self.encodings['gzip'] = compressed
+        self.encodings['identity'] = body
+
+    def entity_tag(self, encoding: str) -> str:
+        """Strong ETag of one representation; each encoding has its own"""
+        return self.etag if encoding == 'identity' else f"{self.etag}-{encoding}"
+
+    def stats(self) -> Dict[str, int]:
+        return {encoding: len(body) for encoding, body in self.encodings.items()}
+
+
+def fingerprinted_name(name: str, body: bytes) -> str:
+    """'script.js' -> 'script.<hash>.js'"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(body).hexdigest()[:10]}{ext}"
+
+
+class AssetPipeline:
+    def __init__(self, root: str = '.', assets: Iterable[str] = STATIC_ASSETS, entry: str = ENTRY_PAGE,
+                 minify: bool = True, gzip_level: int = 9, brotli_quality: int = 11):
+        """
+        Build every asset once so requests are answered from memory
+
+        Args:
+            root: Directory holding the front-end files
+            assets: Files referenced by the entry page
+            entry: HTML page whose references are rewritten to fingerprinted names
+            minify: Minify CSS and JavaScript before fingerprinting
+            gzip_level: gzip compression level
+            brotli_quality: Brotli quality, used when the brotli package is installed
+        """
+        self.root = root
+        self.entry = entry
+        self.minify = minify
+        self._compression = {'gzip_level': gzip_level, 'brotli_quality': brotli_quality}
+        self.assets = {}
+        self.fingerprints = OrderedDict()
+        self.source_bytes = 0
+
+        for name in assets:
+            self._add_asset(name)
+        self._add_entry()
+
+    def _read(self, name: str) -> bytes:
+        with open(os.path.join(self.root, name), 'rb') as f:
+            data = f.read()
+        self.source_bytes += len(data)
+        return data
+
+    def _add_asset(self, name: str):
+        ext = os.path.splitext(name)[1]
+        body = self._read(name)
+        minifier = MINIFIERS.get(ext) if self.minify else None
+        if minifier is not None:
+            body = minifier(body.decode('utf-8')).encode('utf-8')
+        fingerprinted = fingerprinted_name(name, body)
+        content_type = CONTENT_TYPES.get(ext, 'application/octet-stream')
+        self.fingerprints[name] = fingerprinted
+        self.assets[fingerprinted] = StaticAsset(fingerprinted, content_type, body, True, **self._compression)
+        # The plain name stays available for pages cached before a deploy, but must be revalidated
+        self.assets[name] = StaticAsset(name, content_type, body, False, **self._compression)
+
+    def _add_entry(self):
+        html = self._read(self.entry).decode('utf-8')
+        for name, fingerprinted in self.fingerprints.items():
+            html = re.sub(rf'''((?:src|href)=["']){re.escape(name)}(["'])''', rf'\g<1>{fingerprinted}\g<2>', html)
+        self.assets[self.entry] = StaticAsset(self.entry, CONTENT_TYPES['.html'], html.encode('utf-8'), False,
+                                              **self._compression)
+
+    def get(self, name: str) -> Optional[StaticAsset]:
+        return self.assets.get(name)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return built assets and their sizes per encoding for monitoring"""
+        return {
+            'fingerprints': dict(self.fingerprints),
+            'source_bytes': self.source_bytes,
+            'brotli': brotli is not None,
+            'sizes': {name: self.assets[name].stats() for name in list(self.fingerprints.values()) + [self.entry]}
+        }
+
+
+def create_asset_pipeline_from_env(root: str = '.') -> Optional[AssetPipeline]:
+    """Build a pipeline unless STATIC_ASSET_PIPELINE is 0; STATIC_MINIFY=0 keeps the sources unminified"""
+    if os.environ.get('STATIC_ASSET_PIPELINE', '1') == '0':
+        return None
+    return AssetPipeline(root=root, minify=os.environ.get('STATIC_MINIFY', '1') != '0')
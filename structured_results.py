@@ -0,0 +1,74 @@
+"""
+Structured Results
+Conversion of the questionnaire's raw answers into the structure sent to the model, and its cache key
+
+Shared by the web app and the offline tools, so importing it has no side effects.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict
+
+
+def convert_to_structured_format(test_results: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert raw test results to structured format for AI analysis"""
+    
+    # Map test screens to structured categories
+    structured = {}
+    
+    # MBTI Test
+    if 'mbtiScreen' in test_results:
+        structured['mbti_test'] = {
+            'selected_option': test_results['mbtiScreen'],
+            'test_type': 'Myers-Briggs Type Indicator'
+        }
+    
+    # Multiple Intelligence Test
+    if 'intelligenceScreen' in test_results:
+        structured['multiple_intelligence'] = {
+            'selected_option': test_results['intelligenceScreen'],
+            'test_type': 'Multiple Intelligence Assessment'
+        }
+    
+    # Big Five Test
+    if 'bigFiveScreen' in test_results:
+        structured['big_five'] = {
+            'selected_option': test_results['bigFiveScreen'],
+            'test_type': 'Big Five Personality Assessment'
+        }
+    
+    # RIASEC Test
+    if 'riasecScreen' in test_results:
+        structured['riasec'] = {
+            'selected_option': test_results['riasecScreen'],
+            'test_type': 'RIASEC Career Interest Inventory'
+        }
+    
+    # Decision Making Test
+    if 'decisionScreen' in test_results:
+        structured['decision_making'] = {
+            'selected_option': test_results['decisionScreen'],
+            'test_type': 'Decision Making Style Assessment'
+        }
+    
+    # Life Situation Assessment
+    if 'lifeScreen' in test_results:
+        structured['life_situation'] = {
+            'selected_option': test_results['lifeScreen'],
+            'test_type': 'Life Situation Assessment'
+        }
+    
+    # VARK Learning Style
+    if 'varkScreen' in test_results:
+        structured['learning_style'] = {
+            'selected_option': test_results['varkScreen'],
+            'test_type': 'VARK Learning Style Assessment'
+        }
+    
+    return structured
+
+
+def canonical_key(structured_results: Dict[str, Any]) -> str:
+    """Return a stable hash for the output of convert_to_structured_format"""
+    canonical = json.dumps(structured_results, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected
+
+INTERACTIVE = AdmissionController.INTERACTIVE
+BATCH = AdmissionController.BATCH
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def start_waiter(controller, client_id, lane, results):
+    thread = threading.Thread(target=lambda: results.append((lane, controller.acquire(client_id, lane))))
+    thread.start()
+    return thread
+
+
+def test_burst_is_admitted_without_waiting():
+    controller = AdmissionController(rate_per_minute=60, burst=3)
+    for _ in range(3):
+        assert controller.acquire('a') < 0.05
+    stats = controller.stats()
+    assert stats['admitted'][INTERACTIVE] == 3
+    assert stats['tokens'] < 1
+
+
+def test_rejects_when_estimated_wait_exceeds_max_wait():
+    controller = AdmissionController(rate_per_minute=60, burst=1)
+    controller.acquire('a')
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.acquire('a', max_wait=0.1)
+    assert excinfo.value.retry_after == pytest.approx(1, abs=0.1)
+    assert controller.stats()['rejected'][INTERACTIVE] == 1
+
+
+def test_rejects_when_lane_queue_is_full():
+    controller = AdmissionController(max_queue={INTERACTIVE: 0, BATCH: 1})
+    with pytest.raises(AdmissionRejected, match='queue is full'):
+        controller.acquire('a', INTERACTIVE)
+    controller.acquire('a', BATCH)
+
+
+def test_charge_takes_tokens_down_to_one_burst_of_debt():
+    controller = AdmissionController(rate_per_minute=60, burst=2)
+    controller.charge(10)
+    stats = controller.stats()
+    assert stats['tokens'] == pytest.approx(-2, abs=0.1)
+    assert stats['charged'] == 10
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.acquire('a', max_wait=1)
+    assert excinfo.value.retry_after == pytest.approx(3, abs=0.1)
+
+
+def test_per_client_limit_is_kept_per_lane():
+    controller = AdmissionController(rate_per_minute=600, burst=1,
+                                     max_per_client={INTERACTIVE: 1, BATCH: 1})
+    controller.charge(3)
+    results = []
+    threads = [start_waiter(controller, 'a', BATCH, results)]
+    wait_until(lambda: controller.stats()['queued'][BATCH] == 1)
+
+    with pytest.raises(AdmissionRejected, match='Too many waiting'):
+        controller.acquire('a', BATCH)
+    # A waiting batch request does not use up the client's interactive allowance
+    threads.append(start_waiter(controller, 'a', INTERACTIVE, results))
+    wait_until(lambda: controller.stats()['queued'][INTERACTIVE] == 1)
+    with pytest.raises(AdmissionRejected, match='Too many waiting'):
+        controller.acquire('a', INTERACTIVE)
+
+    for thread in threads:
+        thread.join(5)
+    assert sorted(lane for lane, _ in results) == [BATCH, INTERACTIVE]
+
+
+def test_interactive_lane_is_served_before_batch():
+    controller = AdmissionController(rate_per_minute=600, burst=1)
+    controller.charge(2)
+    results = []
+    threads = [start_waiter(controller, 'batch-client', BATCH, results)]
+    wait_until(lambda: controller.stats()['queued'][BATCH] == 1)
+    threads.append(start_waiter(controller, 'web-client', INTERACTIVE, results))
+    wait_until(lambda: controller.stats()['queued'][INTERACTIVE] == 1)
+
+    for thread in threads:
+        thread.join(5)
+    assert [lane for lane, _ in results] == [INTERACTIVE, BATCH]
@@ -0,0 +1,127 @@
+import importlib
+import json
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController
+from insights_cache import InsightsCache
+from retry_policy import InsightsGenerationError
+from structured_results import canonical_key, convert_to_structured_format
+
+
+@pytest.fixture(scope='module')
+def web(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('web')
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv('RENDER_WORKERS', '0')
+        patch.setenv('INSIGHTS_JOBS_DB', str(directory / 'jobs.sqlite3'))
+        patch.setenv('INSIGHTS_LOG_PATH', str(directory / 'insights_log.jsonl'))
+        patch.setenv('INSIGHTS_STORE_PATH', str(directory / 'precomputed_insights.jsonl'))
+        patch.setenv('RENDER_CACHE_DIR', str(directory / 'renders'))
+        patch.chdir(directory)
+        return importlib.import_module('web_integration')
+
+
+class FakeGeneration:
+    """Stands in for run_generation, recording calls and the largest number running at once"""
+
+    def __init__(self, fail_for=(), delay=0.0):
+        self.fail_for = set(fail_for)
+        self.delay = delay
+        self.calls = []
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, structured_results, cache_key, client_id, lane):
+        with self._lock:
+            self.calls.append((structured_results['mbti_test']['selected_option'], lane))
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(self.delay)
+            if structured_results['mbti_test']['selected_option'] in self.fail_for:
+                raise InsightsGenerationError('upstream down', retry_after=2.5)
+            return {'best_field': {'field': structured_results['mbti_test']['selected_option']}}, False
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+@pytest.fixture
+def client(web, monkeypatch):
+    monkeypatch.setattr(web, 'insights_cache', InsightsCache())
+    monkeypatch.setattr(web, 'precomputed_insights', {})
+    monkeypatch.setattr(web, 'get_ai_generator', lambda: object())
+    return web.app.test_client()
+
+
+def profile(mbti):
+    return {'mbtiScreen': mbti, 'varkScreen': 'Visual'}
+
+
+def post_batch(client, records):
+    response = client.post('/api/generate-insights/batch', json={'records': records})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    return lines[:-1], lines[-1]
+
+
+def test_every_record_gets_one_line_and_the_summary_adds_up(web, client, monkeypatch):
+    generation = FakeGeneration(fail_for={'ENFP'})
+    monkeypatch.setattr(web, 'run_generation', generation)
+    cached_key = canonical_key(convert_to_structured_format(profile('ISTJ')))
+    web.insights_cache.set(cached_key, {'best_field': {'field': 'cached'}})
+
+    records = [
+        {'id': 'a', 'testResults': profile('INTJ')},
+        {'id': 'b', 'testResults': profile('INTJ')},
+        {'id': 'c', 'testResults': profile('ENFP')},
+        {'id': 'd'},
+        {'id': 'e', 'testResults': profile('ISTJ')},
+    ]
+    lines, summary = post_batch(client, records)
+
+    by_index = {line['index']: line for line in lines}
+    assert sorted(by_index) == [0, 1, 2, 3, 4]
+    assert [by_index[i]['id'] for i in (0, 1, 2, 4)] == ['a', 'b', 'c', 'e']
+    assert by_index[0]['insights'] == by_index[1]['insights'] == {'best_field': {'field': 'INTJ'}}
+    assert by_index[2]['success'] is False and by_index[2]['retry_after'] == 3
+    assert by_index[3] == {'index': 3, 'id': None, 'success': False, 'error': 'testResults required.'}
+    assert by_index[4]['cached'] is True and by_index[4]['insights'] == {'best_field': {'field': 'cached'}}
+
+    assert summary == {'done': True, 'total': 5, 'unique_profiles': 3, 'succeeded': 3, 'failed': 2, 'cached': 1}
+    # Identical profiles are generated once, on the batch lane; cached ones not at all
+    assert sorted(generation.calls) == [('ENFP', AdmissionController.BATCH), ('INTJ', AdmissionController.BATCH)]
+
+
+def test_generations_are_bounded_by_the_window(web, client, monkeypatch):
+    generation = FakeGeneration(delay=0.05)
+    monkeypatch.setattr(web, 'run_generation', generation)
+    monkeypatch.setattr(web, 'INSIGHTS_BATCH_CONCURRENCY', 2)
+
+    records = [{'id': str(i), 'testResults': profile(f"TYPE{i}")} for i in range(7)]
+    lines, summary = post_batch(client, records)
+
+    assert len(lines) == 7 and summary['succeeded'] == 7
+    assert len(generation.calls) == 7
+    assert generation.peak == 2
+
+
+def test_all_pending_records_fail_without_a_generator(web, client, monkeypatch):
+    monkeypatch.setattr(web, 'get_ai_generator', lambda: None)
+    lines, summary = post_batch(client, [{'id': 'a', 'testResults': profile('INTJ')},
+                                         {'id': 'b', 'testResults': profile('INTJ')}])
+    assert [line['success'] for line in lines] == [False, False]
+    assert summary['failed'] == 2 and summary['succeeded'] == 0
+
+
+def test_invalid_and_oversized_batches_are_rejected(web, client, monkeypatch):
+    assert client.post('/api/generate-insights/batch', json={'records': []}).status_code == 400
+    assert client.post('/api/generate-insights/batch', json=['not', 'an', 'object']).status_code == 400
+    monkeypatch.setattr(web, 'INSIGHTS_BATCH_MAX_RECORDS', 2)
+    records = [{'testResults': profile('INTJ')}] * 3
+    assert client.post('/api/generate-insights/batch', json={'records': records}).status_code == 413
@@ -0,0 +1,93 @@
+import pytest
+
+import insights_cache
+from insights_cache import InsightsCache
+from insights_codec import CompactInsights, train_codec
+from structured_results import canonical_key, convert_to_structured_format
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(insights_cache.time, 'monotonic', clock)
+    return clock
+
+
+def test_get_returns_stored_insights():
+    cache = InsightsCache()
+    assert cache.get('a') is None
+    cache.set('a', {'summary': 'x'})
+    assert cache.get('a') == {'summary': 'x'}
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+    assert stats['hit_rate'] == 0.5
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = InsightsCache(ttl_seconds=60)
+    cache.set('a', {'summary': 'x'})
+    clock.now += 59
+    assert cache.get('a') == {'summary': 'x'}
+    clock.now += 2
+    assert cache.get('a') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_storing_again_restarts_ttl(clock):
+    cache = InsightsCache(ttl_seconds=60)
+    cache.set('a', {'v': 1})
+    clock.now += 50
+    cache.set('a', {'v': 2})
+    clock.now += 50
+    assert cache.get('a') == {'v': 2}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = InsightsCache(max_entries=2)
+    cache.set('a', {'v': 'a'})
+    cache.set('b', {'v': 'b'})
+    cache.get('a')
+    cache.set('c', {'v': 'c'})
+
+    assert cache.get('b') is None
+    assert cache.get('a') == {'v': 'a'}
+    assert cache.get('c') == {'v': 'c'}
+    assert cache.stats()['evictions'] == 1
+
+
+def test_clear_keeps_counters():
+    cache = InsightsCache()
+    cache.set('a', {'v': 1})
+    cache.get('a')
+    cache.clear()
+    assert cache.get('a') is None
+    assert (cache.stats()['hits'], cache.stats()['entries']) == (1, 0)
+
+
+def test_codec_stores_compact_documents():
+    document = {'summary': {'text': 'Analytical'}, 'careers': [{'title': 'Analyst'}]}
+    cache = InsightsCache(codec=train_codec([document, document]))
+    cache.set('a', document)
+
+    stored = cache.get('a')
+    assert isinstance(stored, CompactInsights)
+    assert stored.to_dict() == document
+    assert cache.stats()['compact_bytes'] == stored.nbytes
+
+
+def test_key_ignores_answer_order_but_not_answers():
+    results = {'mbtiScreen': 'INTJ', 'riasecScreen': 'Investigative', 'varkScreen': 'Visual'}
+    reordered = dict(reversed(list(results.items())))
+    changed = dict(results, varkScreen='Auditory')
+
+    key = canonical_key(convert_to_structured_format(results))
+    assert key == canonical_key(convert_to_structured_format(reordered))
+    assert key != canonical_key(convert_to_structured_format(changed))
@@ -0,0 +1,89 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from insights_codec import CompactInsights, decode_insights, load_codec, train_codec
+
+
+def sample(name, score):
+    return {
+        'summary': {'text': f"{name} is suited to analytical work", 'score': score},
+        'careers': [
+            {'title': 'Data Analyst', 'link': 'https://example.com/careers/data-analyst', 'salary': None},
+            {'title': 'ગુજરાતી શિક્ષક', 'link': 'https://example.com/careers/teacher', 'remote': True},
+        ],
+        'next_steps': ['Take an online course', 'Talk to a counsellor', name],
+    }
+
+
+SAMPLES = [sample('Asha', 4), sample('Ravi', 5), sample('Meera', 3.5)]
+
+
+def test_round_trip():
+    codec = train_codec(SAMPLES)
+    document = sample('Kiran', 2)
+    compact = codec.encode(document)
+
+    assert isinstance(compact, CompactInsights)
+    assert list(compact) == list(document)
+    assert compact['careers'] == document['careers']
+    assert compact.to_dict() == document
+    assert decode_insights(compact) == document
+    assert compact.nbytes < len(json.dumps(document, ensure_ascii=False).encode('utf-8'))
+
+
+def test_shared_strings_are_interned():
+    codec = train_codec(SAMPLES)
+    assert 'https://example.com/careers/data-analyst' in codec.strings
+    # Seen in one sample only
+    assert 'Asha' not in codec.strings
+
+
+def test_encode_returns_own_compact_documents_unchanged():
+    codec = train_codec(SAMPLES)
+    compact = codec.encode(SAMPLES[0])
+    assert codec.encode(compact) is compact
+    assert train_codec(SAMPLES).encode(compact).to_dict() == SAMPLES[0]
+
+
+def test_save_and_load(tmp_path):
+    codec = train_codec(SAMPLES)
+    path = str(tmp_path / 'codec.json')
+    codec.save(path)
+
+    loaded = load_codec(path)
+    assert loaded.fingerprint == codec.fingerprint
+    assert loaded.decode_section(codec.encode_section(SAMPLES[1]['careers'])) == SAMPLES[1]['careers']
+    assert os.listdir(tmp_path) == ['codec.json']
+
+
+def test_load_rejects_tampered_file(tmp_path):
+    path = tmp_path / 'codec.json'
+    train_codec(SAMPLES).save(str(path))
+    payload = json.loads(path.read_text(encoding='utf-8'))
+    payload['strings'].append('extra')
+    path.write_text(json.dumps(payload), encoding='utf-8')
+
+    with pytest.raises(ValueError):
+        load_codec(str(path))
+    with pytest.raises(FileNotFoundError):
+        load_codec(str(tmp_path / 'missing.json'))
+
+
+def test_training_is_deterministic_across_processes():
+    script = (
+        "import json, sys\n"
+        "from insights_codec import train_codec\n"
+        "print(train_codec(json.loads(sys.stdin.read())).fingerprint)\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    fingerprints = set()
+    for seed in ('1', '2'):
+        env = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=root)
+        result = subprocess.run([sys.executable, '-c', script], input=json.dumps(SAMPLES),
+                                capture_output=True, text=True, env=env, check=True)
+        fingerprints.add(result.stdout.strip())
+    assert fingerprints == {train_codec(SAMPLES).fingerprint}
@@ -0,0 +1,162 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from insights_jobs import JobQueue, JobStore, QueueFullError, job_payload
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / 'jobs.sqlite3'))
+
+
+@pytest.fixture
+def webhook_server():
+    """Local server recording POSTs; /redirect answers 307 to /internal"""
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            received.append((self.path, json.loads(body)))
+            if self.path == '/redirect':
+                self.send_response(307)
+                self.send_header('Location', '/internal')
+            else:
+                self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.received = received
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    yield server
+    server.shutdown()
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def test_create_or_join_shares_active_job(store):
+    job_id, existing = store.create_or_join('k')
+    assert existing is False
+    assert store.create_or_join('k') == (job_id, True)
+
+    store.update(job_id, JobStore.DONE, result={'v': 1})
+    new_id, existing = store.create_or_join('k')
+    assert new_id != job_id and existing is False
+
+
+def test_create_or_join_from_concurrent_threads_creates_one_job(store):
+    barrier = threading.Barrier(8)
+    outcomes = []
+
+    def submit():
+        barrier.wait()
+        outcomes.append(store.create_or_join('k'))
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert len({job_id for job_id, _ in outcomes}) == 1
+    assert sorted(existing for _, existing in outcomes) == [False] + [True] * 7
+
+
+def test_jobs_with_webhooks_are_never_shared(store):
+    first, _ = store.create_or_join('k', 'http://hooks.example/a')
+    second, existing = store.create_or_join('k', 'http://hooks.example/b')
+    assert first != second and existing is False
+    assert store.create_or_join('k')[1] is False
+
+
+def test_job_of_exited_worker_is_failed(store):
+    job_id, _ = store.create_or_join('k')
+    with store._connect() as conn:
+        conn.execute('UPDATE jobs SET pid = ? WHERE id = ?', (2 ** 22 + 12345, job_id))
+
+    new_id, existing = store.create_or_join('k')
+    assert new_id != job_id and existing is False
+    job = store.get(job_id)
+    assert job['status'] == JobStore.FAILED
+    assert 'exited' in job['error']
+
+
+def test_get_wait_and_purge(store):
+    job_id, _ = store.create_or_join('k')
+    assert store.wait(job_id, timeout=0.05, interval=0.01)['status'] == JobStore.QUEUED
+    store.update(job_id, JobStore.DONE, result={'v': 1})
+
+    job = store.wait(job_id, timeout=5)
+    assert job_payload(job)['insights'] == {'v': 1}
+    assert store.purge(older_than=3600) == 0
+    assert store.purge(older_than=-1) == 1
+    assert store.get(job_id) is None
+
+
+def test_queue_runs_jobs_and_records_failures(store):
+    queue = JobQueue(store, max_workers=2)
+    done_id, existing = queue.submit('ok', lambda: {'v': 1})
+    failed_id, _ = queue.submit('bad', lambda: (_ for _ in ()).throw(RuntimeError('upstream down')))
+    assert existing is False
+
+    assert store.wait(done_id, timeout=5)['result'] == {'v': 1}
+    failed = job_payload(store.wait(failed_id, timeout=5))
+    assert failed['status'] == JobStore.FAILED and failed['error'] == 'upstream down'
+    wait_for(lambda: queue.stats()['pending'] == 0)
+    assert (queue.stats()['completed'], queue.stats()['failed']) == (1, 1)
+
+
+def test_queue_joins_identical_submits_and_bounds_pending(store):
+    release = threading.Event()
+    queue = JobQueue(store, max_workers=1, max_pending=2)
+    job_id, _ = queue.submit('k', release.wait)
+    assert queue.submit('k', release.wait) == (job_id, True)
+    queue.submit('other', release.wait)
+
+    with pytest.raises(QueueFullError):
+        queue.submit('third', release.wait)
+    assert queue.stats()['rejected'] == 1
+    release.set()
+    wait_for(lambda: queue.stats()['pending'] == 0)
+
+
+def test_webhook_hosts_are_allowlisted(store):
+    queue = JobQueue(store, webhook_hosts={'hooks.example'})
+    assert queue.webhook_allowed('https://hooks.example/done')
+    assert not queue.webhook_allowed('http://other.example/done')
+    assert not queue.webhook_allowed('file:///etc/passwd')
+    with pytest.raises(ValueError):
+        queue.submit('k', lambda: {}, webhook_url='http://169.254.169.254/latest')
+
+
+def test_webhook_receives_finished_job(store, webhook_server):
+    queue = JobQueue(store, webhook_hosts={'127.0.0.1'})
+    job_id, _ = queue.submit('k', lambda: {'v': 1}, webhook_url=f"{webhook_server.url}/done")
+
+    wait_for(lambda: webhook_server.received)
+    path, payload = webhook_server.received[0]
+    assert path == '/done'
+    assert payload['job_id'] == job_id and payload['insights'] == {'v': 1}
+    assert queue.stats()['webhook_failures'] == 0
+
+
+def test_webhook_redirects_are_not_followed(store, webhook_server):
+    queue = JobQueue(store, webhook_hosts={'127.0.0.1'})
+    queue.submit('k', lambda: {'v': 1}, webhook_url=f"{webhook_server.url}/redirect")
+
+    wait_for(lambda: queue.stats()['webhook_failures'] == 1)
+    assert [path for path, _ in webhook_server.received] == ['/redirect']
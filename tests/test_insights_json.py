@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from insights_json import SectionStreamParser, repair_json, salvage_sections, strip_code_fence
+
+DOCUMENT = {
+    'summary': {'text': 'Braces { and } and "quotes" inside strings', 'score': 3},
+    'careers': [{'name': 'Engineer'}, {'name': 'Designer'}],
+    'note': 'done'
+}
+
+
+def feed_in_chunks(parser, text, size):
+    completed = []
+    for start in range(0, len(text), size):
+        completed.extend(parser.feed(text[start:start + size]))
+    return completed
+
+
+@pytest.mark.parametrize('size', [1, 7, 1000])
+def test_stream_parser_reports_each_section(size):
+    text = '```json\n' + json.dumps(DOCUMENT, indent=2) + '\n```'
+    parser = SectionStreamParser()
+    assert feed_in_chunks(parser, text, size) == list(DOCUMENT.items())
+    assert parser.complete
+
+
+def test_stream_parser_reports_a_section_once_its_value_is_complete():
+    parser = SectionStreamParser()
+    assert parser.feed('{"a": [1, 2') == []
+    assert parser.feed('], "b": "x\\"') == [('a', [1, 2])]
+    assert parser.feed('y"}') == [('b', 'x"y')]
+    assert parser.feed(', "c": 1}') == []
+
+
+def test_stream_parser_raises_on_invalid_value():
+    parser = SectionStreamParser()
+    with pytest.raises(json.JSONDecodeError):
+        parser.feed('{"a": nope, "b": 1}')
+
+
+def test_lenient_stream_parser_skips_invalid_values():
+    parser = SectionStreamParser(lenient=True)
+    assert parser.feed('{"a": nope, "b": 1}') == [('b', 1)]
+    assert parser.invalid_keys == ['a']
+
+
+def test_strip_code_fence():
+    assert strip_code_fence('```json\n{"a": 1}\n```') == '{"a": 1}'
+    assert strip_code_fence('```\n{}\n```') == '{}'
+    assert strip_code_fence('  {"a": 1} ') == '{"a": 1}'
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('{"a": [1, 2,], "b": {"c": 1,},}', {'a': [1, 2], 'b': {'c': 1}}),
+    ('{"a": 1}]}', {'a': 1}),
+    ('{"a": [1, 2, 3', {'a': [1, 2]}),
+    ('{"a": {"b": "unterminated', {}),
+    ('```json\n{"a": 1, "b": [true, false\n```', {'a': 1, 'b': [True]}),
+    ('Here you go: {"a": "x, y"} trailing text', {'a': 'x, y'}),
+])
+def test_repair_json(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+def test_repair_json_without_object():
+    assert repair_json('no json here') == ''
+
+
+def test_salvage_sections_drops_cut_and_missing_sections():
+    text = '{"summary": {"text": "ok"}, "careers": [{"name": "A"}, {"name": "B"'
+    sections, missing = salvage_sections(text, {'summary': dict, 'careers': list, 'note': str})
+    assert sections == {'summary': {'text': 'ok'}, 'careers': [{'name': 'A'}]}
+    assert missing == ['note']
+
+
+def test_salvage_sections_removes_cut_object_section():
+    text = '{"summary": {"text": "ok"}, "details": {"a": 1, "b": '
+    sections, missing = salvage_sections(text, {'summary': dict, 'details': dict})
+    assert sections == {'summary': {'text': 'ok'}}
+    assert missing == ['details']
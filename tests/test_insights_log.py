@@ -0,0 +1,106 @@
+import fcntl
+import json
+import os
+import time
+
+from insights_log import InsightsLog
+
+
+def read_records(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def log_one(log, record):
+    assert log.log(record)
+    assert log.flush(5)
+
+
+def test_records_are_appended_with_a_timestamp(tmp_path):
+    path = str(tmp_path / 'logs' / 'insights.jsonl')
+    log = InsightsLog(path)
+    for index in range(3):
+        log.log({'key': f"k{index}", 'insights': {'field': 'ગુજરાતી'}})
+    assert log.flush(5)
+
+    records = read_records(path)
+    assert [record['key'] for record in records] == ['k0', 'k1', 'k2']
+    assert records[0]['insights'] == {'field': 'ગુજરાતી'}
+    assert all(isinstance(record['ts'], float) for record in records)
+    assert log.stats()['written'] == 3
+
+
+def test_rotates_at_the_size_limit_and_keeps_backups(tmp_path):
+    path = str(tmp_path / 'insights.jsonl')
+    log = InsightsLog(path, max_bytes=200, backups=2)
+    record = {'key': 'x' * 60}
+    for index in range(8):
+        log_one(log, dict(record, n=index))
+
+    assert sorted(os.listdir(tmp_path)) == ['insights.jsonl', 'insights.jsonl.1', 'insights.jsonl.2',
+                                            'insights.jsonl.lock']
+    for name in ('insights.jsonl', 'insights.jsonl.1', 'insights.jsonl.2'):
+        assert os.path.getsize(tmp_path / name) <= 200
+    # Two records fit per file; the oldest file beyond two backups is dropped
+    kept = read_records(f"{path}.2") + read_records(f"{path}.1") + read_records(path)
+    assert [record['n'] for record in kept] == [2, 3, 4, 5, 6, 7]
+    assert log.stats()['rotations'] == 3
+
+
+def test_rotation_without_backups_truncates(tmp_path):
+    path = str(tmp_path / 'insights.jsonl')
+    log = InsightsLog(path, max_bytes=100, backups=0)
+    for index in range(3):
+        log_one(log, {'key': 'x' * 60, 'n': index})
+    assert [record['n'] for record in read_records(path)] == [2]
+    assert not os.path.exists(f"{path}.1")
+
+
+def test_writer_follows_rotation_by_another_worker(tmp_path):
+    path = str(tmp_path / 'insights.jsonl')
+    first = InsightsLog(path, max_bytes=200, backups=1)
+    second = InsightsLog(path, max_bytes=200, backups=1)
+    log_one(first, {'key': 'x' * 60, 'n': 0})
+    log_one(second, {'key': 'x' * 60, 'n': 1})
+    log_one(second, {'key': 'x' * 60, 'n': 2})
+    log_one(first, {'key': 'x' * 60, 'n': 3})
+
+    assert [record['n'] for record in read_records(f"{path}.1")] == [0, 1]
+    assert [record['n'] for record in read_records(path)] == [2, 3]
+
+
+def test_records_are_dropped_when_the_queue_is_full(tmp_path):
+    path = str(tmp_path / 'insights.jsonl')
+    log = InsightsLog(path, queue_size=1)
+    # Hold the cross-process lock so the writer blocks on its first batch
+    with open(f"{path}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        log.log({'n': 0})
+        deadline = time.monotonic() + 5
+        while log.stats()['queued'] and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert log.log({'n': 1})
+        assert not log.log({'n': 2})
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    assert log.flush(5)
+    assert [record['n'] for record in read_records(path)] == [0, 1]
+    stats = log.stats()
+    assert (stats['enqueued'], stats['written'], stats['dropped']) == (2, 2, 1)
+
+
+def test_writer_survives_bad_records_and_write_errors(tmp_path):
+    path = str(tmp_path / 'insights.jsonl')
+    log = InsightsLog(path)
+    log_one(log, {'key': 'bad', 'value': object()})
+    log_one(log, {'key': 'good'})
+    assert [record['key'] for record in read_records(path)] == ['good']
+    assert log.stats()['errors'] == 1
+
+    blocked = tmp_path / 'not-a-directory'
+    blocked.write_text('')
+    broken = InsightsLog(str(blocked / 'insights.jsonl'))
+    log_one(broken, {'key': 'first'})
+    log_one(broken, {'key': 'second'})
+    assert broken.stats()['errors'] == 2
+    assert broken.stats()['written'] == 0
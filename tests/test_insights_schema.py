@@ -0,0 +1,126 @@
+import pytest
+
+from insights_schema import SchemaValidator, extract_format_example
+
+EXAMPLE = {
+    'best_field': {'field': 'Technology', 'match_percentage': 85, 'companies': ['TCS']},
+    'careers': [{'job_role': 'Engineer', 'skills': ['Python']}],
+    'habits': ['Read daily'],
+    'summary': 'Text',
+}
+SCHEMA = SchemaValidator(EXAMPLE, required=['best_field'], ranges={'best_field.match_percentage': (0, 100)})
+
+VALID = {
+    'best_field': {'field': 'Design', 'match_percentage': 90, 'companies': ['A', 'B']},
+    'careers': [{'job_role': 'Designer', 'skills': ['Figma']}],
+    'habits': ['Sketch'],
+    'summary': 'Creative',
+}
+
+
+def test_valid_document_is_unchanged():
+    result = SCHEMA.validate(VALID)
+    assert result.valid
+    assert result.document == VALID
+    assert result.coercions == []
+
+
+def test_fixable_deviations_are_coerced_and_recorded():
+    document = dict(VALID, best_field={'field': 7, 'match_percentage': '92%', 'companies': 'Solo'},
+                    habits='One habit', summary=['a', 'b'])
+    result = SCHEMA.validate(document)
+
+    assert result.valid
+    assert result.document['best_field'] == {'field': '7', 'match_percentage': 92, 'companies': ['Solo']}
+    assert result.document['habits'] == ['One habit']
+    assert result.document['summary'] == 'a, b'
+    assert len(result.coercions) == 5
+
+
+def test_numbers_are_clamped_to_their_range():
+    document = dict(VALID, best_field=dict(VALID['best_field'], match_percentage=140))
+    assert SCHEMA.validate(document).document['best_field']['match_percentage'] == 100
+
+
+def test_object_shape_fixes_and_missing_fields():
+    document = dict(VALID, careers={'job_role': 'Solo'}, best_field=[{'field': 'Wrapped'}])
+    result = SCHEMA.validate(document)
+
+    assert result.valid
+    assert result.document['careers'] == [{'job_role': 'Solo', 'skills': []}]
+    assert result.document['best_field'] == {'field': 'Wrapped', 'match_percentage': 0, 'companies': []}
+
+
+def test_invalid_items_are_dropped_and_invalid_sections_reported():
+    document = dict(VALID, careers=[{'job_role': 'Kept'}, 'not an object'], habits=[{'bad': 1}],
+                    summary={'nested': True})
+    del document['best_field']
+    result = SCHEMA.validate(document)
+
+    assert result.document['careers'] == [{'job_role': 'Kept', 'skills': []}]
+    assert sorted(result.invalid_sections) == ['best_field', 'habits', 'summary']
+    assert result.errors['best_field'] == 'missing'
+    assert 'no valid items' in result.errors['habits']
+    assert 'expected string' in result.errors['summary']
+    assert set(result.document) == {'careers'}
+
+
+def test_empty_sections_are_invalid():
+    result = SCHEMA.validate(dict(VALID, habits=[], summary=''))
+    assert sorted(result.invalid_sections) == ['habits', 'summary']
+    assert result.errors['habits'] == 'empty'
+
+
+def test_unknown_sections_are_kept():
+    assert SCHEMA.normalize(dict(VALID, extra={'x': 1}))['extra'] == {'x': 1}
+
+
+def test_validate_selected_sections_only():
+    result = SCHEMA.validate({'habits': ['x']}, ['habits'])
+    assert result.valid
+    assert result.document == {'habits': ['x']}
+
+
+def test_validate_section():
+    assert SCHEMA.validate_section('habits', 'One') == ['One']
+    assert SCHEMA.validate_section('unknown', 5) == 5
+    with pytest.raises(ValueError):
+        SCHEMA.validate_section('summary', {'nested': True})
+
+
+def test_non_object_document():
+    result = SCHEMA.validate(['not', 'an', 'object'])
+    assert result.document == {}
+    assert result.invalid_sections == SCHEMA.section_names
+
+
+def test_lenient_normalize_keeps_what_cannot_be_coerced():
+    document = {
+        'best_field': {'field': 'Design', 'match_percentage': '88%'},
+        'careers': [{'job_role': 'Kept'}, 'free text'],
+        'habits': [{'bad': 1}],
+        'summary': {'nested': True},
+    }
+    normalized = SCHEMA.normalize(document, lenient=True)
+
+    # Coercions still apply, but missing fields are not filled with blanks
+    assert normalized['best_field'] == {'field': 'Design', 'match_percentage': 88}
+    assert normalized['careers'] == [{'job_role': 'Kept'}, 'free text']
+    assert normalized['habits'] == [{'bad': 1}]
+    assert normalized['summary'] == {'nested': True}
+
+
+def test_lenient_normalize_keeps_nested_values_of_the_wrong_shape():
+    document = {'best_field': {'field': 'Design', 'companies': {'name': 'A'}}}
+    assert SCHEMA.normalize(document, lenient=True) == document
+
+
+def test_extract_format_example():
+    prompt = 'Reply as:\n```json\n{"a": [1]}\n```\nThanks'
+    assert extract_format_example(prompt) == {'a': [1]}
+    assert extract_format_example('no example') == {}
+
+
+def test_boolean_examples_are_rejected():
+    with pytest.raises(TypeError):
+        SchemaValidator({'flag': True})
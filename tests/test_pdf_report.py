@@ -0,0 +1,43 @@
+import io
+import os
+import threading
+
+from ai_insights_gemini import FALLBACK_INSIGHTS
+from markdown_pdf_generator import render_pdf_report, shared_generator
+
+TEST_RESULTS = {'mbtiScreen': 'INTJ', 'riasecScreen': 'Investigative', 'varkScreen': 'Visual'}
+
+
+def test_renders_into_memory_without_touching_the_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with render_pdf_report(TEST_RESULTS, FALLBACK_INSIGHTS) as pdf:
+        assert isinstance(pdf, io.BytesIO)
+        assert pdf.tell() == 0
+        data = pdf.read()
+    assert data.startswith(b'%PDF-') and data.rstrip().endswith(b'%%EOF')
+    assert os.listdir(tmp_path) == []
+
+
+def test_large_reports_spill_to_an_anonymous_file():
+    with render_pdf_report(TEST_RESULTS, FALLBACK_INSIGHTS, spill_bytes=1024) as pdf:
+        assert pdf._rolled
+        assert pdf.read(5) == b'%PDF-'
+    with render_pdf_report(TEST_RESULTS, None, spill_bytes=10 * 1024 * 1024) as pdf:
+        assert not pdf._rolled
+
+
+def test_shared_generator_renders_concurrently():
+    assert shared_generator() is shared_generator()
+    outputs = []
+
+    def render():
+        with render_pdf_report(TEST_RESULTS, FALLBACK_INSIGHTS) as pdf:
+            outputs.append(pdf.read())
+
+    threads = [threading.Thread(target=render) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+    assert len(outputs) == 4
+    assert all(output.startswith(b'%PDF-') for output in outputs)
@@ -0,0 +1,114 @@
+import pytest
+
+from profile_index import DEFAULT_WEIGHTS, ProfileIndex, parse_weights
+
+BASE = {
+    'mbti_test': {'selected_option': 'INTJ'},
+    'riasec': {'selected_option': 'Investigative'},
+    'multiple_intelligence': {'selected_option': 'Logical'},
+    'big_five': {'selected_option': 'Openness'},
+    'decision_making': {'selected_option': 'Rational'},
+    'life_situation': {'selected_option': 'Student'},
+    'learning_style': {'selected_option': 'Visual'},
+}
+TOTAL_WEIGHT = sum(DEFAULT_WEIGHTS.values())
+
+
+def variant(**answers):
+    profile = dict(BASE)
+    profile.update({name: {'selected_option': value} for name, value in answers.items()})
+    return profile
+
+
+@pytest.fixture(params=['scan', 'enumerate'])
+def index(request):
+    index = ProfileIndex()
+    if request.param == 'enumerate':
+        index.SCAN_LIMIT = 0
+    return index
+
+
+def test_empty_index_finds_nothing(index):
+    assert index.nearest(BASE) is None
+    assert index.stats() == {'entries': 0, 'lookups': 1, 'found': 0}
+
+
+def test_identical_profile(index):
+    index.add(BASE, {'report': 'base'})
+    assert index.nearest(dict(BASE)) == ({'report': 'base'}, 1.0)
+
+
+def test_nearest_uses_category_weights(index):
+    index.add(variant(riasec='Artistic'), {'report': 'riasec differs'})
+    index.add(variant(learning_style='Auditory', decision_making='Intuitive'), {'report': 'minor differences'})
+    # Make the vocabularies large enough that every neighbour is a valid code
+    index.add(variant(mbti_test='ENFP', riasec='Social', learning_style='Visual', decision_making='Rational'),
+              {'report': 'far'})
+
+    insights, similarity = index.nearest(BASE)
+    assert insights == {'report': 'minor differences'}
+    assert similarity == round(1 - 1.5 / TOTAL_WEIGHT, 4)
+
+
+def test_nothing_beyond_max_distance(index):
+    index.add(variant(mbti_test='ENFP', riasec='Artistic'), {'report': 'far'})
+    assert index.nearest(BASE) is None
+
+
+def test_unseen_answer_counts_as_different(index):
+    index.add(BASE, {'report': 'base'})
+    insights, similarity = index.nearest(variant(big_five='Neuroticism'))
+    assert insights == {'report': 'base'}
+    assert similarity == round(1 - 2.0 / TOTAL_WEIGHT, 4)
+
+
+def test_unanswered_categories_and_plain_answers(index):
+    profile = {'mbti_test': 'INTJ', 'riasec': {'selected_option': 'Investigative'}}
+    index.add(profile, {'report': 'partial'})
+    assert index.nearest({'mbti_test': {'selected_option': 'INTJ'}, 'riasec': 'Investigative'}) == \
+        ({'report': 'partial'}, 1.0)
+
+
+def test_enumeration_agrees_with_scan_on_partial_profiles():
+    stored = [
+        ({'mbti_test': 'INTJ', 'riasec': 'Investigative'}, 'partial'),
+        (variant(riasec='Artistic'), 'riasec differs'),
+        (variant(mbti_test='ENFP', big_five='Agreeableness'), 'far'),
+    ]
+    queries = [
+        {'mbti_test': 'INTJ', 'riasec': 'Investigative', 'big_five': 'Openness'},
+        {'mbti_test': 'INTJ'},
+        variant(learning_style=None),
+        BASE,
+    ]
+    scan, enumerate_ = ProfileIndex(), ProfileIndex()
+    enumerate_.SCAN_LIMIT = 0
+    for index in (scan, enumerate_):
+        for profile, report in stored:
+            index.add(profile, {'report': report})
+
+    for query in queries:
+        assert enumerate_.nearest(query) == scan.nearest(query)
+    assert scan.nearest({'mbti_test': 'INTJ'}) == \
+        ({'report': 'partial'}, round(1 - 3.0 / TOTAL_WEIGHT, 4))
+
+
+def test_oldest_profiles_are_dropped():
+    index = ProfileIndex(max_entries=2)
+    index.add(variant(mbti_test='A'), {'report': 'a'})
+    index.add(variant(mbti_test='B'), {'report': 'b'})
+    index.add(variant(mbti_test='A'), {'report': 'a2'})
+    index.add(variant(mbti_test='C'), {'report': 'c'})
+
+    assert index.stats()['entries'] == 2
+    assert index.nearest(variant(mbti_test='A')) == ({'report': 'a2'}, 1.0)
+    assert index.nearest(variant(mbti_test='B'))[0] != {'report': 'b'}
+
+
+def test_parse_weights():
+    weights = parse_weights('mbti_test=1.5, unknown=9,riasec=0,garbage')
+    assert weights['mbti_test'] == 1.5
+    assert weights['riasec'] == 0
+    assert 'unknown' not in weights
+    assert weights['big_five'] == DEFAULT_WEIGHTS['big_five']
+    assert parse_weights('') == DEFAULT_WEIGHTS
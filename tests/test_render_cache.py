@@ -0,0 +1,98 @@
+import io
+import os
+import stat
+import time
+
+from render_cache import RenderCache
+
+
+def age(path, seconds):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_put_and_get(tmp_path):
+    cache = RenderCache(str(tmp_path / 'cache'))
+    key = cache.key('pdf', {'a': 1}, 'en')
+    assert cache.get(key, '.pdf') is None
+
+    path = cache.put(key, '.pdf', io.BytesIO(b'%PDF-data'))
+    assert cache.get(key, '.pdf') == path
+    with open(path, 'rb') as f:
+        assert f.read() == b'%PDF-data'
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['stores'], stats['bytes']) == (1, 1, 1, 9)
+
+
+def test_key_depends_on_version_kind_and_inputs(tmp_path):
+    cache = RenderCache(str(tmp_path / 'cache'), version='v1')
+    key = cache.key('pdf', {'a': 1, 'b': 2})
+    assert key == cache.key('pdf', {'b': 2, 'a': 1})
+    assert key != cache.key('markdown', {'a': 1, 'b': 2})
+    assert key != RenderCache(str(tmp_path / 'cache'), version='v2').key('pdf', {'a': 1, 'b': 2})
+
+
+def test_replacing_an_entry_does_not_count_it_twice(tmp_path):
+    cache = RenderCache(str(tmp_path / 'cache'), max_bytes=1000)
+    for _ in range(5):
+        cache.put('same', '.pdf', b'x' * 300)
+    assert cache.stats()['bytes'] == 300
+    assert cache.stats()['evictions'] == 0
+
+
+def test_evicts_least_recently_used_over_size_limit(tmp_path):
+    cache = RenderCache(str(tmp_path / 'cache'), max_bytes=1000)
+    paths = [cache.put(f"key{i}", '.pdf', b'x' * 300) for i in range(3)]
+    for seconds, path in zip((30, 10, 20), paths):
+        age(path, seconds)
+
+    newest = cache.put('key3', '.pdf', b'x' * 300)
+    assert not os.path.exists(paths[0])
+    assert all(os.path.exists(path) for path in paths[1:] + [newest])
+    assert cache.stats()['bytes'] == 900
+    assert cache.stats()['evictions'] == 1
+
+
+def test_get_refreshes_recency(tmp_path):
+    cache = RenderCache(str(tmp_path / 'cache'), max_bytes=700)
+    first = cache.put('first', '.pdf', b'x' * 300)
+    second = cache.put('second', '.pdf', b'x' * 300)
+    age(first, 20)
+    age(second, 10)
+
+    cache.get('first', '.pdf')
+    cache.put('third', '.pdf', b'x' * 300)
+    assert os.path.exists(first)
+    assert not os.path.exists(second)
+
+
+def test_expired_entries_are_misses_and_swept(tmp_path):
+    cache = RenderCache(str(tmp_path / 'cache'), max_age=100)
+    old = cache.put('old', '.pdf', b'old')
+    other = cache.put('other', '.pdf', b'other')
+    age(old, 200)
+    age(other, 200)
+
+    assert cache.get('old', '.pdf') is None
+    assert not os.path.exists(old)
+
+    cache._swept_at -= 30
+    cache.put('new', '.pdf', b'new')
+    assert not os.path.exists(other)
+    assert cache.stats()['bytes'] == 3
+
+
+def test_directory_is_private(tmp_path):
+    directory = tmp_path / 'cache'
+    directory.mkdir(mode=0o755)
+    os.chmod(directory, 0o755)
+    RenderCache(str(directory))
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+
+def test_temporary_files_are_not_counted(tmp_path):
+    directory = tmp_path / 'cache'
+    directory.mkdir()
+    (directory / 'partial.tmp').write_bytes(b'x' * 500)
+    (directory / 'done.pdf').write_bytes(b'x' * 200)
+    assert RenderCache(str(directory)).stats()['bytes'] == 200
@@ -0,0 +1,74 @@
+import os
+import signal
+
+import pytest
+
+from ai_insights_gemini import FALLBACK_INSIGHTS
+from render_service import RenderQueueFull, RenderService, RenderTimeout, create_render_service_from_env
+
+TEST_RESULTS = {'mbtiScreen': 'INTJ', 'riasecScreen': 'Investigative'}
+
+
+@pytest.fixture
+def service():
+    service = RenderService(max_workers=1, timeout=60, queue_timeout=60)
+    yield service
+    if service._executor is not None:
+        service._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def test_renders_in_a_pool_process(service):
+    pdf = service.warm().render_pdf(TEST_RESULTS, FALLBACK_INSIGHTS)
+    assert pdf.startswith(b'%PDF-')
+    assert service.render_pdf(TEST_RESULTS).startswith(b'%PDF-')
+    pids = {process.pid for process in service._executor._processes.values()}
+    assert os.getpid() not in pids
+    stats = service.stats()
+    assert stats['completed'] == 2
+    assert stats['pending'] == stats['failed'] == stats['rejected'] == 0
+
+
+def test_rejects_renders_beyond_max_pending(service):
+    service.max_pending = 0
+    with pytest.raises(RenderQueueFull):
+        service.render_pdf(TEST_RESULTS)
+    assert service.stats()['rejected'] == 1
+    assert service.stats()['pending'] == 0
+    assert service._executor is None
+
+
+def test_interrupts_renders_that_run_too_long(service):
+    service.timeout = 0.001
+    with pytest.raises(RenderTimeout):
+        service.render_pdf(TEST_RESULTS, FALLBACK_INSIGHTS)
+    stats = service.stats()
+    assert stats['timeouts'] == stats['failed'] == 1
+    assert stats['pending'] == 0
+    # The worker survives its interrupted render
+    service.timeout = 60
+    assert service.render_pdf(TEST_RESULTS).startswith(b'%PDF-')
+
+
+def test_replaces_a_pool_whose_process_died(service):
+    service.render_pdf(TEST_RESULTS)
+    executor = service._executor
+    for process in list(executor._processes.values()):
+        os.kill(process.pid, signal.SIGKILL)
+        process.join(10)
+    assert service.render_pdf(TEST_RESULTS).startswith(b'%PDF-')
+    assert service._executor is not executor
+    assert service.stats()['restarts'] == 1
+    assert service.stats()['completed'] == 2
+
+
+def test_env_factory(monkeypatch):
+    monkeypatch.setenv('RENDER_WORKERS', '0')
+    assert create_render_service_from_env() is None
+    monkeypatch.setenv('RENDER_WORKERS', '3')
+    monkeypatch.setenv('RENDER_MAX_PENDING', '5')
+    monkeypatch.setenv('RENDER_TIMEOUT', '7.5')
+    monkeypatch.setenv('RENDER_START_METHOD', 'spawn')
+    service = create_render_service_from_env()
+    assert (service.max_workers, service.max_pending, service.timeout) == (3, 5, 7.5)
+    assert service.start_method == 'spawn'
+    assert service._executor is None
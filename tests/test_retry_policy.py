@@ -0,0 +1,135 @@
+import pytest
+
+import retry_policy
+from retry_policy import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(retry_policy.time, 'monotonic', clock)
+    return clock
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.before_call() is False
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_after == pytest.approx(30)
+    assert breaker.stats()['rejected_calls'] == 1
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+
+    clock.now += 31
+    assert breaker.before_call() is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.before_call() is False
+    assert breaker.retry_after() is None
+
+
+def test_failed_trial_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+    open_breaker(breaker)
+    clock.now += 31
+    assert breaker.before_call() is True
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.retry_after() == pytest.approx(30)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_guard_releases_trial_without_outcome(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+    clock.now += 31
+
+    with pytest.raises(KeyError):
+        with breaker.guard():
+            raise KeyError('not an upstream failure')
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.opened_at == clock.now
+
+
+def test_guard_keeps_recorded_success(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+    clock.now += 31
+
+    with breaker.guard():
+        breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_release_trial_is_noop_when_not_half_open(clock):
+    breaker = CircuitBreaker()
+    breaker.release_trial()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_abandoned_trial_times_out(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, trial_timeout=120)
+    open_breaker(breaker)
+    clock.now += 31
+    assert breaker.before_call() is True
+
+    clock.now += 60
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now += 61
+    assert breaker.before_call() is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_backoff_ceiling_grows_and_caps():
+    policy = RetryPolicy(base_delay=1, max_delay=5, multiplier=2)
+    assert [policy.backoff_ceiling(attempt) for attempt in range(5)] == [1, 2, 4, 5, 5]
+    for attempt in range(5):
+        assert 0 <= policy.compute_delay(attempt) <= policy.backoff_ceiling(attempt)
+
+
+def test_error_classification():
+    assert retry_policy.is_retryable(TimeoutError())
+    assert retry_policy.is_retryable(ValueError('missing field'))
+    assert not retry_policy.is_retryable(KeyError('bug'))
+    assert retry_policy.is_upstream_failure(ConnectionError())
+    assert not retry_policy.is_upstream_failure(ValueError())
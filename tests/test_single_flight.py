@@ -0,0 +1,118 @@
+import multiprocessing
+import os
+import threading
+import time
+
+from retry_policy import CircuitOpenError
+from single_flight import FileLockSingleFlight, SingleFlight, create_single_flight_from_env
+
+
+def run_concurrently(flight, key, fn, callers):
+    """Call flight.do from several threads at once; returns [(result, shared) or exception]"""
+    outcomes = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(callers)
+
+    def call():
+        barrier.wait()
+        try:
+            outcome = flight.do(key, fn)
+        except Exception as e:
+            outcome = e
+        with lock:
+            outcomes.append(outcome)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return outcomes
+
+
+def slow(result, calls, delay=0.2):
+    def fn():
+        calls.append(1)
+        time.sleep(delay)
+        return result
+    return fn
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    outcomes = run_concurrently(flight, 'k', slow({'v': 1}, calls), 5)
+
+    assert len(calls) == 1
+    assert all(result == {'v': 1} for result, _ in outcomes)
+    assert sorted(shared for _, shared in outcomes) == [False, True, True, True, True]
+    assert flight.stats() == {'in_flight': 0, 'leaders': 1, 'followers': 4}
+
+
+def test_different_keys_and_later_calls_run_separately():
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == (1, False)
+    assert flight.do('b', lambda: 2) == (2, False)
+    assert flight.do('a', lambda: 3) == (3, False)
+    assert flight.stats()['leaders'] == 3
+
+
+def test_each_follower_gets_its_own_copy_of_the_error():
+    flight = SingleFlight()
+
+    def fail():
+        time.sleep(0.2)
+        raise CircuitOpenError(7)
+
+    outcomes = run_concurrently(flight, 'k', fail, 4)
+    assert len(outcomes) == 4
+    assert all(isinstance(error, CircuitOpenError) and error.retry_after == 7 for error in outcomes)
+    assert len({id(error) for error in outcomes}) == 4
+    assert flight.stats()['in_flight'] == 0
+
+
+def store_result(directory, key, value, queue):
+    queue.put(FileLockSingleFlight(directory).do(key, lambda: value))
+
+
+def test_result_from_another_worker_is_shared(tmp_path):
+    directory = str(tmp_path)
+    leader = FileLockSingleFlight(directory)
+    assert leader.do('k', lambda: {'v': 1}) == ({'v': 1}, False)
+
+    # A second process asking within result_ttl reads the stored result instead of calling fn
+    queue = multiprocessing.get_context('fork').Queue()
+    process = multiprocessing.get_context('fork').Process(target=store_result, args=(directory, 'k', {'v': 2}, queue))
+    process.start()
+    process.join(10)
+    assert queue.get(timeout=5) == ({'v': 1}, True)
+    # The lock file is removed by its holder
+    assert sorted(os.listdir(directory)) == ['k.json']
+
+
+def test_stale_results_are_not_reused(tmp_path):
+    flight = FileLockSingleFlight(str(tmp_path), result_ttl=60)
+    flight.do('k', lambda: 1)
+    old = time.time() - 120
+    os.utime(tmp_path / 'k.json', (old, old))
+    assert flight.do('k', lambda: 2) == (2, False)
+
+
+def test_sweep_removes_expired_files_and_unheld_locks(tmp_path):
+    flight = FileLockSingleFlight(str(tmp_path), result_ttl=60)
+    old = time.time() - 120
+    for name in ('old.json', 'old.json.123.tmp', 'crashed.lock', 'fresh.json'):
+        (tmp_path / name).write_text('{}')
+        if name != 'fresh.json':
+            os.utime(tmp_path / name, (old, old))
+
+    flight._swept_at -= 61
+    flight.do('k', lambda: 1)
+    assert sorted(os.listdir(tmp_path)) == ['fresh.json', 'k.json']
+
+
+def test_factory_uses_file_locks_only_when_configured(tmp_path, monkeypatch):
+    monkeypatch.delenv('INSIGHTS_SINGLEFLIGHT_DIR', raising=False)
+    assert type(create_single_flight_from_env()) is SingleFlight
+    monkeypatch.setenv('INSIGHTS_SINGLEFLIGHT_DIR', str(tmp_path))
+    assert isinstance(create_single_flight_from_env(), FileLockSingleFlight)
@@ -0,0 +1,151 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from static_assets import AssetPipeline, minify_css, minify_js
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NODE = shutil.which('node')
+needs_node = pytest.mark.skipif(NODE is None, reason='node is not installed')
+
+
+def read(name):
+    with open(os.path.join(ROOT, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def run_js(source):
+    """Value of the last `result` assignment when source runs in node"""
+    program = source + '\n;console.log(JSON.stringify(result));\n'
+    completed = subprocess.run([NODE, '-e', program], capture_output=True, text=True, timeout=30)
+    assert completed.returncode == 0, completed.stderr
+    return json.loads(completed.stdout)
+
+
+def assert_parses(source):
+    check = 'new Function(require("fs").readFileSync(0, "utf8"))'
+    completed = subprocess.run([NODE, '-e', check], input=source, capture_output=True, text=True, timeout=30)
+    assert completed.returncode == 0, completed.stderr
+
+
+JS_CASES = {
+    'regex containing //': r'''
+        const url = /https?:\/\//g;  // protocol
+        var result = 'see http://a.example and https://b.example'.replace(url, '');
+    ''',
+    'regex after keyword and division': r'''
+        function f(a, b, c) { return /\d+/.test(a) ? a / b / c : 0 }
+        var result = [f('8', 2, 2), f('x', 1, 1), 10 /2/ 5];
+    ''',
+    'regex with slash in class': r'''
+        var result = 'a/b//c'.split(/[/]+/);
+    ''',
+    'URL and comment markers inside strings': r'''
+        var result = ["http://example.com/path", 'it\'s /* not */ a comment', "a // b", `// ${1 + 1} /* */`];
+    ''',
+    'return followed by a newline': r'''
+        function f() {
+            return
+                42;
+        }
+        var result = f() === undefined;
+    ''',
+    'line break before ++': r'''
+        var a = 1, b = 1
+        a
+        ++b
+        var result = [a, b];
+    ''',
+    'adjacent plus and minus operators': r'''
+        var i = 1, j = 2;
+        var result = [i + +j, i - -j, i++ + ++j, i - - -j];
+    ''',
+    'nested template substitutions': r'''
+        const items = [{name: 'a'}, {name: 'b'}];
+        var result = `list: ${items.map(item => `<${item.name}>${ {x: 1}.x }</${item.name}>`).join('')} // end`;
+    ''',
+    'block comments separating tokens': r'''
+        var x = 1/*one*/+/*two*/2;
+        var y = typeof/**/x;
+        var result = [x, y];
+    ''',
+    'object literal and division after closing paren': r'''
+        var total = (6) / 3;
+        var o = {a: 1}
+        var result = [total, o.a];
+    ''',
+}
+
+
+@needs_node
+@pytest.mark.parametrize('name', sorted(JS_CASES))
+def test_minified_js_behaves_like_source(name):
+    source = JS_CASES[name]
+    assert run_js(minify_js(source)) == run_js(source)
+
+
+def test_minify_js_removes_comments_and_keeps_literals():
+    source = 'var a = "x  //  y"; // trailing\n/* block */ var b = \'/* kept */\';\n'
+    minified = minify_js(source)
+    assert '"x  //  y"' in minified
+    assert "'/* kept */'" in minified
+    assert 'trailing' not in minified and 'block' not in minified
+    assert len(minified) < len(source)
+
+
+def test_minify_js_keeps_front_end_identifiers_and_strings():
+    source = read('script.js')
+    minified = minify_js(source)
+    assert len(minified) < len(source)
+    for name in ('generateAIInsightsStream', 'displayAIInsights', 'generateReport'):
+        assert f"function {name}(" in minified
+    for literal in re.findall(r"'(/api/[^']+)'", source):
+        assert f"'{literal}'" in minified
+
+
+@needs_node
+@pytest.mark.parametrize('name', ['script.js', 'test-data.js'])
+def test_minified_front_end_scripts_parse(name):
+    assert_parses(minify_js(read(name)))
+
+
+def test_minify_css():
+    source = '''
+        /* header */
+        .a > .b ,  .c:hover {
+            margin: 0 auto ;
+            width: calc(100% - 10px);
+            content: "a  b /* not a comment */";
+        }
+        @media (max-width: 600px) and (min-width: 1px) {
+            div :first-child { color: red; }
+        }
+    '''
+    assert minify_css(source) == (
+        '.a>.b,.c:hover{margin:0 auto;width:calc(100% - 10px);content:"a  b /* not a comment */"}'
+        '@media (max-width:600px) and (min-width:1px){div :first-child{color:red}}\n'
+    )
+
+
+def test_minify_front_end_css():
+    source = read('styles.css')
+    minified = minify_css(source)
+    assert len(minified) < len(source)
+    assert minified.count('{') == minified.count('}') == source.count('{')
+    for selector in re.findall(r'^(\.[\w-]+)\s*\{', source, re.MULTILINE):
+        assert selector in minified
+
+
+def test_pipeline_fingerprints_minified_assets():
+    pipeline = AssetPipeline(root=ROOT)
+    entry = pipeline.get('index.html').encodings['identity'].decode('utf-8')
+    for name, fingerprinted in pipeline.fingerprints.items():
+        assert fingerprinted in entry
+        asset = pipeline.get(fingerprinted)
+        assert asset.immutable
+        assert asset.encodings['identity'] == pipeline.get(name).encodings['identity']
+        assert len(asset.encodings['identity']) < os.path.getsize(os.path.join(ROOT, name))
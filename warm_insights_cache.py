@@ -0,0 +1,226 @@
+"""
+Insights Cache Warmer
+Offline job that pre-generates AI insights for the questionnaire's answer space
+
+Usage:
+    python warm_insights_cache.py --limit 500 --concurrency 4
+    python warm_insights_cache.py --observed observed_results.jsonl --limit 2000
+    python warm_insights_cache.py --dry-run
+    python warm_insights_cache.py --codec-only
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import os
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from html.parser import HTMLParser
+from typing import Dict, Any, List, Tuple
+
+from ai_insights_gemini import AIInsightsGenerator, FALLBACK_INSIGHTS, FORMAT_EXAMPLE
+from insights_codec import DEFAULT_CODEC_PATH, train_codec
+from insights_store import InsightsStore
+from structured_results import canonical_key, convert_to_structured_format
+
+# Screens in questionnaire order, as their ids appear in index.html
+TEST_SCREENS = [
+    'mbtiScreen',
+    'intelligenceScreen',
+    'bigFiveScreen',
+    'riasecScreen',
+    'decisionScreen',
+    'lifeScreen',
+    'varkScreen'
+]
+
+
+class _OptionCardParser(HTMLParser):
+    """Collect the data-value of every option card, grouped by the enclosing screen"""
+
+    def __init__(self):
+        super().__init__()
+        self.current_screen = None
+        self.options = defaultdict(list)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get('class') or '').split()
+        if 'screen' in classes and attrs.get('id') in TEST_SCREENS:
+            self.current_screen = attrs['id']
+        elif 'screen' in classes:
+            self.current_screen = None
+        elif 'option-card' in classes and self.current_screen and 'data-value' in attrs:
+            self.options[self.current_screen].append(attrs['data-value'])
+
+
+def load_answer_options(html_path: str = 'index.html') -> Dict[str, List[str]]:
+    """Read the selectable option values for each test screen from the questionnaire page"""
+    parser = _OptionCardParser()
+    with open(html_path, 'r', encoding='utf-8') as f:
+        parser.feed(f.read())
+
+    missing = [screen for screen in TEST_SCREENS if not parser.options.get(screen)]
+    if missing:
+        raise ValueError(f"No option cards found for screens: {', '.join(missing)}")
+
+    return {screen: parser.options[screen] for screen in TEST_SCREENS}
+
+
+def load_observed_results(path: str) -> List[Dict[str, Any]]:
+    """Load observed testResults, one JSON object per line (a bare object or {"testResults": {...}})"""
+    observed = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            observed.append(record.get('testResults', record))
+    return observed
+
+
+def enumerate_profiles(options: Dict[str, List[str]]):
+    """Yield every possible testResults combination"""
+    for values in itertools.product(*(options[screen] for screen in TEST_SCREENS)):
+        yield dict(zip(TEST_SCREENS, values))
+
+
+def prioritize_profiles(options: Dict[str, List[str]], observed: List[Dict[str, Any]],
+                        limit: int = None) -> List[Dict[str, Any]]:
+    """
+    Order profiles by how likely they are to be requested
+
+    Profiles seen verbatim come first, most frequent first. The rest are ranked by
+    the product of each answer's smoothed per-screen frequency in the observed data.
+    """
+    exact_counts = Counter(
+        tuple(result.get(screen) for screen in TEST_SCREENS) for result in observed
+    )
+    screen_counts = {screen: Counter(result.get(screen) for result in observed) for screen in TEST_SCREENS}
+
+    def score(values: Tuple[str, ...]) -> Tuple[int, float]:
+        marginal = 1.0
+        for screen, value in zip(TEST_SCREENS, values):
+            counts = screen_counts[screen]
+            marginal *= (counts[value] + 1) / (len(observed) + len(options[screen]))
+        return exact_counts.get(values, 0), marginal
+
+    combinations = itertools.product(*(options[screen] for screen in TEST_SCREENS))
+    if limit is None:
+        ranked = sorted(combinations, key=score, reverse=True)
+    else:
+        ranked = heapq.nlargest(limit, combinations, key=score)
+
+    return [dict(zip(TEST_SCREENS, values)) for values in ranked]
+
+
+def warm_cache(profiles, store: InsightsStore, generator: AIInsightsGenerator,
+               concurrency: int = 4, max_retries: int = 3) -> Dict[str, int]:
+    """Generate insights for profiles not yet in the store, with at most `concurrency` calls in flight"""
+    done_keys = store.keys()
+    pending = []
+    for test_results in profiles:
+        key = canonical_key(convert_to_structured_format(test_results))
+        if key not in done_keys:
+            done_keys.add(key)
+            pending.append((key, test_results))
+
+    stats = {'pending': len(pending), 'generated': 0, 'failed': 0}
+    print(f"{len(pending)} profiles to generate ({concurrency} concurrent)")
+
+    def generate(key, test_results):
+        structured_results = convert_to_structured_format(test_results)
+        insights = generator.generate_insights(structured_results, max_retries=max_retries)
+        store.append(key, test_results, insights)
+
+    # Submitted as slots free up, so the answer space never sits in the executor's queue at once
+    max_in_flight = 2 * concurrency
+    remaining = iter(pending)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        in_flight = {}
+        while True:
+            for key, test_results in itertools.islice(remaining, max_in_flight - len(in_flight)):
+                in_flight[executor.submit(generate, key, test_results)] = key
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = in_flight.pop(future)
+                try:
+                    future.result()
+                    stats['generated'] += 1
+                except Exception as e:
+                    stats['failed'] += 1
+                    print(f"Failed to generate {key[:12]}: {e}")
+
+                completed = stats['generated'] + stats['failed']
+                if completed % 10 == 0 or completed == len(pending):
+                    print(f"Progress: {completed}/{len(pending)} ({stats['failed']} failed)")
+
+    return stats
+
+
+def train_store_codec(store: InsightsStore, path: str, max_samples: int = 200):
+    """Train the storage codec on the static examples and stored insights, and save it for the web app"""
+    samples = [FORMAT_EXAMPLE, FALLBACK_INSIGHTS]
+    for record in store.records():
+        if len(samples) >= max_samples:
+            break
+        samples.append(record['insights'])
+    codec = train_codec(samples)
+    codec.save(path)
+    print(f"Insights codec trained on {len(samples)} documents, saved to {path} ({codec.fingerprint})")
+    return codec
+
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Pre-generate AI insights for the questionnaire answer space")
+    parser.add_argument('--html', default='index.html', help="Questionnaire page to read option cards from")
+    parser.add_argument('--store', default=None, help="Output JSON Lines store (defaults to INSIGHTS_STORE_PATH)")
+    parser.add_argument('--observed', default=None, help="JSON Lines file of observed testResults used for prioritization")
+    parser.add_argument('--limit', type=int, default=None, help="Only generate the top N profiles")
+    parser.add_argument('--concurrency', type=int, default=4, help="Maximum concurrent Gemini calls")
+    parser.add_argument('--max-retries', type=int, default=3, help="Retries per profile")
+    parser.add_argument('--dry-run', action='store_true', help="Print the answer space size and exit")
+    parser.add_argument('--codec', default=None,
+                        help="Where to save the storage codec (defaults to INSIGHTS_CODEC_PATH)")
+    parser.add_argument('--codec-samples', type=int, default=200, help="Documents the storage codec is trained on")
+    parser.add_argument('--codec-only', action='store_true', help="Only retrain the storage codec from the store")
+    args = parser.parse_args()
+
+    codec_path = args.codec or os.environ.get('INSIGHTS_CODEC_PATH', DEFAULT_CODEC_PATH)
+    if args.codec_only:
+        train_store_codec(InsightsStore(args.store), codec_path, args.codec_samples)
+        return
+
+    options = load_answer_options(args.html)
+    total = 1
+    for screen in TEST_SCREENS:
+        total *= len(options[screen])
+    print(f"Answer space: {sum(len(v) for v in options.values())} option cards, {total} combinations")
+
+    if args.dry_run:
+        for screen in TEST_SCREENS:
+            print(f"  {screen}: {len(options[screen])} options")
+        return
+
+    if args.observed:
+        profiles = prioritize_profiles(options, load_observed_results(args.observed), args.limit)
+    else:
+        profiles = enumerate_profiles(options)
+        if args.limit is not None:
+            profiles = itertools.islice(profiles, args.limit)
+
+    store = InsightsStore(args.store)
+    generator = AIInsightsGenerator()
+    stats = warm_cache(profiles, store, generator, args.concurrency, args.max_retries)
+    print(f"Done: {stats['generated']} generated, {stats['failed']} failed, store at {store.path}")
+    train_store_codec(store, codec_path, args.codec_samples)
+
+
+if __name__ == "__main__":
+    main()
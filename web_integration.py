@@ -3,29 +3,186 @@ Web Integration for AI Insights Generator
 Flask web server to integrate AI insights with the psychological testing platform
 """
 
-from flask import Flask, request, jsonify, send_from_directory, send_file, make_response
+from startup import BackgroundInit, lazy_import, report as startup_report
+from flask import Flask, Response, request, jsonify, send_from_directory, send_file, make_response, stream_with_context
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
+import io
 import json
+import math
 import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
-from ai_insights_gemini import AIInsightsGenerator
-from markdown_pdf_generator import generate_pdf_report
+from ai_insights_gemini import AIInsightsGenerator, FALLBACK_INSIGHTS, FORMAT_EXAMPLE
+from insights_codec import DEFAULT_CODEC_PATH, decode_insights, load_codec, train_codec
+from insights_cache import create_cache_from_env
+from insights_store import InsightsStore
+from structured_results import canonical_key, convert_to_structured_format
+from insights_log import create_insights_log_from_env
+from profile_index import create_profile_index_from_env
+from static_assets import PUBLIC_FILES, create_asset_pipeline_from_env
+from render_cache import create_render_cache_from_env, source_fingerprint
+from render_service import RenderQueueFull, RenderTimeout, create_render_service_from_env
+from async_loop import BackgroundEventLoop
+from single_flight import create_single_flight_from_env
+from admission import AdmissionController, AdmissionRejected, create_admission_controller_from_env
+from insights_jobs import JobStore, QueueFullError, create_job_queue_from_env, job_payload
+from retry_policy import InsightsGenerationError, gemini_circuit_breaker
+from metrics import registry as metrics_registry
 
-app = Flask(__name__, static_folder='.', static_url_path='')
+startup_report.mark('imports')
+
+app = Flask(__name__, static_folder=None)  # serve_static handles every front-end file
+
+# Proxies in front of the app (Railway's edge); remote_addr becomes the address the nearest of them saw.
+# Entries further left in X-Forwarded-For are supplied by the client and cannot be trusted.
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', 1))
+if TRUSTED_PROXY_HOPS > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
 CORS(app)  # Enable CORS for frontend integration
 
-# Initialize AI insights generator
-ai_generator = None
+# Seconds a request waits for the AI insights generator while the worker is still starting
+AI_GENERATOR_INIT_WAIT = float(os.environ.get('AI_GENERATOR_INIT_WAIT', 15))
 
-try:
-    ai_generator = AIInsightsGenerator()
+def create_ai_generator():
+    generator = AIInsightsGenerator()
+    # Create the upstream prompt cache here rather than on the first request's event loop
+    generator.prompt_cache.get_model()
+    # Retries and section repairs use upstream quota too
+    generator.extra_call_meter = lambda kind: insights_admission.charge()
     print("AI Insights Generator initialized successfully")
+    return generator
+
+# Initialize AI insights generator in the background so the worker serves /api/health right away
+ai_generator_init = BackgroundInit('ai_generator', create_ai_generator).start()
+
+def get_ai_generator():
+    """The AI insights generator, or None if it failed to initialize or is still starting"""
+    return ai_generator_init.get(timeout=AI_GENERATOR_INIT_WAIT)
+
+# Shared event loop for asynchronous Gemini calls
+insights_loop = BackgroundEventLoop()
+
+# Generate sections with concurrent per-section prompts instead of one large prompt
+INSIGHTS_FANOUT = os.environ.get('INSIGHTS_FANOUT', 'false').lower() == 'true'
+
+# Identical concurrent requests share a single upstream generation
+insights_flight = create_single_flight_from_env()
+
+# Paces upstream calls to the Gemini quota, interactive requests ahead of background jobs
+insights_admission = create_admission_controller_from_env()
+
+# Batch endpoint limits: records per request and generations in flight per request.
+# Batches wait in the admission controller's batch lane, whose per-client allowance is separate from interactive requests.
+INSIGHTS_BATCH_MAX_RECORDS = int(os.environ.get('INSIGHTS_BATCH_MAX_RECORDS', 1000))
+INSIGHTS_BATCH_CONCURRENCY = int(os.environ.get('INSIGHTS_BATCH_CONCURRENCY', 4))
+
+# Background generation for clients that poll instead of holding a request open
+insights_jobs = create_job_queue_from_env()
+
+# Keep cached and precomputed insights compressed, decoding sections only when they are served
+INSIGHTS_COMPACT_STORAGE = os.environ.get('INSIGHTS_COMPACT_STORAGE', 'true').lower() == 'true'
+INSIGHTS_CODEC_PATH = os.environ.get('INSIGHTS_CODEC_PATH', DEFAULT_CODEC_PATH)
+
+insights_store = InsightsStore()
+insights_codec = None
+
+if INSIGHTS_COMPACT_STORAGE:
+    # String table and zlib dictionary trained offline by warm_insights_cache.py, identical in every worker
+    try:
+        insights_codec = load_codec(INSIGHTS_CODEC_PATH)
+    except (OSError, ValueError) as e:
+        if not isinstance(e, FileNotFoundError):
+            print(f"Warning: Could not load insights codec, using the built-in examples: {e}")
+        # The two static examples are deterministic too, and take under a millisecond
+        insights_codec = train_codec([FORMAT_EXAMPLE, FALLBACK_INSIGHTS])
+
+def compact_insights(insights):
+    """Compressed form of an insights document for long-lived storage"""
+    return insights_codec.encode(insights) if insights_codec is not None else insights
+
+# Cache of generated insights keyed on the structured test results
+insights_cache = create_cache_from_env(insights_codec)
+
+# Generated insights for debugging, appended by a background writer
+insights_log = create_insights_log_from_env()
+
+# Insights pre-generated offline by warm_insights_cache.py
+precomputed_insights = {}
+precomputed_profiles = []
+
+try:
+    for record in insights_store.records():
+        insights = compact_insights(record['insights'])
+        precomputed_insights[record['key']] = insights
+        precomputed_profiles.append((record.get('test_results') or {}, insights))
+    print(f"Loaded {len(precomputed_insights)} precomputed insights")
 except Exception as e:
-    print(f"Warning: AI Insights Generator failed to initialize: {e}")
+    print(f"Warning: Could not load precomputed insights: {e}")
+
+# Generated profiles searchable by answer similarity, for drafts and for serving when Gemini is saturated
+profile_index = create_profile_index_from_env()
+for test_results, insights in precomputed_profiles:
+    profile_index.add(convert_to_structured_format(test_results), insights)
+del precomputed_profiles
+
+# Minimum similarity (0-1) at which a neighbour's insights are served outright when the upstream is saturated
+NEIGHBOUR_SERVE_THRESHOLD = float(os.environ.get('PROFILE_NEIGHBOUR_THRESHOLD', 0.85))
+
+# Cache effectiveness, read from the live objects at scrape time
+metrics_registry.counter_callback('insights_cache_hits_total', 'In-process insights cache hits', lambda: insights_cache.stats()['hits'])
+metrics_registry.counter_callback('insights_cache_misses_total', 'In-process insights cache misses', lambda: insights_cache.stats()['misses'])
+metrics_registry.gauge_callback('insights_cache_hit_ratio', 'In-process insights cache hit ratio', lambda: insights_cache.stats()['hit_rate'])
+metrics_registry.gauge_callback('insights_cache_entries', 'Entries in the in-process insights cache', lambda: insights_cache.stats()['entries'])
+metrics_registry.gauge_callback('insights_precomputed_entries', 'Precomputed insights loaded at boot', lambda: len(precomputed_insights))
+metrics_registry.counter_callback('insights_single_flight_followers_total', 'Requests that shared another request\'s generation', lambda: insights_flight.stats()['followers'])
+metrics_registry.gauge_callback('insights_circuit_breaker_open', '1 while the Gemini circuit breaker rejects calls', lambda: 0 if gemini_circuit_breaker.stats()['state'] == 'closed' else 1)
+metrics_registry.gauge_callback('insights_admission_queued', 'Requests waiting for upstream quota', lambda: sum(insights_admission.stats()['queued'].values()))
+metrics_registry.counter_callback('insights_admission_rejected_total', 'Requests rejected by admission control', lambda: sum(insights_admission.stats()['rejected'].values()))
+metrics_registry.gauge_callback('insights_profile_index_entries', 'Profiles in the nearest-neighbour index', lambda: profile_index.stats()['entries'])
+metrics_registry.gauge_callback('insights_jobs_pending', 'Insight jobs queued or running in this worker', lambda: insights_jobs.stats()['pending'])
+metrics_registry.counter_callback('insights_circuit_breaker_rejected_calls_total', 'Calls rejected by the open circuit breaker', lambda: gemini_circuit_breaker.stats()['rejected_calls'])
+metrics_registry.counter_callback('insights_log_dropped_total', 'Insight log records dropped because the writer fell behind', lambda: insights_log.stats()['dropped'])
+metrics_registry.counter_callback('report_render_cache_hits_total', 'PDF and markdown renders served from the render cache', lambda: render_cache.stats()['hits'] if render_cache else 0)
+metrics_registry.gauge_callback('report_render_cache_bytes', 'Bytes of rendered reports kept on disk', lambda: render_cache.stats()['bytes'] if render_cache else 0)
+metrics_registry.gauge_callback('report_render_pending', 'PDF renders queued or running in the render pool', lambda: render_service.stats()['pending'] if render_service else 0)
+metrics_registry.gauge_callback('app_startup_seconds', 'Seconds from first import until this worker could serve requests', lambda: startup_report.ready_seconds or 0)
+metrics_registry.gauge_callback('ai_generator_ready', '1 once the AI insights generator is initialized', lambda: 1 if ai_generator_init.state == BackgroundInit.READY else 0)
+
+# Front-end files minified, fingerprinted and precompressed once per worker
+try:
+    with startup_report.phase('static_assets'):
+        static_assets = create_asset_pipeline_from_env('.')
+except Exception as e:
+    print(f"Warning: Could not build static assets, serving them from disk: {e}")
+    static_assets = None
+
+# Fingerprinted names change whenever the content does, so browsers may keep them for a year
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+def asset_response(asset):
+    """Serve a built asset in the best encoding the client accepts, or 304 if the client's copy is current"""
+    encoding = request.accept_encodings.best_match(list(asset.encodings), default='identity')
+    etag = asset.entity_tag(encoding)
+    
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(asset.encodings[encoding])
+        response.content_type = asset.content_type
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if asset.immutable else 'no-cache'
+    return response
 
 @app.route('/')
 def index():
     """Serve the main testing platform"""
+    if static_assets is not None:
+        return asset_response(static_assets.get(static_assets.entry))
     try:
         return send_file('index.html')
     except FileNotFoundError:
@@ -34,6 +191,11 @@ def index():
 @app.route('/<path:filename>')
 def serve_static(filename):
     """Serve static files (CSS, JS, etc.)"""
+    asset = static_assets.get(filename) if static_assets is not None else None
+    if asset is not None:
+        return asset_response(asset)
+    if filename not in PUBLIC_FILES:
+        return f"File {filename} not found", 404
     try:
         return send_from_directory('.', filename)
     except FileNotFoundError:
@@ -54,8 +216,13 @@ def generate_insights():
             "decisionScreen": "selected_option_text",
             "lifeScreen": "selected_option_text",
             "varkScreen": "selected_option_text"
-        }
+        },
+        "async": false,
+        "webhookUrl": "https://..." (optional, with async)
     }
+    
+    With "async": true (or ?async=1) the response is 202 with a job_id to
+    poll at /api/jobs/<job_id>; cached profiles are still answered directly.
     """
     try:
         # Get test results from request
@@ -79,15 +246,39 @@ def generate_insights():
         # Convert test results to structured format for AI analysis
         structured_results = convert_to_structured_format(test_results)
         
+        # Serve repeat profiles from the cache before calling the AI model
+        cache_key = canonical_key(structured_results)
+        cached_insights = insights_cache.get(cache_key)
+        if cached_insights is None:
+            cached_insights = precomputed_insights.get(cache_key)
+        if cached_insights is not None:
+            return jsonify({
+                'success': True,
+                'insights': decode_insights(cached_insights),
+                'cached': True
+            })
+        
         # Generate insights using AI (no fallbacks)
-        if not ai_generator:
+        if not get_ai_generator():
             return jsonify({
                 'error': 'AI service is not available. Please check your API configuration.',
                 'success': False
             }), 503
+        
+        if data.get('async') or request.args.get('async') == '1':
+            return submit_insights_job(structured_results, cache_key, data.get('webhookUrl'))
             
         try:
-            insights = ai_generator.generate_insights(structured_results, max_retries=3)
+            insights, shared = run_generation(structured_results, cache_key, client_identifier())
+        except AdmissionRejected as e:
+            return neighbour_response(structured_results) or admission_rejected_response(e)
+        except InsightsGenerationError as e:
+            if e.retry_after is not None:
+                # Throttled or circuit open: a close enough profile beats an error
+                response = neighbour_response(structured_results)
+                if response is not None:
+                    return response
+            return insights_error_response(e)
         except Exception as e:
             return jsonify({
                 'error': f'Failed to generate AI insights: {str(e)}',
@@ -95,16 +286,11 @@ def generate_insights():
                 'retry_suggested': True
             }), 500
         
-        # Save insights to file for debugging
-        try:
-            with open('latest_insights.json', 'w', encoding='utf-8') as f:
-                json.dump(insights, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"Warning: Could not save insights to file: {e}")
-        
         return jsonify({
             'success': True,
-            'insights': insights
+            'insights': insights,
+            'cached': False,
+            'coalesced': shared
         })
         
     except Exception as e:
@@ -114,172 +300,431 @@ def generate_insights():
             'success': False
         }), 500
 
-def convert_to_structured_format(test_results):
-    """Convert raw test results to structured format for AI analysis"""
-    
-    # Map test screens to structured categories
-    structured = {}
-    
-    # MBTI Test
-    if 'mbtiScreen' in test_results:
-        structured['mbti_test'] = {
-            'selected_option': test_results['mbtiScreen'],
-            'test_type': 'Myers-Briggs Type Indicator'
-        }
-    
-    # Multiple Intelligence Test
-    if 'intelligenceScreen' in test_results:
-        structured['multiple_intelligence'] = {
-            'selected_option': test_results['intelligenceScreen'],
-            'test_type': 'Multiple Intelligence Assessment'
-        }
-    
-    # Big Five Test
-    if 'bigFiveScreen' in test_results:
-        structured['big_five'] = {
-            'selected_option': test_results['bigFiveScreen'],
-            'test_type': 'Big Five Personality Assessment'
-        }
-    
-    # RIASEC Test
-    if 'riasecScreen' in test_results:
-        structured['riasec'] = {
-            'selected_option': test_results['riasecScreen'],
-            'test_type': 'RIASEC Career Interest Inventory'
-        }
-    
-    # Decision Making Test
-    if 'decisionScreen' in test_results:
-        structured['decision_making'] = {
-            'selected_option': test_results['decisionScreen'],
-            'test_type': 'Decision Making Style Assessment'
-        }
-    
-    # Life Situation Assessment
-    if 'lifeScreen' in test_results:
-        structured['life_situation'] = {
-            'selected_option': test_results['lifeScreen'],
-            'test_type': 'Life Situation Assessment'
-        }
-    
-    # VARK Learning Style
-    if 'varkScreen' in test_results:
-        structured['learning_style'] = {
-            'selected_option': test_results['varkScreen'],
-            'test_type': 'VARK Learning Style Assessment'
-        }
-    
-    return structured
-
-def get_fallback_insights(test_results):
-    """Provide fallback insights when AI is not available"""
-    return {
-        "best_field": {
-            "field": "Technology & Innovation",
-            "reasoning": "Based on your assessment responses, you show strong analytical and problem-solving capabilities that align well with technology fields."
-        },
-        "roadmap": {
-            "short_term": [
-                "Complete foundational courses in your area of interest",
-                "Build a portfolio of small projects",
-                "Join relevant online communities and forums"
-            ],
-            "mid_term": [
-                "Pursue specialized certifications",
-                "Gain practical experience through internships or projects",
-                "Develop leadership and communication skills"
-            ],
-            "long_term": [
-                "Take on senior roles with increased responsibility",
-                "Mentor others and share knowledge",
-                "Stay updated with industry trends and innovations"
-            ]
-        },
-        "result_analysis": {
-            "strengths": [
-                "Strong analytical thinking",
-                "Good problem-solving abilities",
-                "Adaptable to new situations"
-            ],
-            "weaknesses": [
-                "May need to develop interpersonal skills",
-                "Could benefit from more practical experience"
-            ],
-            "reasoning": "Your responses indicate a preference for logical, structured approaches to problems, which is valuable in many professional contexts."
-        },
-        "career_recommendations": [
-            {
-                "role": "Software Developer",
-                "explanation": "Your analytical skills and problem-solving approach make you well-suited for programming and software development."
-            },
-            {
-                "role": "Data Analyst",
-                "explanation": "Your attention to detail and logical thinking align well with data analysis and interpretation roles."
-            },
-            {
-                "role": "Project Manager",
-                "explanation": "Your organizational skills and systematic approach could be valuable in project management positions."
-            }
-        ],
-        "skill_recommendations": {
-            "technical_skills": [
-                "Programming languages (Python, JavaScript, Java)",
-                "Data analysis tools (Excel, SQL, Tableau)",
-                "Project management software",
-                "Cloud computing basics"
-            ],
-            "soft_skills": [
-                "Communication and presentation",
-                "Team collaboration",
-                "Time management",
-                "Critical thinking"
-            ]
-        },
-        "skill_gaps": [
-            "Industry-specific technical knowledge",
-            "Professional networking abilities",
-            "Advanced communication skills",
-            "Leadership experience"
-        ],
-        "future_plans": {
-            "3_year_plan": "Establish yourself as a competent professional in your chosen field with solid technical skills and growing industry knowledge.",
-            "5_year_plan": "Take on leadership responsibilities, mentor junior colleagues, and become recognized as a subject matter expert.",
-            "10_year_plan": "Achieve senior leadership position, drive strategic initiatives, and contribute to industry innovation and best practices."
-        },
-        "daily_habits": [
-            "Spend 30-60 minutes daily learning new skills or technologies",
-            "Read industry news and trends for 15 minutes",
-            "Practice problem-solving with coding challenges or case studies",
-            "Network with one new professional contact weekly",
-            "Reflect on daily accomplishments and areas for improvement"
-        ],
-        "certifications": [
-            {
-                "name": "Google Career Certificates",
-                "provider": "Google",
-                "direct_enrollment_link": "https://grow.google/certificates/",
-                "why_recommended": "Industry-recognized credentials that provide practical skills for in-demand careers."
-            },
-            {
-                "name": "AWS Cloud Practitioner",
-                "provider": "Amazon Web Services",
-                "direct_enrollment_link": "https://aws.amazon.com/certification/certified-cloud-practitioner/",
-                "why_recommended": "Essential cloud computing knowledge that's valuable across many tech roles."
-            },
-            {
-                "name": "Microsoft Azure Fundamentals",
-                "provider": "Microsoft",
-                "direct_enrollment_link": "https://docs.microsoft.com/en-us/learn/certifications/azure-fundamentals/",
-                "why_recommended": "Foundational cloud knowledge from a major cloud provider."
-            },
-            {
-                "name": "Coursera Professional Certificates",
-                "provider": "Coursera",
-                "direct_enrollment_link": "https://www.coursera.org/professional-certificates",
-                "why_recommended": "Comprehensive programs designed with industry partners for job-ready skills."
+def run_generation(structured_results, cache_key, client_id, lane=AdmissionController.INTERACTIVE):
+    """
+    Generate insights for a profile, sharing the call with identical in-flight requests
+    
+    Only the request that actually calls Gemini waits for admission.
+    
+    Returns:
+        (insights, shared) where shared is True if another request's generation was reused
+        
+    Raises:
+        AdmissionRejected: if the upstream quota will not allow the call soon enough
+    """
+    ai_generator = get_ai_generator()
+    if INSIGHTS_FANOUT:
+        generate = ai_generator.generate_insights_fanout_async
+        cost = len(AIInsightsGenerator.FANOUT_FIRST) + len(AIInsightsGenerator.FANOUT_GROUPS)
+    else:
+        generate = ai_generator.generate_insights_async
+        cost = 1
+    
+    def generate_admitted():
+        insights_admission.acquire(client_id, lane, cost=cost)
+        return insights_loop.run(generate(structured_results, max_retries=3))
+    
+    insights, shared = insights_flight.do(cache_key, generate_admitted)
+    
+    # Reused results were stored and logged by the request that generated them
+    if not shared:
+        stored = compact_insights(insights)
+        insights_cache.set(cache_key, stored)
+        profile_index.add(structured_results, stored)
+        insights_log.log({'key': cache_key, 'source': 'generate', 'insights': insights})
+    
+    return insights, shared
+
+def submit_insights_job(structured_results, cache_key, webhook_url=None):
+    """Queue a background generation and answer 202 with the job to poll"""
+    client_id = client_identifier()
+    try:
+        job_id, existing = insights_jobs.submit(
+            cache_key,
+            lambda: run_generation(structured_results, cache_key, client_id, AdmissionController.BATCH)[0],
+            webhook_url=webhook_url
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+    except QueueFullError as e:
+        response = jsonify({'error': f'Too many pending insight jobs: {e}', 'success': False, 'retry_after': 5})
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+    
+    poll_url = f"/api/jobs/{job_id}"
+    body = {
+        'success': True,
+        'job_id': job_id,
+        'status': JobStore.QUEUED,
+        'existing': existing,
+        'poll_url': poll_url
+    }
+    
+    # Closest known profile to show while the job runs
+    match = profile_index.nearest(structured_results)
+    if match is not None:
+        body['draft'] = {'insights': decode_insights(match[0]), 'similarity': match[1]}
+    
+    response = jsonify(body)
+    response.status_code = 202
+    response.headers['Location'] = poll_url
+    return response
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_insights_job(job_id):
+    """
+    Status of a background insights job
+    
+    Pass ?wait=<seconds> (at most 30) to hold the request until the job finishes.
+    """
+    wait = min(max(request.args.get('wait', 0, type=float), 0), 30)
+    job = insights_jobs.store.wait(job_id, wait) if wait else insights_jobs.store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found.', 'success': False}), 404
+    
+    payload = job_payload(job)
+    payload['success'] = job['status'] != JobStore.FAILED
+    return jsonify(payload)
+
+@app.route('/api/generate-insights/stream', methods=['POST'])
+def generate_insights_stream():
+    """
+    Stream AI insights as Server-Sent Events
+    
+    Accepts the same payload as /api/generate-insights. Emits one "section" event
+    per top-level field ({"name": ..., "value": ...}) as soon as it is complete,
+    then a "done" event, or an "error" event if generation fails.
+    """
+    data = request.get_json()
+    
+    if not data or 'testResults' not in data:
+        return jsonify({
+            'error': 'Invalid request. testResults required.',
+            'success': False
+        }), 400
+    
+    test_results = data['testResults']
+    
+    if not test_results:
+        return jsonify({
+            'error': 'No test results provided.',
+            'success': False
+        }), 400
+    
+    structured_results = convert_to_structured_format(test_results)
+    cache_key = canonical_key(structured_results)
+    cached_insights = insights_cache.get(cache_key)
+    if cached_insights is None:
+        cached_insights = precomputed_insights.get(cache_key)
+    
+    ai_generator = get_ai_generator() if cached_insights is None else None
+    if cached_insights is None and not ai_generator:
+        return jsonify({
+            'error': 'AI service is not available. Please check your API configuration.',
+            'success': False
+        }), 503
+    
+    neighbour = profile_index.nearest(structured_results) if cached_insights is None else None
+    similarity = None
+    
+    if cached_insights is None:
+        try:
+            insights_admission.acquire(client_identifier())
+        except AdmissionRejected as e:
+            if neighbour is None or neighbour[1] < NEIGHBOUR_SERVE_THRESHOLD:
+                return admission_rejected_response(e)
+            # Saturated: replay the closest profile instead of generating
+            cached_insights, similarity = neighbour
+            neighbour = None
+    
+    def event_stream():
+        insights = {}
+        try:
+            if neighbour is not None:
+                # Shown while the exact insights are generated
+                yield format_sse_event('draft', {'insights': decode_insights(neighbour[0]), 'similarity': neighbour[1]})
+            
+            if cached_insights is not None:
+                sections = cached_insights.items()
+            else:
+                sections = ai_generator.generate_insights_stream(structured_results)
+            
+            for name, value in sections:
+                insights[name] = value
+                yield format_sse_event('section', {'name': name, 'value': value})
+            
+            missing = [field for field in AIInsightsGenerator.REQUIRED_FIELDS if field not in insights]
+            if missing:
+                raise ValueError(f"Missing required field: {', '.join(missing)}")
+            
+            if cached_insights is None:
+                stored = compact_insights(insights)
+                insights_cache.set(cache_key, stored)
+                profile_index.add(structured_results, stored)
+                insights_log.log({'key': cache_key, 'source': 'stream', 'insights': insights})
+            
+            done = {
+                'success': True,
+                'cached': cached_insights is not None,
+                'sections': list(insights.keys())
             }
+            if similarity is not None:
+                done['approximate'] = True
+                done['similarity'] = similarity
+            yield format_sse_event('done', done)
+            
+        except InsightsGenerationError as e:
+            print(f"Error streaming insights: {e}")
+            payload = {'error': str(e), 'success': False, 'retry_suggested': e.retryable}
+            if e.retry_after is not None:
+                payload['retry_after'] = math.ceil(e.retry_after)
+            yield format_sse_event('error', payload)
+            
+        except Exception as e:
+            print(f"Error streaming insights: {e}")
+            yield format_sse_event('error', {
+                'error': f'Failed to generate AI insights: {str(e)}',
+                'success': False,
+                'retry_suggested': True
+            })
+    
+    response = Response(stream_with_context(event_stream()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/generate-insights/batch', methods=['POST'])
+def generate_insights_batch():
+    """
+    Generate insights for many students, streamed back as NDJSON
+    
+    Expected JSON payload:
+    {
+        "records": [
+            {"id": "student-1", "testResults": {...}},
+            ...
         ]
     }
+    
+    Emits one line per record in completion order:
+    {"index": 0, "id": "student-1", "success": true, "insights": {...}, "cached": false}
+    or {"index": ..., "id": ..., "success": false, "error": ..., "retry_after": ...},
+    then a final {"done": true, ...} summary line. Identical profiles are
+    generated once, and at most INSIGHTS_BATCH_CONCURRENCY run at a time.
+    """
+    data = request.get_json()
+    records = data.get('records') if isinstance(data, dict) else None
+    
+    if not isinstance(records, list) or not records:
+        return jsonify({
+            'error': 'Invalid request. records required.',
+            'success': False
+        }), 400
+    
+    if len(records) > INSIGHTS_BATCH_MAX_RECORDS:
+        return jsonify({
+            'error': f'Too many records. At most {INSIGHTS_BATCH_MAX_RECORDS} per batch.',
+            'success': False
+        }), 413
+    
+    # Group records by profile so each distinct profile is generated once
+    groups = {}
+    invalid = []
+    for index, record in enumerate(records):
+        test_results = record.get('testResults') if isinstance(record, dict) else None
+        if not test_results:
+            invalid.append(index)
+            continue
+        structured_results = convert_to_structured_format(test_results)
+        cache_key = canonical_key(structured_results)
+        if cache_key not in groups:
+            groups[cache_key] = (structured_results, [])
+        groups[cache_key][1].append((index, record.get('id')))
+    
+    client_id = client_identifier()
+    
+    def result_lines(members, payload):
+        for index, record_id in members:
+            yield json.dumps(dict({'index': index, 'id': record_id}, **payload), ensure_ascii=False) + '\n'
+    
+    def ndjson_stream():
+        summary = {'done': True, 'total': len(records), 'unique_profiles': len(groups),
+                   'succeeded': 0, 'failed': len(invalid), 'cached': 0}
+        
+        for index in invalid:
+            yield from result_lines([(index, None)], {'success': False, 'error': 'testResults required.'})
+        
+        # Cached profiles go out first, without using a generation slot
+        pending = []
+        for cache_key, (structured_results, members) in groups.items():
+            insights = insights_cache.get(cache_key)
+            if insights is None:
+                insights = precomputed_insights.get(cache_key)
+            if insights is None:
+                pending.append(cache_key)
+                continue
+            summary['succeeded'] += len(members)
+            summary['cached'] += len(members)
+            yield from result_lines(members, {'success': True, 'insights': decode_insights(insights), 'cached': True})
+        
+        if pending and not get_ai_generator():
+            summary['failed'] += sum(len(groups[cache_key][1]) for cache_key in pending)
+            for cache_key in pending:
+                yield from result_lines(groups[cache_key][1], {
+                    'success': False, 'error': 'AI service is not available. Please check your API configuration.'
+                })
+            yield json.dumps(summary) + '\n'
+            return
+        
+        # Sliding window: never more than INSIGHTS_BATCH_CONCURRENCY generations queued or running
+        executor = ThreadPoolExecutor(max_workers=INSIGHTS_BATCH_CONCURRENCY, thread_name_prefix='insights-batch')
+        in_flight = {}
+        pending.reverse()
+        try:
+            while pending or in_flight:
+                while pending and len(in_flight) < INSIGHTS_BATCH_CONCURRENCY:
+                    cache_key = pending.pop()
+                    future = executor.submit(
+                        run_generation, groups[cache_key][0], cache_key, client_id, AdmissionController.BATCH
+                    )
+                    in_flight[future] = cache_key
+                
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    members = groups.pop(in_flight.pop(future))[1]
+                    try:
+                        insights, _ = future.result()
+                    except Exception as e:
+                        summary['failed'] += len(members)
+                        payload = {'success': False, 'error': f'Failed to generate AI insights: {e}'}
+                        retry_after = getattr(e, 'retry_after', None)
+                        if retry_after is not None:
+                            payload['retry_after'] = math.ceil(retry_after)
+                        yield from result_lines(members, payload)
+                        continue
+                    summary['succeeded'] += len(members)
+                    yield from result_lines(members, {'success': True, 'insights': insights, 'cached': False})
+            
+            yield json.dumps(summary) + '\n'
+        finally:
+            # On client disconnect, drop what has not started; running generations still fill the cache
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    response = Response(stream_with_context(ndjson_stream()), mimetype='application/x-ndjson')
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def insights_error_response(error):
+    """Build the JSON error response for a failed generation, with a Retry-After hint when known"""
+    body = {
+        'error': str(error),
+        'success': False,
+        'retry_suggested': error.retryable
+    }
+    
+    if error.retry_after is None:
+        return jsonify(body), 500
+    
+    retry_after = math.ceil(error.retry_after)
+    body['retry_after'] = retry_after
+    response = jsonify(body)
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def neighbour_response(structured_results):
+    """Insights of the closest generated profile if it is similar enough to serve outright, else None"""
+    match = profile_index.nearest(structured_results)
+    if match is None or match[1] < NEIGHBOUR_SERVE_THRESHOLD:
+        return None
+    
+    insights, similarity = match
+    return jsonify({
+        'success': True,
+        'insights': decode_insights(insights),
+        'cached': True,
+        'approximate': True,
+        'similarity': similarity
+    })
+
+def admission_rejected_response(error):
+    """429 with the estimated wait when the upstream quota cannot take the request"""
+    retry_after = max(1, math.ceil(error.retry_after))
+    response = jsonify({
+        'error': f'Too many insight requests right now: {error}',
+        'success': False,
+        'retry_suggested': True,
+        'retry_after': retry_after
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def client_identifier():
+    """Client address for per-client fairness, as resolved by ProxyFix from the trusted proxy's hop"""
+    return request.remote_addr or 'unknown'
+
+def format_sse_event(event, payload):
+    """Format a JSON payload as a Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+# Reports larger than this many bytes are buffered in an anonymous temp file instead of memory (0 = always memory)
+PDF_SPILL_BYTES = int(os.environ.get('PDF_SPILL_BYTES', 0))
+
+# Rendered PDFs and markdown keyed by their inputs; the renderer source is part of every key
+try:
+    render_cache = create_render_cache_from_env(
+        version=source_fingerprint(*(
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+            for name in ('markdown_pdf_generator.py', 'report_fonts.py')
+        ))
+    )
+except OSError as e:
+    print(f"Warning: Could not use the render cache, rendering every report: {e}")
+    render_cache = None
+
+# Process pool that renders PDFs off the request threads; None renders on the request thread
+render_service = create_render_service_from_env()
+if render_service is not None:
+    # Start the render processes (ReportLab and styles preloaded) without delaying startup
+    render_pool_init = BackgroundInit('render_pool', render_service.warm).start()
+
+def render_key(kind, test_results, ai_insights):
+    """Cache key of a render; reports print their generation date, so the day is part of the key"""
+    # The font files the renderer resolves, with their size and mtime; nothing is loaded here
+    fonts = lazy_import('report_fonts').font_fingerprint() if kind == 'pdf' else None
+    return render_cache.key(kind, test_results, ai_insights, datetime.now().strftime('%Y-%m-%d'), fonts)
+
+def send_render(path, key, mimetype, download_name=None):
+    """Send a stored render by path (zero-copy where the server supports it), or 304 for a matching ETag"""
+    return send_file(
+        path,
+        mimetype=mimetype,
+        as_attachment=download_name is not None,
+        download_name=download_name,
+        etag=key,
+        conditional=True
+    )
+
+def cached_render_response(key, suffix, mimetype, download_name=None):
+    """Response for a stored render, or None on a miss"""
+    if render_cache is None:
+        return None
+    # Keys are content addresses, so a matching ETag means the client already has these bytes.
+    # Werkzeug only evaluates conditionals for GET and HEAD, and these endpoints are POST.
+    if request.if_none_match.contains(key):
+        response = make_response('', 304)
+        response.set_etag(key)
+        return response
+    path = render_cache.get(key, suffix)
+    if path is None:
+        return None
+    try:
+        return send_render(path, key, mimetype, download_name)
+    except FileNotFoundError:
+        # Evicted by another worker since the lookup
+        return None
 
 @app.route('/api/download-report', methods=['POST'])
 def download_report():
@@ -304,29 +749,49 @@ def download_report():
         
         test_results = data['testResults']
         ai_insights = data.get('aiInsights', None)
+        if ai_insights:
+            # Insights come back from the client; coerce what can be coerced, keeping everything else
+            ai_insights = AIInsightsGenerator.SCHEMA.normalize(ai_insights, lenient=True)
         
-        # Generate timestamp for filename
+        # Name offered to the browser; nothing is written to the working directory
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"psychological_report_{timestamp}.pdf"
         
-        # Generate PDF report
-        pdf_path = generate_pdf_report(
-            test_results=test_results,
-            ai_insights=ai_insights,
-            filename=filename
-        )
+        key = render_key('pdf', test_results, ai_insights) if render_cache is not None else None
+        cached = cached_render_response(key, '.pdf', 'application/pdf', filename)
+        if cached is not None:
+            return cached
+        
+        if render_service is not None:
+            pdf = io.BytesIO(render_service.render_pdf(test_results, ai_insights))
+        else:
+            # Render into memory (or an anonymous temp file past PDF_SPILL_BYTES) and stream it
+            render_pdf_report = lazy_import('markdown_pdf_generator').render_pdf_report
+            pdf = render_pdf_report(test_results, ai_insights, spill_bytes=PDF_SPILL_BYTES)
+        
+        if render_cache is not None:
+            with pdf:
+                path = render_cache.put(key, '.pdf', pdf)
+            return send_render(path, key, 'application/pdf', filename)
         
-        # Create response with PDF file
-        response = make_response(send_file(
-            pdf_path,
+        return send_file(
+            pdf,
             as_attachment=True,
             download_name=filename,
             mimetype='application/pdf'
-        ))
+        )
         
-        # Clean up the temporary file after sending
+    except RenderQueueFull as e:
+        response = jsonify({'error': f'Too many reports being generated: {e}', 'success': False, 'retry_after': 5})
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
         return response
-        
+    except RenderTimeout as e:
+        print(f"Error in download_report: {e}")
+        return jsonify({
+            'error': f'PDF report took too long to generate: {str(e)}',
+            'success': False
+        }), 504
     except Exception as e:
         print(f"Error in download_report: {e}")
         return jsonify({
@@ -341,16 +806,26 @@ def generate_markdown():
         data = request.get_json()
         test_results = data.get('testResults', {})
         ai_insights = data.get('aiInsights')
+        if ai_insights:
+            ai_insights = AIInsightsGenerator.SCHEMA.normalize(ai_insights, lenient=True)
+        
+        key = render_key('markdown', test_results, ai_insights) if render_cache is not None else None
+        cached = cached_render_response(key, '.json', 'application/json')
+        if cached is not None:
+            return cached
         
         # Generate markdown content
-        from markdown_pdf_generator import MarkdownPDFGenerator
-        generator = MarkdownPDFGenerator()
+        generator = lazy_import('markdown_pdf_generator').shared_generator()
         markdown_content = generator.generate_markdown(test_results, ai_insights)
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'markdown': markdown_content
         })
+        if render_cache is not None:
+            path = render_cache.put(key, '.json', response.get_data())
+            return send_render(path, key, 'application/json')
+        return response
         
     except Exception as e:
         print(f"Error generating markdown: {e}")
@@ -359,14 +834,44 @@ def generate_markdown():
             'success': False
         }), 500
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics for this worker process"""
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/startup', methods=['GET'])
+def startup_details():
+    """Boot-time breakdown of this worker: import, setup and lazy-initialization timings"""
+    details = startup_report.as_dict()
+    details['ai_generator'] = ai_generator_init.state
+    return jsonify(details)
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
+    ai_generator = ai_generator_init.value
     return jsonify({
         'status': 'healthy',
-        'ai_generator_available': ai_generator is not None
+        'ai_generator_available': ai_generator is not None,
+        'ai_generator_state': ai_generator_init.state,
+        'insights_cache': insights_cache.stats(),
+        'precomputed_insights': len(precomputed_insights),
+        'single_flight': insights_flight.stats(),
+        'insights_jobs': insights_jobs.stats(),
+        'admission': insights_admission.stats(),
+        'profile_index': profile_index.stats(),
+        'insights_codec': insights_codec.stats() if insights_codec else None,
+        'insights_log': insights_log.stats(),
+        'static_assets': static_assets.stats() if static_assets else None,
+        'render_cache': render_cache.stats() if render_cache else None,
+        'render_service': render_service.stats() if render_service else None,
+        'circuit_breaker': gemini_circuit_breaker.stats(),
+        'prompt_cache': ai_generator.prompt_cache.stats() if ai_generator else None
     })
 
+startup_report.mark('setup')
+startup_report.mark_ready()
+
 if __name__ == '__main__':
     print("Starting AI Insights Web Server...")
     print("Make sure to set GEMINI_API_KEY in your .env file")